@@ -0,0 +1,260 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from types import SimpleNamespace
+
+MQTT_BROKER = "localhost"
+MQTT_PORT = 1883
+API_URL = "http://localhost:8000"
+TOPIC_ACK = "parking/sensors/ack"
+MQTT_QOS = 1
+FEE_TOLERANCE = 0.005
+VOLATILE_KEYS = {"time", "entry_time", "exit_time", "payment_time", "generated_at"}
+
+
+def diff(expected, actual, path=""):
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        found = []
+        for key in sorted(set(expected) | set(actual)):
+            if key not in VOLATILE_KEYS:
+                found += diff(expected.get(key), actual.get(key), f"{path}.{key}" if path else key)
+        return found
+    if isinstance(expected, list) and isinstance(actual, list) and len(expected) == len(actual):
+        found = []
+        for i, (e, a) in enumerate(zip(expected, actual)):
+            found += diff(e, a, f"{path}[{i}]")
+        return found
+    if (isinstance(expected, (int, float)) and isinstance(actual, (int, float))
+            and not isinstance(expected, bool) and not isinstance(actual, bool)):
+        return [] if abs(expected - actual) <= FEE_TOLERANCE else [(path, expected, actual)]
+    return [] if expected == actual else [(path, expected, actual)]
+
+
+def http_outcome(status, response):
+    return {"status": status, "response": response}
+
+
+def pace(records, speed):
+    start = time.monotonic()
+    first = min((record["t"] for record in records), default=0)
+    for record in sorted(records, key=lambda record: record["t"]):
+        if speed > 0:
+            delay = start + (record["t"] - first) / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        yield record
+
+
+class Divergences:
+    def __init__(self):
+        self.items = []
+
+    def check(self, record, expected, actual):
+        fields = diff(expected, actual)
+        if fields:
+            self.items.append({
+                "t": record["t"],
+                "source": record["src"],
+                "target": record.get("topic") or f"{record['method']} {record['path']}",
+                "fields": [{"field": f, "recorded": e, "replayed": a} for f, e, a in fields],
+            })
+
+
+class CapturedResults:
+    enabled = True
+
+    def __init__(self):
+        self.entries = []
+
+    def record(self, entry):
+        self.entries.append(entry)
+
+
+def replay_inprocess(records, speed, database_url=None):
+    if database_url is None:
+        database_url = f"sqlite:///{tempfile.mkstemp(prefix='replay-', suffix='.db')[1]}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["DB_ASYNC"] = "false"
+
+    from fastapi import Depends
+    from fastapi.testclient import TestClient
+    from src.app import main
+    from src.app.config import config_store
+    from src.app.database import get_db
+    from src.app.migrations import migrate
+    from src.app.services.dedup import EventDeduplicator
+    from src.app.services.mqtt_service import MQTTService
+    from src.app.services.parking_manager import ParkingManager
+    from src.app.services.simulation import VirtualClock
+    from src.app.services.spot_index import spot_index
+
+    migrate(main.engine)
+    config_store.reload()
+    main.reconcile_spot_index()
+
+    first = datetime.fromtimestamp(min(record["t"] for record in records)) if records else datetime.now()
+    clock = VirtualClock(first)
+    results = CapturedResults()
+    service = MQTTService(ack_topic="", recorder=results, clock=clock,
+                          deduplicator=EventDeduplicator(clock=lambda: clock().timestamp()))
+    service.client = SimpleNamespace(publish=lambda *args, **kwargs: None, ack=lambda *args, **kwargs: None)
+
+    def clocked_manager(db=Depends(get_db)):
+        config = config_store.current
+        return ParkingManager(db, config.price_calculator, config.validator, spot_index, clock)
+
+    main.app.dependency_overrides[main.parking_manager_dependency] = clocked_manager
+    client = TestClient(main.app)
+    divergences = Divergences()
+
+    started = time.perf_counter()
+    for record in pace(records, speed):
+        clock.advance(max(clock(), datetime.fromtimestamp(record["t"])))
+        if record["src"] == "mqtt":
+            raw = record["raw"] if "raw" in record else json.dumps(record["payload"])
+            msg = SimpleNamespace(topic=record["topic"], payload=raw.encode(), mid=None, qos=0)
+            event = service.accept(msg)
+            if event is not None:
+                service.process_batch([event])
+            divergences.check(record, record["result"], results.entries.pop()["result"])
+        else:
+            body = record["body"]
+            response = client.request(record["method"], record["path"], params=record["query"] or None,
+                                      headers=record["headers"],
+                                      content=None if body is None else
+                                      (body if isinstance(body, str) else json.dumps(body)))
+            try:
+                replayed = response.json()
+            except ValueError:
+                replayed = response.text or None
+            divergences.check(record, http_outcome(record["status"], record["response"]),
+                              http_outcome(response.status_code, replayed))
+    return time.perf_counter() - started, divergences
+
+
+def replay_broker(records, speed, broker, port, api, drain):
+    import paho.mqtt.client as mqtt
+
+    acks = {}
+    received = threading.Condition()
+
+    def on_ack(client, userdata, msg):
+        ack = json.loads(msg.payload)
+        with received:
+            acks[ack["event_id"]] = ack
+            received.notify_all()
+
+    client = mqtt.Client(client_id=f"replay-{os.getpid()}")
+    client.on_message = on_ack
+    client.on_connect = lambda c, u, f, rc: c.subscribe(TOPIC_ACK)
+    client.connect(broker, port, 60)
+    client.loop_start()
+    time.sleep(1)
+
+    divergences = Divergences()
+    expected = {}
+    started = time.perf_counter()
+    for n, record in enumerate(pace(records, speed)):
+        if record["src"] == "mqtt":
+            if "raw" in record:
+                client.publish(record["topic"], record["raw"], qos=MQTT_QOS)
+                continue
+            payload = record["payload"]
+            if payload.get("event_id") is None:
+                payload = {**payload, "event_id": f"replay-{n}"}
+            if record["result"].get("error") != "Duplicate":
+                expected[payload["event_id"]] = record
+            client.publish(record["topic"], json.dumps(payload), qos=MQTT_QOS)
+        else:
+            url = f"{api.rstrip('/')}{record['path']}" + (f"?{record['query']}" if record["query"] else "")
+            body = record["body"]
+            data = None if body is None else (body if isinstance(body, str) else json.dumps(body)).encode()
+            request = urllib.request.Request(url, data=data, method=record["method"], headers=record["headers"])
+            try:
+                with urllib.request.urlopen(request) as response:
+                    status, raw = response.status, response.read()
+            except urllib.error.HTTPError as e:
+                status, raw = e.code, e.read()
+            try:
+                replayed = json.loads(raw) if raw else None
+            except ValueError:
+                replayed = raw.decode(errors="replace")
+            divergences.check(record, http_outcome(record["status"], record["response"]),
+                              http_outcome(status, replayed))
+
+    deadline = time.monotonic() + drain
+    with received:
+        while not set(expected) <= set(acks) and time.monotonic() < deadline:
+            received.wait(deadline - time.monotonic())
+    elapsed = time.perf_counter() - started
+    client.loop_stop()
+    client.disconnect()
+
+    for event_id, record in expected.items():
+        ack = acks.get(event_id)
+        if ack is None:
+            divergences.items.append({"t": record["t"], "source": "mqtt", "target": record["topic"],
+                                      "fields": [{"field": "ack", "recorded": event_id, "replayed": None}]})
+            continue
+        replayed = {k: v for k, v in ack.items() if k not in ("event_id", "topic")}
+        divergences.check(record, record["result"], replayed)
+    return elapsed, divergences
+
+
+def summarize(records, elapsed, divergences, mode, speed):
+    times = [record["t"] for record in records]
+    span = max(times) - min(times) if records else 0
+    return {
+        "mode": mode,
+        "speed": speed or "max",
+        "records": len(records),
+        "mqtt": sum(1 for r in records if r["src"] == "mqtt"),
+        "http": sum(1 for r in records if r["src"] == "http"),
+        "recorded_seconds": round(span, 3),
+        "wall_seconds": round(elapsed, 3),
+        "throughput": round(len(records) / elapsed, 1) if elapsed else None,
+        "divergent": len(divergences.items),
+        "divergences": divergences.items,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay recorded MQTT and HTTP traffic against a fresh database",
+                                     epilog="run from the repository root: python -m scripts.replay FILE")
+    parser.add_argument("file", help="traffic file written with TRAFFIC_RECORD_FILE")
+    parser.add_argument("--speed", type=float, default=1.0, help="1: recorded pace, N: N times faster, 0: max")
+    parser.add_argument("--mode", choices=["inprocess", "broker"], default="inprocess",
+                        help="inprocess: drive the services directly on a virtual clock; "
+                             "broker: publish to a running server's broker and call its API")
+    parser.add_argument("--database-url", default=None, help="fresh database for inprocess mode (default: temp sqlite)")
+    parser.add_argument("--broker", default=MQTT_BROKER)
+    parser.add_argument("--port", type=int, default=MQTT_PORT)
+    parser.add_argument("--api", default=API_URL)
+    parser.add_argument("--drain", type=float, default=10, help="seconds to wait for outstanding acks (broker)")
+    parser.add_argument("--report", default=None, help="write the full report as JSON")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    os.environ.pop("TRAFFIC_RECORD_FILE", None)
+    from src.app.services.recorder import read_records
+
+    records = read_records(args.file)
+    if args.mode == "broker":
+        elapsed, found = replay_broker(records, args.speed, args.broker, args.port, args.api, args.drain)
+    else:
+        elapsed, found = replay_inprocess(records, args.speed, args.database_url)
+    report = summarize(records, elapsed, found, args.mode, args.speed)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+    print(json.dumps({**report, "divergences": report["divergences"][:20]}, indent=2, default=str))
+    sys.exit(1 if report["divergent"] else 0)
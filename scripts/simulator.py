@@ -1,6 +1,11 @@
+import argparse
+import math
+import threading
 import time
+import uuid
 import random
 import json
+from functools import partial
 import paho.mqtt.client as mqtt
 
 MQTT_BROKER = "localhost"
@@ -8,15 +13,20 @@ MQTT_PORT = 1883
 TOPIC_ENTRANCE = "parking/entrance/camera"
 TOPIC_EXIT = "parking/exit/camera"
 TOPIC_PAYMENT = "parking/parking_meter/pay"
+MQTT_QOS = 1
 
 client = mqtt.Client()
 
 parked_vehicles = []
 
 
-def generate_random_vehicle():
+def publish(topic, payload):
+    client.publish(topic, json.dumps({**payload, "event_id": uuid.uuid4().hex}), qos=MQTT_QOS)
+
+
+def generate_random_vehicle(rng=random):
     letters = "ABCDEFGHJKLMNPQRSTUWXYZ"
-    n = random.randint(1, 100)
+    n = rng.randint(1, 100)
     if n <= 94:
         country = "PL"
     elif n <= 98:
@@ -24,31 +34,31 @@ def generate_random_vehicle():
     elif n <= 99:
         country = "DE"
     else:
-        country = random.choice(["CZ", "SK", "LT"])
+        country = rng.choice(["CZ", "SK", "LT"])
 
     if country == "PL":
-        n = random.randint(1, 100)
+        n = rng.randint(1, 100)
         if n <= 90:
             prefix = "GD"
         elif n <= 95:
-            prefix = f"G{random.choice(['A', 'BY', 'CH', 'CZ', 'DA', 'KA', 'KS', 'KW', 'KY', 'KZ', 'LE', 'MB', 'ND', 'PU', 'S', 'SL', 'SP', 'ST', 'SZ', 'TC', 'WE', 'WO'])}"
+            prefix = f"G{rng.choice(['A', 'BY', 'CH', 'CZ', 'DA', 'KA', 'KS', 'KW', 'KY', 'KZ', 'LE', 'MB', 'ND', 'PU', 'S', 'SL', 'SP', 'ST', 'SZ', 'TC', 'WE', 'WO'])}"
         else:
             first_letters = ["B", "C", "D", "E", "F", "G", "K", "L", "N", "O", "P", "R", "S", "T", "W", "Z"]
-            prefix = f"{random.choice(first_letters)}{random.choice(letters)}"
-        reg_no = f"{prefix}{random.choice(letters)}{random.randint(100, 999)}{random.choice(letters)}"
+            prefix = f"{rng.choice(first_letters)}{rng.choice(letters)}"
+        reg_no = f"{prefix}{rng.choice(letters)}{rng.randint(100, 999)}{rng.choice(letters)}"
     else:
-        reg_no = f"{random.choice(letters)}{random.choice(letters)}{random.randint(100, 999)}{random.choice(letters)}"
+        reg_no = f"{rng.choice(letters)}{rng.choice(letters)}{rng.randint(100, 999)}{rng.choice(letters)}"
 
     return {
         "country": country,
         "registration_no": reg_no,
-        "floor": random.randint(0, 4)
+        "floor": rng.randint(0, 4)
     }
 
 
-def run_simulation():
+def run_simulation(broker=MQTT_BROKER, port=MQTT_PORT, interval=3.0):
     try:
-        client.connect(MQTT_BROKER, MQTT_PORT, 60)
+        client.connect(broker, port, 60)
         client.loop_start()
         print(f"Simulator running")
     except Exception as e:
@@ -60,7 +70,7 @@ def run_simulation():
 
         if chance < 0.15:
             vehicle = generate_random_vehicle()
-            client.publish(TOPIC_ENTRANCE, json.dumps(vehicle))
+            publish(TOPIC_ENTRANCE, vehicle)
             parked_vehicles.append(vehicle)
             print(f"[ENTRY] Camera: {vehicle['country']}_{vehicle['registration_no']}, Floor: {vehicle['floor']}")
 
@@ -68,21 +78,242 @@ def run_simulation():
             if parked_vehicles:
                 v = random.choice(parked_vehicles)
                 payload = {"country": v['country'], "registration_no": v['registration_no']}
-                client.publish(TOPIC_PAYMENT, json.dumps(payload))
+                publish(TOPIC_PAYMENT, payload)
                 print(f"[PAY] Parking meter: Payment for {v['registration_no']}")
 
         elif 0.25 <= chance < 0.30:
             if parked_vehicles:
                 v = parked_vehicles.pop(0)
                 payload = {"country": v['country'], "registration_no": v['registration_no']}
-                client.publish(TOPIC_EXIT, json.dumps(payload))
+                publish(TOPIC_EXIT, payload)
                 print(f"[EXIT] Exit camera: {v['registration_no']}")
 
-        time.sleep(3)
+        time.sleep(interval)
+
+
+def run_discrete_event(days, seed, arrivals_scale, output):
+    from src.app.config import load_config
+    from src.app.services.simulation import Simulation, SimulationConfig, DEFAULT_HOURLY_ARRIVALS
+
+    config = SimulationConfig(days=days, seed=seed,
+                              hourly_arrivals=tuple(rate * arrivals_scale for rate in DEFAULT_HOURLY_ARRIVALS))
+    report = Simulation(config, load_config(), vehicle_factory=generate_random_vehicle).run().as_dict()
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    report.pop("occupancy_samples")
+    print(json.dumps(report, indent=2))
+
+
+TOPIC_ACK = "parking/sensors/ack"
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class LatencyRecorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.latencies = {}
+        self.errors = {}
+        self.max_lag = 0.0
+        self.first_sent = None
+        self.last_ack = None
+
+    def sent(self, event_id, topic, scheduled_at, on_ack):
+        with self.lock:
+            self.pending[event_id] = (topic, scheduled_at, on_ack)
+            if self.first_sent is None:
+                self.first_sent = scheduled_at
+
+    def lagged(self, lag):
+        with self.lock:
+            self.max_lag = max(self.max_lag, lag)
+
+    def acked(self, ack, received_at):
+        with self.lock:
+            entry = self.pending.pop(ack.get("event_id"), None)
+            if entry is None:
+                return
+            topic, scheduled_at, on_ack = entry
+            self.latencies.setdefault(topic, []).append(received_at - scheduled_at)
+            if not ack.get("ok"):
+                self.errors[ack.get("error")] = self.errors.get(ack.get("error"), 0) + 1
+            self.last_ack = received_at
+        on_ack(ack.get("ok"))
+
+    def summary(self, offered_rate):
+        with self.lock:
+            every = [latency for values in self.latencies.values() for latency in values]
+            elapsed = (self.last_ack - self.first_sent) if every else 0
+
+            def stats(values):
+                return {
+                    "count": len(values),
+                    "p50_ms": round(percentile(values, 50) * 1000, 2) if values else None,
+                    "p95_ms": round(percentile(values, 95) * 1000, 2) if values else None,
+                    "p99_ms": round(percentile(values, 99) * 1000, 2) if values else None,
+                    "max_ms": round(max(values) * 1000, 2) if values else None,
+                }
+
+            return {
+                "offered_rate": offered_rate,
+                "sent": len(every) + len(self.pending),
+                "acked": len(every),
+                "lost": len(self.pending),
+                "throughput": round(len(every) / elapsed, 2) if elapsed else None,
+                "max_schedule_lag_ms": round(self.max_lag * 1000, 2),
+                "latency": stats(every),
+                "by_topic": {topic: stats(values) for topic, values in sorted(self.latencies.items())},
+                "errors": self.errors,
+            }
+
+
+class Gate:
+    def __init__(self, gate_id, run_id, rng, broker, port, max_parked):
+        self.gate_id = gate_id
+        self.run_id = run_id
+        self.rng = rng
+        self.max_parked = max_parked
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.parked = []
+        self.paid = []
+        self.sequence = 0
+        self.client = mqtt.Client(client_id=f"gate-{run_id}-{gate_id}")
+        self.client.connect(broker, port, 60)
+        self.client.loop_start()
+
+    def next_event(self):
+        with self.lock:
+            actions = []
+            if len(self.parked) + len(self.paid) + self.in_flight < self.max_parked:
+                actions.append(TOPIC_ENTRANCE)
+            if self.parked:
+                actions.append(TOPIC_PAYMENT)
+            if self.paid:
+                actions.append(TOPIC_EXIT)
+            topic = self.rng.choice(actions or [TOPIC_ENTRANCE])
+            if topic == TOPIC_ENTRANCE:
+                vehicle = generate_random_vehicle(self.rng)
+                on_ack = partial(self._entered, vehicle)
+            elif topic == TOPIC_PAYMENT:
+                vehicle = self.parked.pop(self.rng.randrange(len(self.parked)))
+                on_ack = partial(self._paid, vehicle)
+            else:
+                vehicle = self.paid.pop(0)
+                on_ack = self._exited
+            self.in_flight += 1
+            self.sequence += 1
+            event_id = f"{self.run_id}-{self.gate_id}-{self.sequence}"
+        return topic, {**vehicle, "event_id": event_id}, on_ack
+
+    def _entered(self, vehicle, ok):
+        with self.lock:
+            self.in_flight -= 1
+            if ok:
+                self.parked.append(vehicle)
+
+    def _paid(self, vehicle, ok):
+        with self.lock:
+            self.in_flight -= 1
+            (self.paid if ok else self.parked).append(vehicle)
+
+    def _exited(self, ok):
+        with self.lock:
+            self.in_flight -= 1
+
+    def run(self, recorder, start, stop_at, rate, arrival):
+        interval_rng = random.Random(self.rng.random())
+        next_at = start
+        while True:
+            next_at += interval_rng.expovariate(rate) if arrival == "poisson" else 1 / rate
+            if next_at >= stop_at:
+                break
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                recorder.lagged(-delay)
+            topic, payload, on_ack = self.next_event()
+            recorder.sent(payload["event_id"], topic, next_at, on_ack)
+            self.client.publish(topic, json.dumps(payload), qos=MQTT_QOS)
+
+    def close(self):
+        self.client.loop_stop()
+        self.client.disconnect()
+
+
+def run_load(broker, port, gates, rate, duration, arrival, seed, max_parked, drain):
+    rng = random.Random(seed)
+    run_id = uuid.uuid4().hex[:8]
+    recorder = LatencyRecorder()
+
+    listener = mqtt.Client(client_id=f"load-{run_id}")
+    listener.on_message = lambda c, u, msg: recorder.acked(json.loads(msg.payload), time.monotonic())
+    listener.on_connect = lambda c, u, f, rc: c.subscribe(TOPIC_ACK)
+    listener.connect(broker, port, 60)
+    listener.loop_start()
+
+    gate_list = [Gate(i, run_id, random.Random(rng.random()), broker, port, max(1, max_parked // gates))
+                 for i in range(gates)]
+    time.sleep(1)
+    start = time.monotonic()
+    threads = [threading.Thread(target=gate.run, args=(recorder, start, start + duration, rate / gates, arrival),
+                                name=f"gate-{gate.gate_id}", daemon=True) for gate in gate_list]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    deadline = time.monotonic() + drain
+    while recorder.pending and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    for gate in gate_list:
+        gate.close()
+    listener.loop_stop()
+    listener.disconnect()
+    print(json.dumps(recorder.summary(rate), indent=2))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Parking traffic simulator")
+    parser.add_argument("--mode", choices=["live", "des", "load"], default="live",
+                        help="live: publish random events to the MQTT broker in real time; "
+                             "des: run an accelerated in-process discrete-event simulation; "
+                             "load: drive many gates at a target rate and measure processing latency")
+    parser.add_argument("--broker", default=MQTT_BROKER)
+    parser.add_argument("--port", type=int, default=MQTT_PORT)
+    parser.add_argument("--interval", type=float, default=3.0, help="seconds between live events")
+    parser.add_argument("--days", type=float, default=7, help="simulated days (des)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--arrivals-scale", type=float, default=1.0, help="multiplier of the hourly arrival profile (des)")
+    parser.add_argument("--output", default=None, help="write the full des report, with occupancy samples, as JSON")
+    parser.add_argument("--gates", type=int, default=8, help="concurrent virtual gates, one MQTT client each (load)")
+    parser.add_argument("--rate", type=float, default=100, help="target events per second over all gates (load)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load (load)")
+    parser.add_argument("--arrival", choices=["poisson", "fixed"], default="poisson", help="arrival process (load)")
+    parser.add_argument("--max-parked", type=int, default=200, help="vehicles kept on the parking at most (load)")
+    parser.add_argument("--drain", type=float, default=10, help="seconds to wait for outstanding acks (load)")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    try:
-        run_simulation()
-    except KeyboardInterrupt:
-        client.disconnect()
\ No newline at end of file
+    args = parse_args()
+    if args.mode == "des":
+        run_discrete_event(args.days, args.seed, args.arrivals_scale, args.output)
+    elif args.mode == "load":
+        run_load(args.broker, args.port, args.gates, args.rate, args.duration, args.arrival, args.seed,
+                 args.max_parked, args.drain)
+    else:
+        try:
+            run_simulation(args.broker, args.port, args.interval)
+        except KeyboardInterrupt:
+            client.disconnect()
\ No newline at end of file
@@ -0,0 +1,138 @@
+import json
+import os
+import signal
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, Optional
+from dotenv import load_dotenv
+from src.app.services.pricing import PriceCalculator
+from src.app.services.validator import VehicleValidator
+
+load_dotenv()
+
+DEFAULT_PRICES = {0: 6, 1: 5, 2: 4, 3: 3, 4: 2}
+DEFAULT_BASIC_LETTERS = "BCDEFGKLNOPRSTWZ"
+DEFAULT_SPECIAL_LETTERS = "HU"
+
+
+@dataclass(frozen=True)
+class ParkingConfig:
+    prices: Mapping[int, float]
+    basic_letters: FrozenSet[str]
+    special_letters: FrozenSet[str]
+    tariff: Mapping[str, Any] = field(default_factory=dict)
+    price_calculator: PriceCalculator = field(init=False, repr=False, compare=False)
+    validator: VehicleValidator = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "prices", MappingProxyType({int(k): v for k, v in self.prices.items()}))
+        object.__setattr__(self, "basic_letters", frozenset(self.basic_letters))
+        object.__setattr__(self, "special_letters", frozenset(self.special_letters))
+        object.__setattr__(self, "tariff", MappingProxyType(dict(self.tariff)))
+        object.__setattr__(self, "price_calculator", PriceCalculator(self.prices, self.tariff))
+        object.__setattr__(self, "validator", VehicleValidator(self.basic_letters, self.special_letters))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ParkingConfig":
+        return cls(
+            prices=data.get("prices", DEFAULT_PRICES),
+            basic_letters=data.get("basic_letters", DEFAULT_BASIC_LETTERS),
+            special_letters=data.get("special_letters", DEFAULT_SPECIAL_LETTERS),
+            tariff=data.get("tariff", {}),
+        )
+
+
+def parse_prices(value: str) -> Dict[int, float]:
+    prices = {}
+    for item in value.split(","):
+        floor, price = item.split(":")
+        prices[int(floor)] = float(price)
+    return prices
+
+
+def parse_rate_bands(value: str) -> List[Dict[str, Any]]:
+    bands = []
+    for item in value.split(","):
+        times, multiplier = item.rsplit("=", 1)
+        start, end = times.split("-")
+        bands.append({"start": start.strip(), "end": end.strip(), "multiplier": float(multiplier)})
+    return bands
+
+
+def parse_surcharges(value: str) -> Dict[str, float]:
+    surcharges = {}
+    for item in value.split(","):
+        country, multiplier = item.split(":")
+        surcharges[country.strip()] = float(multiplier)
+    return surcharges
+
+
+def load_config() -> ParkingConfig:
+    config_file = os.getenv("PARKING_CONFIG_FILE")
+    if config_file:
+        with open(config_file, "r", encoding="utf-8") as f:
+            return ParkingConfig.from_dict(json.load(f))
+
+    data: Dict[str, Any] = {}
+    if os.getenv("PARKING_PRICES"):
+        data["prices"] = parse_prices(os.environ["PARKING_PRICES"])
+    if os.getenv("PARKING_BASIC_LETTERS"):
+        data["basic_letters"] = os.environ["PARKING_BASIC_LETTERS"]
+    if os.getenv("PARKING_SPECIAL_LETTERS"):
+        data["special_letters"] = os.environ["PARKING_SPECIAL_LETTERS"]
+
+    tariff: Dict[str, Any] = {}
+    if os.getenv("PARKING_GRACE_MINUTES"):
+        tariff["grace_minutes"] = int(os.environ["PARKING_GRACE_MINUTES"])
+    if os.getenv("PARKING_DAILY_CAP"):
+        tariff["daily_cap"] = float(os.environ["PARKING_DAILY_CAP"])
+    if os.getenv("PARKING_RATE_BANDS"):
+        tariff["bands"] = parse_rate_bands(os.environ["PARKING_RATE_BANDS"])
+    if os.getenv("PARKING_COUNTRY_SURCHARGES"):
+        tariff["country_surcharges"] = parse_surcharges(os.environ["PARKING_COUNTRY_SURCHARGES"])
+    if tariff:
+        data["tariff"] = tariff
+    return ParkingConfig.from_dict(data)
+
+
+class ConfigStore:
+    def __init__(self, loader: Callable[[], ParkingConfig] = load_config):
+        self._loader = loader
+        self._current: Optional[ParkingConfig] = None
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> ParkingConfig:
+        config = self._current
+        if config is None:
+            with self._lock:
+                if self._current is None:
+                    self._current = self._loader()
+                config = self._current
+        return config
+
+    def reload(self) -> ParkingConfig:
+        config = self._loader()
+        with self._lock:
+            self._current = config
+        return config
+
+    def install_signal_handler(self, loop) -> bool:
+        if not hasattr(signal, "SIGHUP"):
+            return False
+        try:
+            loop.add_signal_handler(signal.SIGHUP, self._reload_from_signal)
+        except (NotImplementedError, RuntimeError, ValueError):
+            return False
+        return True
+
+    def _reload_from_signal(self):
+        try:
+            self.reload()
+            print("Parking configuration reloaded")
+        except Exception as e:
+            print(f"Parking configuration reload failed: {e}")
+
+
+config_store = ConfigStore()
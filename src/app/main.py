@@ -1,32 +1,123 @@
-from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect, Query, Response, Header
+from fastapi.responses import HTMLResponse, StreamingResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional
+from datetime import datetime
 import os
+import asyncio
+import inspect
 from contextlib import asynccontextmanager
-from src.app.database import engine, get_db
-from src.app import models
-from src.app.schemas import EntryRequest, UpdateFloorRequest, PaymentRequest
-from src.app.services.parking_manager import ParkingManager
-from src.app.services.pricing import PriceCalculator
-from src.app.services.validator import VehicleValidator
-from src.app.services.mqtt_service import MQTTService
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.app.database import engine, async_engine, get_db, get_async_db, SessionLocal, DB_ASYNC, pool_status
+from src.app.migrations import migrate
+from src.app.schemas import (EntryRequest, UpdateFloorRequest, PaymentRequest, EntryBatchRequest, ExitBatchRequest,
+                             PaymentBatchRequest)
+from src.app.services.parking_manager import ParkingManager, AsyncParkingManager
+from src.app.config import config_store
+from src.app.services.mqtt_service import MQTTService, AsyncMQTTService
+from src.app.services.spot_index import spot_index
+from src.app.services import pagination, export
+from src.app.services.quotes import fee_quotes
+from src.app.services.search import vehicle_search, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT
+from src.app.services.events import event_hub
+from src.app.services.idempotency import idempotency_store, fingerprint, IdempotencyConflict
+from src.app.services.cluster import LeaderElection, create_event_bus, EVENT_BUS
+from src.app.services.occupancy import occupancy_tracker
+from src.app.services.recorder import RecordingMiddleware, traffic_recorder
+from src.app.services.metrics import registry, instrument_engine, MetricsMiddleware, METRICS_ENABLED
 from src.app.websocket_manager import ws_manager
 
-mqtt_service = MQTTService()
+MQTT_MODE = os.getenv("MQTT_MODE", "thread")
+
+mqtt_service = AsyncMQTTService() if MQTT_MODE == "asyncio" else MQTTService()
+leader_election = LeaderElection(engine)
+
+event_hub.subscribe(occupancy_tracker.apply)
+event_hub.subscribe(ws_manager.publish)
+
+POOL_GAUGE_KEYS = ("size", "checked_in", "checked_out", "overflow")
+
+
+def pool_gauge():
+    values = {}
+    engines = [("sync", engine)] + ([("async", async_engine.sync_engine)] if async_engine is not None else [])
+    for name, bind in engines:
+        status = pool_status(bind)
+        values.update({(name, key): status[key] for key in POOL_GAUGE_KEYS if key in status})
+    return values
+
+
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+registry.gauge("parking_db_pool_connections", "Connection pool state by engine", pool_gauge, ("engine", "state"))
+registry.gauge("parking_websocket_clients", "Connected dashboard WebSocket clients",
+               lambda: {(): len(ws_manager.clients)})
+registry.gauge("parking_mqtt_queue_depth", "MQTT events waiting for a worker",
+               lambda: {(): sum(queue.qsize() for queue in mqtt_service.queues)})
+
+SPOT_INDEX_RECONCILE_SECONDS = float(os.getenv("SPOT_INDEX_RECONCILE_SECONDS", "60"))
+
+
+def reconcile_spot_index():
+    db = SessionLocal()
+    try:
+        spot_index.reconcile(db)
+    finally:
+        db.close()
+
+
+def seed_occupancy():
+    db = SessionLocal()
+    try:
+        occupancy_tracker.seed(db)
+    finally:
+        db.close()
+
+
+async def reconcile_spot_index_periodically():
+    while True:
+        await asyncio.sleep(SPOT_INDEX_RECONCILE_SECONDS)
+        try:
+            await run_in_threadpool(reconcile_spot_index)
+        except Exception as e:
+            print(f"Spot index reconcile failed: {e}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    models.Base.metadata.create_all(bind=engine)
-    mqtt_service.start()
+    migrate(engine)
+    config_store.reload()
+    config_store.install_signal_handler(asyncio.get_running_loop())
+    reconcile_spot_index()
+    seed_occupancy()
+    reconcile_task = asyncio.create_task(reconcile_spot_index_periodically())
+    occupancy_task = asyncio.create_task(occupancy_tracker.stream(ws_manager))
+    event_bus = create_event_bus(EVENT_BUS, engine)
+    if event_bus is not None:
+        event_bus.start(asyncio.get_running_loop(), event_hub.deliver)
+        event_hub.attach(event_bus)
+    leader_task = asyncio.create_task(leader_election.run(mqtt_service.start, mqtt_service.stop))
     yield
+    leader_task.cancel()
+    await asyncio.gather(leader_task, return_exceptions=True)
+    if event_bus is not None:
+        event_hub.attach(None)
+        event_bus.stop()
+    reconcile_task.cancel()
+    occupancy_task.cancel()
+    traffic_recorder.close()
 
 
 app = FastAPI(title="Virtual Parking Simulator", lifespan=lifespan)
+if traffic_recorder.enabled:
+    app.add_middleware(RecordingMiddleware, recorder=traffic_recorder)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 static_path = os.path.join(os.path.dirname(__file__), "static")
 app.mount("/static", StaticFiles(directory=static_path), name="static")
@@ -35,21 +126,68 @@ app.mount("/static", StaticFiles(directory=static_path), name="static")
 @app.websocket("/ws/stats")
 async def websocket_endpoint(websocket: WebSocket):
     await ws_manager.connect(websocket)
+    ws_manager.send_to(websocket, occupancy_tracker.snapshot())
     try:
         while True:
-            await websocket.receive_text()
+            if await websocket.receive_text() == "snapshot":
+                ws_manager.send_to(websocket, occupancy_tracker.snapshot())
     except WebSocketDisconnect:
         ws_manager.disconnect(websocket)
 
 
+def build_parking_manager(db, manager_class=ParkingManager):
+    config = config_store.current
+    return manager_class(db, config.price_calculator, config.validator, spot_index)
+
+
 def get_parking_manager(db: Session = Depends(get_db)):
-    prices = {0: 6, 1: 5, 2: 4, 3: 3, 4: 2}
-    calculator = PriceCalculator(prices)
-    validator = VehicleValidator(
-        ["B", "C", "D", "E", "F", "G", "K", "L", "N", "O", "P", "R", "S", "T", "W", "Z"],
-        ["H", "U"]
-    )
-    return ParkingManager(db, calculator, validator)
+    return build_parking_manager(db)
+
+
+async def get_async_parking_manager(db: AsyncSession = Depends(get_async_db)):
+    return build_parking_manager(db, AsyncParkingManager)
+
+
+parking_manager_dependency = get_async_parking_manager if DB_ASYNC else get_parking_manager
+
+
+async def resolve(operation, *args):
+    if inspect.iscoroutinefunction(operation):
+        return await operation(*args)
+    return await run_in_threadpool(operation, *args)
+
+
+async def idempotent(key: Optional[str], scope: str, body: dict, response: Response, operation):
+    if key is None:
+        return await operation()
+    store_key = f"{scope}:{key}"
+    request_fingerprint = fingerprint(body)
+    try:
+        replay = idempotency_store.begin(store_key, request_fingerprint)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if replay is not None:
+        response.headers["Idempotent-Replayed"] = "true"
+        return replay
+    try:
+        result = await operation()
+    except BaseException:
+        idempotency_store.abandon(store_key)
+        raise
+    idempotency_store.complete(store_key, request_fingerprint, result)
+    return result
+
+
+def publish_batch(items: list, results: list, events: list) -> dict:
+    if events:
+        event_hub.publish({"type": "BATCH", "events": events})
+    succeeded = sum(1 for result in results if result["status"])
+    return {
+        "results": [{"country": item.country, "registration_no": item.registration_no, **result}
+                    for item, result in zip(items, results)],
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+    }
 
 
 @app.get("/")
@@ -80,33 +218,127 @@ def logout():
     return {"status": "Logged out"}
 
 
-@app.post("/entry", status_code=201)
-async def register_vehicle_entry(entry: EntryRequest, manager: ParkingManager = Depends(get_parking_manager)):
+@app.post("/config/reload")
+def reload_config():
     try:
-        result = manager.register_entry(entry.country, entry.registration_no, entry.floor)
+        config = config_store.reload()
+    except (OSError, ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Configuration not reloaded: {e}")
+    return {
+        "status": "reloaded",
+        "prices": dict(config.prices),
+        "basic_letters": sorted(config.basic_letters),
+        "special_letters": sorted(config.special_letters),
+        "tariff": config.price_calculator.tariff.describe(),
+    }
+
+
+@app.get("/db/pool")
+def get_pool_status():
+    status = {"sync": pool_status(engine)}
+    if async_engine is not None:
+        status["async"] = pool_status(async_engine.sync_engine)
+    return status
 
-        await ws_manager.broadcast({
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/cluster")
+def get_cluster_status():
+    return {"pid": os.getpid(), "is_leader": leader_election.is_leader, "event_bus": EVENT_BUS}
+
+
+@app.post("/entry", status_code=201)
+async def register_vehicle_entry(entry: EntryRequest, response: Response,
+                                 idempotency_key: Optional[str] = Header(None, max_length=255),
+                                 manager: ParkingManager = Depends(parking_manager_dependency)):
+    async def operation():
+        try:
+            result = await resolve(manager.register_entry, entry.country, entry.registration_no, entry.floor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        event_hub.publish({
             "type": "VEHICLE_ENTRY",
+            "country": entry.country,
             "reg_no": entry.registration_no,
             "floor": result['floor'],
             "spot": result['spot']
         })
 
         return {"status": result, "country": entry.country, "registration_no": entry.registration_no}
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+
+    return await idempotent(idempotency_key, "entry", entry.model_dump(), response, operation)
+
+
+@app.post("/entry/batch")
+async def register_vehicle_entries(batch: EntryBatchRequest, response: Response,
+                                   idempotency_key: Optional[str] = Header(None, max_length=255),
+                                   manager: ParkingManager = Depends(parking_manager_dependency)):
+    async def operation():
+        results = await resolve(manager.register_entries,
+                                [(item.country, item.registration_no, item.floor) for item in batch.items])
+        events = [
+            {"type": "VEHICLE_ENTRY", "country": item.country, "reg_no": item.registration_no,
+             "floor": result["floor"], "spot": result["spot"]}
+            for item, result in zip(batch.items, results) if result["status"]
+        ]
+        return publish_batch(batch.items, results, events)
+
+    return await idempotent(idempotency_key, "entry:batch", batch.model_dump(), response, operation)
+
+
+@app.post("/exit/batch")
+async def register_vehicle_exits(batch: ExitBatchRequest, response: Response,
+                                 idempotency_key: Optional[str] = Header(None, max_length=255),
+                                 manager: ParkingManager = Depends(parking_manager_dependency)):
+    async def operation():
+        results = await resolve(manager.register_exits,
+                                [(item.country, item.registration_no) for item in batch.items])
+        events = [
+            {"type": "VEHICLE_EXIT", "country": item.country, "reg_no": item.registration_no,
+             "floor": result["floor"], "spot": result["spot"]}
+            for item, result in zip(batch.items, results) if result["status"]
+        ]
+        return publish_batch(batch.items, results, events)
+
+    return await idempotent(idempotency_key, "exit:batch", batch.model_dump(), response, operation)
+
+
+@app.post("/payment/batch")
+async def make_payments(batch: PaymentBatchRequest, response: Response,
+                        idempotency_key: Optional[str] = Header(None, max_length=255),
+                        manager: ParkingManager = Depends(parking_manager_dependency)):
+    async def operation():
+        results = await resolve(manager.pay_parking_fees,
+                                [(item.country, item.registration_no, item.amount) for item in batch.items])
+        events = [
+            {"type": "PAYMENT_SUCCESS", "country": item.country, "reg_no": item.registration_no,
+             "amount": item.amount if item.amount is not None else result["fee"], "fee": result["fee"]}
+            for item, result in zip(batch.items, results) if result["status"]
+        ]
+        return publish_batch(batch.items, results, events)
+
+    return await idempotent(idempotency_key, "payment:batch", batch.model_dump(), response, operation)
 
 
 @app.patch("/entry/{country}/{registration_no}")
 async def update_floor(country: str, registration_no: str, update_data: UpdateFloorRequest,
-                 manager: ParkingManager = Depends(get_parking_manager)):
+                 manager: ParkingManager = Depends(parking_manager_dependency)):
     try:
-        manager.change_vehicle_floor(country, registration_no, update_data.new_floor)
+        result = await resolve(manager.change_vehicle_floor, country, registration_no, update_data.new_floor)
 
-        await ws_manager.broadcast({
+        event_hub.publish({
             "type": "VEHICLE_UPDATED",
+            "country": country,
             "reg_no": registration_no,
             "floor": update_data.new_floor,
+            "spot": result['new_spot'],
+            "old_floor": result['old_floor'],
+            "old_spot": result['old_spot'],
             "msg": f"Moved to Floor {update_data.new_floor}"
         })
 
@@ -123,12 +355,13 @@ async def update_floor(country: str, registration_no: str, update_data: UpdateFl
 
 @app.delete("/entry/{country}/{registration_no}")
 async def register_vehicle_exit(country: str, registration_no: str,
-                                manager: ParkingManager = Depends(get_parking_manager)):
+                                manager: ParkingManager = Depends(parking_manager_dependency)):
     try:
-        result = manager.register_exit(country, registration_no)
+        result = await resolve(manager.register_exit, country, registration_no)
 
-        await ws_manager.broadcast({
+        event_hub.publish({
             "type": "VEHICLE_EXIT",
+            "country": country,
             "reg_no": registration_no,
             "floor": result['floor'],
             "spot": result['spot']
@@ -140,42 +373,89 @@ async def register_vehicle_exit(country: str, registration_no: str,
         raise HTTPException(status_code=status_code, detail=str(e))
 
 
+@app.get("/payment/quotes")
+def get_payment_quotes(db: Session = Depends(get_db), floor: Optional[int] = Query(None, ge=0, le=4),
+                       country: Optional[str] = None, details: bool = True):
+    try:
+        return fee_quotes(db, config_store.current.price_calculator, floor, country, details=details)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.get("/payment/{country}/{registration_no}")
-def get_payment(country: str, registration_no: str, manager: ParkingManager = Depends(get_parking_manager)):
+async def get_payment(country: str, registration_no: str, manager: ParkingManager = Depends(parking_manager_dependency)):
     try:
-        return manager.get_payment_info(country, registration_no)
+        return await resolve(manager.get_payment_info, country, registration_no)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
 @app.post("/payment/{country}/{registration_no}", status_code=200)
-async def make_payment(country: str, registration_no: str, payment: PaymentRequest,
-                       manager: ParkingManager = Depends(get_parking_manager)):
-    try:
-        manager.pay_parking_fee(country, registration_no, payment.amount)
-
-        await ws_manager.broadcast({
+async def make_payment(country: str, registration_no: str, payment: PaymentRequest, response: Response,
+                       idempotency_key: Optional[str] = Header(None, max_length=255),
+                       manager: ParkingManager = Depends(parking_manager_dependency)):
+    async def operation():
+        try:
+            result = await resolve(manager.pay_parking_fee, country, registration_no, payment.amount)
+        except ValueError as e:
+            status_code = 404 if "not found" in str(e) else 400
+            raise HTTPException(status_code=status_code, detail=str(e))
+
+        event_hub.publish({
             "type": "PAYMENT_SUCCESS",
+            "country": country,
             "reg_no": registration_no,
-            "amount": payment.amount
+            "amount": payment.amount,
+            "fee": result['fee']
         })
 
         return {"status": "paid", "amount": payment.amount}
-    except ValueError as e:
-        status_code = 404 if "not found" in str(e) else 400
-        raise HTTPException(status_code=status_code, detail=str(e))
+
+    return await idempotent(idempotency_key, f"payment:{country}:{registration_no}", payment.model_dump(),
+                            response, operation)
 
 
 @app.get('/vehicles')
-def get_list_of_vehicles(db: Session = Depends(get_db)):
-    return db.query(models.ActiveParking).options(joinedload(models.ActiveParking.vehicle)).all()
+def get_list_of_vehicles(response: Response, db: Session = Depends(get_db),
+                         limit: int = Query(pagination.DEFAULT_VEHICLES_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+                         cursor: Optional[str] = None, floor: Optional[int] = Query(None, ge=0, le=4),
+                         country: Optional[str] = None):
+    try:
+        items, next_cursor = pagination.active_page(db, limit, cursor, floor, country)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 
 @app.get('/entry/history')
-def get_history(db: Session = Depends(get_db)):
-    return db.query(models.ParkingHistory).options(joinedload(models.ParkingHistory.vehicle)).all()
+def get_history(response: Response, db: Session = Depends(get_db),
+                limit: int = Query(pagination.DEFAULT_HISTORY_PAGE_SIZE, ge=1, le=pagination.MAX_PAGE_SIZE),
+                cursor: Optional[str] = None, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                floor: Optional[int] = Query(None, ge=0, le=4), country: Optional[str] = None):
+    try:
+        items, next_cursor = pagination.history_page(db, limit, cursor, since, until, floor, country)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
+
+
+@app.get('/entry/history/export')
+def export_history(db: Session = Depends(get_db), format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+                   gzip: bool = False, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                   floor: Optional[int] = Query(None, ge=0, le=4), country: Optional[str] = None):
+    chunks = export.export_history(db, format, gzip, since=since, until=until, floor=floor, country=country)
+    headers = {"Content-Disposition": f'attachment; filename="parking_history.{format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=export.EXPORT_FORMATS[format], headers=headers)
 
 
 @app.get("/vehicles/search")
-def search_vehicles(q: str, db: Session = Depends(get_db)):
-    return db.query(models.Vehicle).filter(models.Vehicle.registration_no.ilike(f"%{q}%")).all()
\ No newline at end of file
+def search_vehicles(q: str = Query(..., min_length=1, max_length=10), db: Session = Depends(get_db),
+                    mode: str = Query("contains", pattern="^(contains|prefix|exact)$"),
+                    limit: int = Query(DEFAULT_SEARCH_LIMIT, ge=1, le=MAX_SEARCH_LIMIT)):
+    return vehicle_search.search(db, q, mode, limit)
\ No newline at end of file
@@ -0,0 +1,176 @@
+from dataclasses import dataclass
+from typing import Callable, List
+from sqlalchemy import (MetaData, Table, Column, Integer, String, Float, DateTime, Boolean, ForeignKey,
+                        CheckConstraint, text)
+from sqlalchemy.engine import Connection, Engine
+
+MIGRATION_LOCK_ID = 7263401
+MAX_REPORTED_DUPLICATES = 20
+
+
+class MigrationConflict(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+def _base_schema() -> MetaData:
+    metadata = MetaData()
+    Table(
+        "vehicles", metadata,
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("country", String(3), nullable=False),
+        Column("registration_no", String(10), unique=True, nullable=False),
+    )
+    Table(
+        "active_parking", metadata,
+        Column("vehicle_id", Integer, ForeignKey("vehicles.id"), primary_key=True),
+        Column("entry_time", DateTime, nullable=False),
+        Column("floor", Integer, nullable=False),
+        Column("spot_number", Integer, nullable=False),
+        Column("is_paid", Boolean),
+        Column("payment_time", DateTime, nullable=True),
+        Column("paid_fee", Float, nullable=True),
+        CheckConstraint("floor >= 0 AND floor <= 4", name="check_floor_range"),
+    )
+    Table(
+        "parking_history", metadata,
+        Column("id", Integer, primary_key=True, autoincrement=True),
+        Column("vehicle_id", Integer, ForeignKey("vehicles.id"), nullable=False),
+        Column("entry_time", DateTime, nullable=False),
+        Column("exit_time", DateTime, nullable=False),
+        Column("floor", Integer, nullable=False),
+        Column("fee", Float, nullable=False),
+    )
+    return metadata
+
+
+def _create_base_schema(connection: Connection) -> None:
+    _base_schema().create_all(bind=connection)
+
+
+def _rebuild_sqlite_vehicles(connection: Connection) -> None:
+    unique_columns = [
+        [column[2] for column in connection.execute(text(f"PRAGMA index_info('{index[1]}')"))]
+        for index in connection.execute(text("PRAGMA index_list('vehicles')"))
+        if index[3] == "u"
+    ]
+    if ["registration_no"] not in unique_columns:
+        return
+    connection.execute(text(
+        "CREATE TABLE vehicles_rebuilt (id INTEGER NOT NULL PRIMARY KEY, country VARCHAR(3) NOT NULL, "
+        "registration_no VARCHAR(10) NOT NULL)"
+    ))
+    connection.execute(text(
+        "INSERT INTO vehicles_rebuilt (id, country, registration_no) SELECT id, country, registration_no FROM vehicles"
+    ))
+    connection.execute(text("DROP TABLE vehicles"))
+    connection.execute(text("ALTER TABLE vehicles_rebuilt RENAME TO vehicles"))
+
+
+def _find_duplicates(connection: Connection, table: str, columns: List[str], key: str) -> List[str]:
+    group = ", ".join(columns)
+    selected = ", ".join(f"t.{column}" for column in columns)
+    match = " AND ".join(f"t.{column} = d.{column}" for column in columns)
+    rows = connection.execute(text(
+        f"SELECT t.{key}, {selected} FROM {table} t "
+        f"JOIN (SELECT {group} FROM {table} GROUP BY {group} HAVING COUNT(*) > 1) d ON {match} "
+        f"ORDER BY {selected}, t.{key}"
+    )).all()
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(row[1:]), []).append(row[0])
+    return [
+        f"{table} ({group}) = ({', '.join(map(str, values))}): {key} {', '.join(map(str, keys))}"
+        for values, keys in groups.items()
+    ]
+
+
+def _check_lookup_duplicates(connection: Connection) -> None:
+    found = (_find_duplicates(connection, "vehicles", ["country", "registration_no"], "id")
+             + _find_duplicates(connection, "active_parking", ["floor", "spot_number"], "vehicle_id"))
+    if not found:
+        return
+    listing = "\n".join(found[:MAX_REPORTED_DUPLICATES])
+    if len(found) > MAX_REPORTED_DUPLICATES:
+        listing += f"\n... and {len(found) - MAX_REPORTED_DUPLICATES} more"
+    raise MigrationConflict(
+        "Cannot add unique lookup indexes, these rows share a key:\n"
+        f"{listing}\n"
+        "Merge the duplicate vehicles and move or check out the extra parked vehicles, then restart."
+    )
+
+
+def _add_lookup_indexes(connection: Connection) -> None:
+    _check_lookup_duplicates(connection)
+    if connection.dialect.name == "postgresql":
+        connection.execute(text("ALTER TABLE vehicles DROP CONSTRAINT IF EXISTS vehicles_registration_no_key"))
+    elif connection.dialect.name == "sqlite":
+        _rebuild_sqlite_vehicles(connection)
+    for statement in (
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_vehicles_country_registration_no ON vehicles (country, registration_no)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_active_parking_floor_spot ON active_parking (floor, spot_number)",
+        "CREATE INDEX IF NOT EXISTS ix_parking_history_exit_time_id ON parking_history (exit_time, id)",
+        "CREATE INDEX IF NOT EXISTS ix_parking_history_vehicle_id_exit_time ON parking_history (vehicle_id, exit_time)",
+    ):
+        connection.execute(text(statement))
+
+
+def _add_trigram_search_index(connection: Connection) -> None:
+    if connection.dialect.name != "postgresql":
+        return
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_vehicles_registration_no_trgm "
+        "ON vehicles USING gin (registration_no gin_trgm_ops)"
+    ))
+
+
+def _create_system_state(connection: Connection) -> None:
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS system_state (key VARCHAR(50) NOT NULL PRIMARY KEY, "
+        "value VARCHAR(100) NOT NULL, updated_at TIMESTAMP NOT NULL)"
+    ))
+
+
+MIGRATIONS = [
+    Migration(1, "base schema", _create_base_schema),
+    Migration(2, "lookup indexes", _add_lookup_indexes),
+    Migration(3, "trigram search index", _add_trigram_search_index),
+    Migration(4, "system state", _create_system_state),
+]
+
+
+def _ensure_version_table(connection: Connection) -> None:
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, name VARCHAR(100) NOT NULL, "
+        "applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    ))
+
+
+def current_version(connection: Connection) -> int:
+    _ensure_version_table(connection)
+    return connection.execute(text("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")).scalar()
+
+
+def migrate(bind: Engine, migrations: List[Migration] = MIGRATIONS) -> List[int]:
+    applied = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        with bind.begin() as connection:
+            if connection.dialect.name == "postgresql":
+                connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+            if current_version(connection) >= migration.version:
+                continue
+            migration.upgrade(connection)
+            connection.execute(
+                text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                {"version": migration.version, "name": migration.name},
+            )
+            applied.append(migration.version)
+    return applied
@@ -1,2 +1,2 @@
 from src.app.models.base import Base
-from src.app.models.parking import Vehicle, ActiveParking, ParkingHistory
\ No newline at end of file
+from src.app.models.parking import Vehicle, ActiveParking, ParkingHistory, SystemState
\ No newline at end of file
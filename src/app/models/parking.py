@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Float, DateTime, Boolean, ForeignKey, CheckConstraint
+from sqlalchemy import Column, String, Integer, Float, DateTime, Boolean, ForeignKey, CheckConstraint, Index
 from sqlalchemy.orm import relationship
 from src.app.models.base import Base
 from datetime import datetime
@@ -8,11 +8,13 @@ class Vehicle(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     country = Column(String(3), nullable=False)
-    registration_no = Column(String(10), unique=True, nullable=False)
+    registration_no = Column(String(10), nullable=False)
 
     active_parking = relationship("ActiveParking", back_populates="vehicle", uselist=False)
     history = relationship("ParkingHistory", back_populates="vehicle")
 
+    __table_args__ = (Index('uq_vehicles_country_registration_no', 'country', 'registration_no', unique=True),)
+
 
 class ActiveParking(Base):
     __tablename__ = "active_parking"
@@ -27,7 +29,10 @@ class ActiveParking(Base):
 
     vehicle = relationship("Vehicle", back_populates="active_parking")
 
-    __table_args__ = (CheckConstraint('floor >= 0 AND floor <= 4', name='check_floor_range'),)
+    __table_args__ = (
+        CheckConstraint('floor >= 0 AND floor <= 4', name='check_floor_range'),
+        Index('uq_active_parking_floor_spot', 'floor', 'spot_number', unique=True),
+    )
 
 
 class ParkingHistory(Base):
@@ -40,4 +45,17 @@ class ParkingHistory(Base):
     floor = Column(Integer, nullable=False)
     fee = Column(Float, nullable=False)
 
-    vehicle = relationship("Vehicle", back_populates="history")
\ No newline at end of file
+    vehicle = relationship("Vehicle", back_populates="history")
+
+    __table_args__ = (
+        Index('ix_parking_history_exit_time_id', 'exit_time', 'id'),
+        Index('ix_parking_history_vehicle_id_exit_time', 'vehicle_id', 'exit_time'),
+    )
+
+
+class SystemState(Base):
+    __tablename__ = "system_state"
+
+    key = Column(String(50), primary_key=True)
+    value = Column(String(100), nullable=False)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
@@ -1,5 +1,9 @@
+import os
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+
 
 class EntryRequest(BaseModel):
     country: str = Field(...)
@@ -13,3 +17,24 @@ class UpdateFloorRequest(BaseModel):
 
 class PaymentRequest(BaseModel):
     amount: float = Field(..., ge=0)
+
+
+class VehicleRequest(BaseModel):
+    country: str = Field(...)
+    registration_no: str = Field(..., min_length=5, max_length=8)
+
+
+class PaymentItem(VehicleRequest):
+    amount: Optional[float] = Field(None, ge=0)
+
+
+class EntryBatchRequest(BaseModel):
+    items: List[EntryRequest] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
+
+class ExitBatchRequest(BaseModel):
+    items: List[VehicleRequest] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
+
+
+class PaymentBatchRequest(BaseModel):
+    items: List[PaymentItem] = Field(..., min_length=1, max_length=BATCH_MAX_ITEMS)
@@ -0,0 +1,264 @@
+import asyncio
+import inspect
+import json
+import os
+import queue
+import socket
+import tempfile
+import threading
+import uuid
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+EVENT_BUS = os.getenv("EVENT_BUS", "local")
+EVENT_BUS_CHANNEL = os.getenv("EVENT_BUS_CHANNEL", "parking_events")
+EVENT_BUS_DIR = os.getenv("EVENT_BUS_DIR", os.path.join(tempfile.gettempdir(), "parking-events"))
+MQTT_LEADER_LOCK_FILE = os.getenv("MQTT_LEADER_LOCK_FILE", os.path.join(tempfile.gettempdir(), "parking-mqtt.lock"))
+LEADER_RETRY_SECONDS = float(os.getenv("LEADER_RETRY_SECONDS", "5"))
+LEADER_LOCK_ID = 7263402
+
+EventCallback = Callable[[Dict[str, Any]], None]
+
+
+class LeaderElection:
+    def __init__(self, bind: Engine, lock_file: str = MQTT_LEADER_LOCK_FILE, lock_id: int = LEADER_LOCK_ID):
+        self.bind = bind
+        self.lock_file = lock_file
+        self.lock_id = lock_id
+        self.is_leader = False
+        self._connection = None
+        self._fd: Optional[int] = None
+        self._reported_no_lock = False
+
+    def try_acquire(self) -> bool:
+        if self.is_leader:
+            return True
+        if self.bind.dialect.name == "postgresql":
+            self.is_leader = self._acquire_advisory_lock()
+        else:
+            self.is_leader = self._acquire_file_lock()
+        return self.is_leader
+
+    def check(self) -> bool:
+        if self.is_leader and self._connection is not None:
+            try:
+                self._connection.execute(text("SELECT 1"))
+            except Exception as e:
+                print(f"Leader lock connection lost: {e}")
+                self.release()
+        return self.is_leader
+
+    def release(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": self.lock_id})
+            except Exception:
+                pass
+            self._connection.close()
+            self._connection = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self.is_leader = False
+
+    def _acquire_advisory_lock(self) -> bool:
+        connection = self.bind.connect().execution_options(isolation_level="AUTOCOMMIT")
+        acquired = connection.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": self.lock_id}).scalar()
+        if acquired:
+            self._connection = connection
+        else:
+            connection.close()
+        return bool(acquired)
+
+    def _acquire_file_lock(self) -> bool:
+        if fcntl is None:
+            if not self._reported_no_lock:
+                print("MQTT leader election unavailable: no fcntl file locks on this platform. "
+                      "No worker will consume MQTT; use PostgreSQL to elect a leader with an advisory lock.")
+                self._reported_no_lock = True
+            return False
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    async def run(self, on_elected: Callable[[], Any], on_lost: Callable[[], Any],
+                  interval: float = LEADER_RETRY_SECONDS) -> None:
+        try:
+            while True:
+                if self.is_leader:
+                    if not await asyncio.to_thread(self.check):
+                        await _call(on_lost)
+                elif await asyncio.to_thread(self.try_acquire):
+                    try:
+                        await _call(on_elected)
+                    except Exception as e:
+                        print(f"Leader startup failed: {e}")
+                        try:
+                            await _call(on_lost)
+                        except Exception as e:
+                            print(f"Leader cleanup failed: {e}")
+                        self.release()
+                await asyncio.sleep(interval)
+        finally:
+            if self.is_leader:
+                await _call(on_lost)
+                self.release()
+
+
+async def _call(callback: Callable[[], Any]) -> None:
+    result = callback()
+    if inspect.isawaitable(result):
+        await result
+
+
+class UnixSocketEventBus:
+    def __init__(self, directory: str = EVENT_BUS_DIR):
+        self.directory = directory
+        self.path = os.path.join(directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+        self.socket: Optional[socket.socket] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.on_event: Optional[EventCallback] = None
+
+    def start(self, loop: asyncio.AbstractEventLoop, on_event: EventCallback) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.socket.bind(self.path)
+        self.socket.setblocking(False)
+        self.loop = loop
+        self.on_event = on_event
+        loop.add_reader(self.socket.fileno(), self._read)
+
+    def _read(self) -> None:
+        while True:
+            try:
+                data = self.socket.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                self.on_event(json.loads(data))
+            except ValueError as e:
+                print(f"Event bus: invalid message: {e}")
+
+    def send(self, event: Dict[str, Any]) -> None:
+        if self.socket is None:
+            return
+        data = json.dumps(event, default=str).encode()
+        for name in os.listdir(self.directory):
+            peer = os.path.join(self.directory, name)
+            if not name.endswith(".sock") or peer == self.path:
+                continue
+            try:
+                self.socket.sendto(data, peer)
+            except (ConnectionRefusedError, FileNotFoundError):
+                try:
+                    os.unlink(peer)
+                except OSError:
+                    pass
+            except BlockingIOError:
+                print(f"Event bus: {name} is not keeping up, dropped {event.get('type')}")
+
+    def stop(self) -> None:
+        if self.socket is None:
+            return
+        self.loop.remove_reader(self.socket.fileno())
+        self.socket.close()
+        self.socket = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+class PostgresEventBus:
+    def __init__(self, bind: Engine, channel: str = EVENT_BUS_CHANNEL):
+        if not channel.isidentifier():
+            raise ValueError(f"Invalid event bus channel {channel}")
+        self.bind = bind
+        self.channel = channel
+        self.origin = uuid.uuid4().hex
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.on_event: Optional[EventCallback] = None
+        self._listener = None
+        self._outbox: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._sender: Optional[threading.Thread] = None
+
+    def start(self, loop: asyncio.AbstractEventLoop, on_event: EventCallback) -> None:
+        self.loop = loop
+        self.on_event = on_event
+        self._listener = self.bind.raw_connection()
+        self._listener.detach()
+        connection = self._listener.driver_connection
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {self.channel}")
+        loop.add_reader(connection.fileno(), self._read)
+        self._sender = threading.Thread(target=self._run_sender, name="event-bus-sender", daemon=True)
+        self._sender.start()
+
+    def _read(self) -> None:
+        connection = self._listener.driver_connection
+        connection.poll()
+        while connection.notifies:
+            notify = connection.notifies.pop(0)
+            try:
+                envelope = json.loads(notify.payload)
+            except ValueError as e:
+                print(f"Event bus: invalid message: {e}")
+                continue
+            if envelope.get("origin") != self.origin:
+                self.on_event(envelope["event"])
+
+    def send(self, event: Dict[str, Any]) -> None:
+        if self._sender is not None:
+            self._outbox.put(json.dumps({"origin": self.origin, "event": event}, default=str))
+
+    def _run_sender(self) -> None:
+        connection = None
+        while (payload := self._outbox.get()) is not None:
+            try:
+                if connection is None:
+                    connection = self.bind.connect().execution_options(isolation_level="AUTOCOMMIT")
+                connection.execute(text("SELECT pg_notify(:channel, :payload)"),
+                                   {"channel": self.channel, "payload": payload})
+            except Exception as e:
+                print(f"Event bus: notify failed: {e}")
+                if connection is not None:
+                    connection.close()
+                    connection = None
+        if connection is not None:
+            connection.close()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._sender is not None:
+            self._outbox.put(None)
+            self._sender.join(timeout)
+            self._sender = None
+        if self._listener is not None:
+            self.loop.remove_reader(self._listener.driver_connection.fileno())
+            self._listener.close()
+            self._listener = None
+
+
+def create_event_bus(kind: str = EVENT_BUS, bind: Optional[Engine] = None):
+    if kind == "local":
+        return None
+    if kind == "unix":
+        return UnixSocketEventBus()
+    if kind == "postgres":
+        if bind is None or bind.dialect.name != "postgresql":
+            raise ValueError("EVENT_BUS=postgres requires a PostgreSQL DATABASE_URL")
+        return PostgresEventBus(bind)
+    raise ValueError(f"Unsupported event bus {kind}")
@@ -0,0 +1,87 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+MQTT_DEDUP_MAX_SIZE = int(os.getenv("MQTT_DEDUP_MAX_SIZE", "50000"))
+MQTT_DEDUP_TTL_SECONDS = float(os.getenv("MQTT_DEDUP_TTL_SECONDS", "600"))
+MQTT_DEDUP_WINDOW_SECONDS = float(os.getenv("MQTT_DEDUP_WINDOW_SECONDS", "2"))
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        now = self.clock()
+        with self._lock:
+            self._store(key, value, ttl, now)
+
+    def add(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> Any:
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] > now:
+                self._entries.move_to_end(key)
+                return entry[1]
+            self._store(key, value, ttl, now)
+            return None
+
+    def _store(self, key: Hashable, value: Any, ttl: Optional[float], now: float) -> None:
+        self._entries[key] = (now + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while self._entries:
+            oldest_key, (expires_at, _) = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_size and expires_at > now:
+                break
+            del self._entries[oldest_key]
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[1]
+
+
+class EventDeduplicator:
+    def __init__(self, max_size: int = MQTT_DEDUP_MAX_SIZE, ttl: float = MQTT_DEDUP_TTL_SECONDS,
+                 window: float = MQTT_DEDUP_WINDOW_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.cache = TTLCache(max_size, ttl, clock)
+
+    def key(self, topic: str, payload: Dict[str, Any], raw: bytes) -> Tuple[str, Optional[float]]:
+        event_id = payload.get("event_id")
+        if event_id:
+            return f"id:{event_id}", None
+        digest = hashlib.blake2b(topic.encode() + b"\0" + raw, digest_size=16).hexdigest()
+        return f"hash:{digest}", self.window
+
+    def is_duplicate(self, topic: str, payload: Dict[str, Any], raw: bytes) -> bool:
+        key, ttl = self.key(topic, payload, raw)
+        return self.cache.add(key, True, ttl) is not None
+
+    def forget(self, key: Optional[str]) -> None:
+        if key is not None:
+            self.cache.pop(key)
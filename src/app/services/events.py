@@ -0,0 +1,35 @@
+from typing import Any, Callable, Dict, List
+
+Event = Dict[str, Any]
+
+
+class EventHub:
+    def __init__(self):
+        self._subscribers: List[Callable[[Event], None]] = []
+        self.bus = None
+
+    def subscribe(self, callback: Callable[[Event], None]) -> None:
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Event], None]) -> None:
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def attach(self, bus) -> None:
+        self.bus = bus
+
+    def publish(self, event: Event) -> None:
+        self.deliver(event)
+        if self.bus is not None:
+            self.bus.send(event)
+
+    def deliver(self, event: Event) -> None:
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Event subscriber failed on {event.get('type')}: {e}")
+
+
+event_hub = EventHub()
@@ -0,0 +1,93 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Iterable, Iterator, Mapping, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from src.app.models.parking import Vehicle, ParkingHistory
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_COLUMNS = ("id", "country", "registration_no", "entry_time", "exit_time", "floor", "fee")
+EXPORT_BATCH_SIZE = 1000
+
+
+def history_rows(db: Session, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 floor: Optional[int] = None, country: Optional[str] = None) -> Iterator[Mapping[str, Any]]:
+    stmt = (
+        select(ParkingHistory.id, Vehicle.country, Vehicle.registration_no, ParkingHistory.entry_time,
+               ParkingHistory.exit_time, ParkingHistory.floor, ParkingHistory.fee)
+        .join(Vehicle, ParkingHistory.vehicle_id == Vehicle.id)
+        .order_by(ParkingHistory.exit_time, ParkingHistory.id)
+    )
+    if since is not None:
+        stmt = stmt.where(ParkingHistory.exit_time >= since)
+    if until is not None:
+        stmt = stmt.where(ParkingHistory.exit_time < until)
+    if floor is not None:
+        stmt = stmt.where(ParkingHistory.floor == floor)
+    if country is not None:
+        stmt = stmt.where(Vehicle.country == country)
+
+    result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    try:
+        for row in result:
+            yield row._mapping
+    finally:
+        result.close()
+
+
+def _format_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def ndjson_chunks(rows: Iterable[Mapping[str, Any]], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    lines = []
+    threshold = 1
+    for row in rows:
+        lines.append(json.dumps({c: _format_value(row[c]) for c in EXPORT_COLUMNS}))
+        if len(lines) >= threshold:
+            yield ("\n".join(lines) + "\n").encode()
+            lines = []
+            threshold = batch_size
+    if lines:
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def csv_chunks(rows: Iterable[Mapping[str, Any]], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue().encode()
+
+    buffer.seek(0)
+    buffer.truncate()
+    count = 0
+    for row in rows:
+        writer.writerow([_format_value(row[c]) for c in EXPORT_COLUMNS])
+        count += 1
+        if count >= batch_size:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    if count:
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_history(db: Session, export_format: str = "ndjson", compress: bool = False, **filters) -> Iterator[bytes]:
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format {export_format}")
+    rows = history_rows(db, **filters)
+    chunks = csv_chunks(rows) if export_format == "csv" else ndjson_chunks(rows)
+    return gzip_chunks(chunks) if compress else chunks
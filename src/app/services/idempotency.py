@@ -0,0 +1,42 @@
+import hashlib
+import json
+import os
+from typing import Any, Optional
+from src.app.services.dedup import TTLCache
+
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_PENDING_TTL_SECONDS = 60
+
+
+class IdempotencyConflict(ValueError):
+    pass
+
+
+def fingerprint(body: Any) -> str:
+    return hashlib.sha256(json.dumps(body, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    def __init__(self, max_keys: int = IDEMPOTENCY_MAX_KEYS, ttl: float = IDEMPOTENCY_TTL_SECONDS):
+        self.cache = TTLCache(max_keys, ttl)
+
+    def begin(self, key: str, request_fingerprint: str) -> Optional[Any]:
+        entry = self.cache.add(key, ("pending", request_fingerprint, None), IDEMPOTENCY_PENDING_TTL_SECONDS)
+        if entry is None:
+            return None
+        state, stored_fingerprint, response = entry
+        if stored_fingerprint != request_fingerprint:
+            raise IdempotencyConflict("Idempotency-Key was already used with a different request")
+        if state == "pending":
+            raise IdempotencyConflict("A request with this Idempotency-Key is still in progress")
+        return response
+
+    def complete(self, key: str, request_fingerprint: str, response: Any) -> None:
+        self.cache.put(key, ("done", request_fingerprint, response))
+
+    def abandon(self, key: str) -> None:
+        self.cache.pop(key)
+
+
+idempotency_store = IdempotencyStore()
@@ -1,102 +1,524 @@
 import paho.mqtt.client as mqtt
 import json
+import os
+import queue
+import threading
+import time
 import asyncio
+import random
+import zlib
+from contextlib import nullcontext
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from sqlalchemy.exc import DBAPIError, DisconnectionError, InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from src.app.database import SessionLocal
 from src.app.services.parking_manager import ParkingManager
-from src.app.services.pricing import PriceCalculator
-from src.app.services.validator import VehicleValidator
-from src.app.websocket_manager import ws_manager
+from src.app.config import config_store
+from src.app.services.spot_index import spot_index
+from src.app.services.events import event_hub
+from src.app.services.system_state import LOCK_FLAG, get_flag, set_flag
+from src.app.services.topic_router import TopicRouter
+from src.app.services.dedup import EventDeduplicator
+from src.app.services.recorder import TrafficRecorder, traffic_recorder
+from src.app.services.metrics import mqtt_messages, mqtt_latency, mqtt_errors
+
+MQTT_BATCH_SIZE = int(os.getenv("MQTT_BATCH_SIZE", "50"))
+MQTT_BATCH_LINGER_MS = float(os.getenv("MQTT_BATCH_LINGER_MS", "20"))
+MQTT_QUEUE_SIZE = int(os.getenv("MQTT_QUEUE_SIZE", "10000"))
+MQTT_WORKERS = int(os.getenv("MQTT_WORKERS", "4"))
+MQTT_HOST = os.getenv("MQTT_HOST", "localhost")
+MQTT_PORT = int(os.getenv("MQTT_PORT", "1883"))
+MQTT_KEEPALIVE = int(os.getenv("MQTT_KEEPALIVE", "60"))
+MQTT_RECONNECT_MIN_SECONDS = float(os.getenv("MQTT_RECONNECT_MIN_SECONDS", "1"))
+MQTT_RECONNECT_MAX_SECONDS = float(os.getenv("MQTT_RECONNECT_MAX_SECONDS", "30"))
+MQTT_RETRY_MIN_SECONDS = float(os.getenv("MQTT_RETRY_MIN_SECONDS", "0.5"))
+MQTT_RETRY_MAX_SECONDS = float(os.getenv("MQTT_RETRY_MAX_SECONDS", "30"))
+MQTT_QOS = int(os.getenv("MQTT_QOS", "1"))
+MQTT_CLIENT_ID = os.getenv("MQTT_CLIENT_ID", "parking-service")
+MQTT_ACK_TOPIC = os.getenv("MQTT_ACK_TOPIC", "parking/sensors/ack")
+
+
+TRANSIENT_ERRORS = (OperationalError, InterfaceError, DisconnectionError, PoolTimeoutError, ConnectionError,
+                    TimeoutError)
+
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, DBAPIError) and error.connection_invalidated:
+        return True
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+class MQTTEvent(NamedTuple):
+    topic: str
+    payload: Dict[str, Any]
+    mid: Optional[int] = None
+    qos: int = 0
+    received_at: Optional[float] = None
+    dedup_key: Optional[str] = None
 
 
 class MQTTService:
-    def __init__(self):
-        self.client = mqtt.Client()
+    def __init__(self, session_factory=SessionLocal, spot_index=spot_index, batch_size: int = MQTT_BATCH_SIZE,
+                 batch_linger: float = MQTT_BATCH_LINGER_MS / 1000, queue_size: int = MQTT_QUEUE_SIZE,
+                 workers: int = MQTT_WORKERS, qos: int = MQTT_QOS, deduplicator: Optional[EventDeduplicator] = None,
+                 ack_topic: str = MQTT_ACK_TOPIC, recorder: TrafficRecorder = traffic_recorder,
+                 clock: Optional[Callable[[], datetime]] = None, retry_min: float = MQTT_RETRY_MIN_SECONDS,
+                 retry_max: float = MQTT_RETRY_MAX_SECONDS):
+        self.qos = qos
+        self.clock = clock
+        self.ack_topic = ack_topic
+        self.recorder = recorder
+        self.client = mqtt.Client(client_id=MQTT_CLIENT_ID, clean_session=qos == 0, manual_ack=True)
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
         self.is_locked = False
-        self.loop = asyncio.get_event_loop()
+        self.loop = None
+        self.session_factory = session_factory
+        self.spot_index = spot_index
+        self.batch_size = batch_size
+        self.batch_linger = batch_linger
+        self.retry_min = retry_min
+        self.retry_max = retry_max
+        self.deduplicator = deduplicator or EventDeduplicator()
+        self.workers = max(1, workers)
+        self.queues: List["queue.Queue[MQTTEvent]"] = [queue.Queue(maxsize=queue_size) for _ in range(self.workers)]
+        self._stopping = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._sqlite_write_lock = threading.Lock()
+        self.router = TopicRouter()
+        self.router.add("parking/system/command", self.handle_command)
+        self.router.add("parking/entrance/camera", self.handle_entry)
+        self.router.add("parking/exit/camera", self.handle_exit)
+        self.router.add("parking/parking_meter/pay", self.handle_payment)
 
     def on_connect(self, client, userdata, flags, rc):
         print("Connected to MQTT Broker")
-        self.client.subscribe("parking/entrance/camera")
-        self.client.subscribe("parking/exit/camera")
-        self.client.subscribe("parking/system/command")
-        self.client.subscribe("parking/parking_meter/pay")
+        for pattern in self.router.subscriptions:
+            self.client.subscribe(pattern, qos=self.qos)
+
+    def shard_for(self, payload: Dict[str, Any]) -> int:
+        if self.workers == 1 or "registration_no" not in payload:
+            return 0
+        key = f"{payload.get('country', '')}:{payload['registration_no']}"
+        return zlib.crc32(key.encode()) % self.workers
 
     def send_to_ws(self, data: dict):
-        asyncio.run_coroutine_threadsafe(ws_manager.broadcast(data), self.loop)
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(event_hub.publish, data)
 
-    def on_message(self, client, userdata, msg):
-        db = SessionLocal()
+    def accept(self, msg) -> Optional[MQTTEvent]:
+        event = MQTTEvent(msg.topic, {}, msg.mid, msg.qos, time.time())
+        mqtt_messages.inc(msg.topic)
         try:
-            prices = {0: 6, 1: 5, 2: 4, 3: 3, 4: 2}
-            p_manager = ParkingManager(db, PriceCalculator(prices), VehicleValidator(["B", "G", "P", "D", "W"], ["H"]))
             payload = json.loads(msg.payload.decode())
+        except ValueError as e:
+            print(f"MQTT Error: invalid payload on {msg.topic}: {e}")
+            mqtt_errors.inc(msg.topic, "invalid_payload")
+            self.record(event, "Invalid payload", raw=msg.payload)
+            self.ack(event)
+            return None
+        if not isinstance(payload, dict):
+            mqtt_errors.inc(msg.topic, "invalid_payload")
+            self.record(event, "Invalid payload", raw=msg.payload)
+            self.ack(event)
+            return None
+        if self.deduplicator.is_duplicate(msg.topic, payload, msg.payload):
+            mqtt_errors.inc(msg.topic, "duplicate")
+            self.record(event._replace(payload=payload), "Duplicate")
+            self.ack(event)
+            return None
+        return event._replace(payload=payload, dedup_key=self.deduplicator.key(msg.topic, payload, msg.payload)[0])
+
+    def record(self, event: MQTTEvent, error: Optional[str] = None, result: Optional[Dict[str, Any]] = None,
+               raw: Optional[bytes] = None) -> None:
+        if not self.recorder.enabled:
+            return
+        entry = {"t": event.received_at, "src": "mqtt", "topic": event.topic}
+        if raw is not None:
+            entry["raw"] = raw.decode(errors="replace")
+        else:
+            entry["payload"] = event.payload
+        entry["result"] = {"ok": error is None, "error": error, **(result or {})}
+        self.recorder.record(entry)
+
+    def ack(self, event: MQTTEvent) -> None:
+        if event.mid is not None and event.qos > 0:
+            self.client.ack(event.mid, event.qos)
+
+    def settle(self, event: MQTTEvent, retry: List[MQTTEvent], error: Optional[Exception] = None,
+               result: Optional[Dict[str, Any]] = None) -> List[Callable[[], Any]]:
+        if error is not None and is_transient(error):
+            retry.append(event)
+            return []
+        message = None if error is None else str(error)
+        return [
+            partial(self.record, event, message, result),
+            partial(self.publish_ack, event, message, result),
+            partial(self.ack, event),
+        ]
 
-            if msg.topic == "parking/system/command":
-                cmd = payload.get("cmd")
-                if cmd == "LOCK":
-                    self.is_locked = True
-                elif cmd == "UNLOCK":
-                    self.is_locked = False
-
-                self.send_to_ws({
-                    "type": "EMERGENCY_STATUS",
-                    "is_locked": self.is_locked,
-                    "msg": f"Parking is now {'LOCKED' if self.is_locked else 'OPEN'}"
-                })
-
-            elif msg.topic == "parking/entrance/camera":
-                if self.is_locked:
-                    self.client.publish("parking/entrance/display", "SYSTEM LOCKED")
-                    return
-
-                res = p_manager.register_entry(payload['country'], payload['registration_no'], payload['floor'])
-
-                sensor_topic = f"parking/sensors/floor/{res['floor']}/spot/{res['spot']}/status"
-                self.client.publish(sensor_topic, "OCCUPIED")
-
-                self.send_to_ws({
-                    "type": "VEHICLE_ENTRY",
-                    "reg_no": payload['registration_no'],
-                    "floor": res['floor'],
-                    "spot": res['spot'],
-                    "time": "Just now"
-                })
-
-            elif msg.topic == "parking/exit/camera":
-                res = p_manager.register_exit(payload['country'], payload['registration_no'])
-
-                sensor_topic = f"parking/sensors/floor/{res['floor']}/spot/{res['spot']}/status"
-                self.client.publish(sensor_topic, "FREE")
-
-                self.send_to_ws({
-                    "type": "VEHICLE_EXIT",
-                    "reg_no": payload['registration_no'],
-                    "floor": res['floor'],
-                    "spot": res['spot']
-                })
-
-            elif msg.topic == "parking/parking_meter/pay":
-                country = payload.get('country')
-                reg_no = payload.get('registration_no')
-                info = p_manager.get_payment_info(country, reg_no)
-                fee = info['fee']
-
-                p_manager.pay_parking_fee(country, reg_no, fee)
-
-                self.send_to_ws({
-                    "type": "PAYMENT_SUCCESS",
-                    "reg_no": reg_no,
-                    "amount": fee,
-                    "total_on_parking": "updated"
-                })
+    def abandon(self, events: List[MQTTEvent]) -> None:
+        for event in events:
+            mqtt_errors.inc(event.topic, "abandoned")
+            self.deduplicator.forget(event.dedup_key)
 
+    def publish_ack(self, event: MQTTEvent, error: Optional[str] = None,
+                    result: Optional[Dict[str, Any]] = None) -> None:
+        event_id = event.payload.get("event_id")
+        if self.ack_topic and event_id is not None:
+            self.client.publish(self.ack_topic, json.dumps({
+                "event_id": event_id,
+                "topic": event.topic,
+                "ok": error is None,
+                "error": error,
+                **(result or {}),
+            }))
+
+    def on_message(self, client, userdata, msg):
+        event = self.accept(msg)
+        if event is not None:
+            self.queues[self.shard_for(event.payload)].put(event)
+
+    def next_batch(self, shard: int = 0, timeout: float = 0.5) -> List[MQTTEvent]:
+        events = self.queues[shard]
+        try:
+            batch = [events.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.batch_linger
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(events.get(timeout=remaining) if remaining > 0 else events.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def process_batch(self, events: List[MQTTEvent]) -> None:
+        delay = self.retry_min
+        while events:
+            retry: List[MQTTEvent] = []
+            for send in self.collect_batch(events, retry):
+                send()
+            events = retry
+            if events and self._stopping.wait(delay):
+                break
+            delay = min(delay * 2, self.retry_max)
+        self.abandon(events)
+
+    def collect_batch(self, events: List[MQTTEvent], retry: List[MQTTEvent]) -> List[Callable[[], Any]]:
+        outbox: List[Callable[[], Any]] = []
+        db = self.session_factory()
+        try:
+            config = config_store.current
+            p_manager = ParkingManager(db, config.price_calculator, config.validator, self.spot_index, self.clock)
+            serialize = db.get_bind().dialect.name == "sqlite"
+            with self._sqlite_write_lock if serialize else nullcontext(), p_manager.transaction():
+                for event in events:
+                    if retry:
+                        retry.append(event)
+                        continue
+                    event_outbox: List[Callable[[], Any]] = []
+                    error = result = None
+                    started = time.perf_counter()
+                    try:
+                        with p_manager.isolated():
+                            result = self.handle_event(p_manager, event.topic, event.payload, event_outbox)
+                    except Exception as e:
+                        print(f"MQTT Error: {e}")
+                        mqtt_errors.inc(event.topic, "transient" if is_transient(e) else "rejected")
+                        event_outbox = []
+                        error = e
+                    mqtt_latency.observe(time.perf_counter() - started, event.topic)
+                    outbox.extend(event_outbox)
+                    outbox.extend(self.settle(event, retry, error, result))
         except Exception as e:
-            print(f"MQTT Error: {e}")
+            print(f"MQTT batch of {len(events)} failed: {e}")
+            retry.clear()
+            if len(events) > 1:
+                outbox = []
+                for event in events:
+                    if retry:
+                        retry.append(event)
+                    else:
+                        outbox.extend(self.collect_batch([event], retry))
+            else:
+                mqtt_errors.inc(events[0].topic, "transient" if is_transient(e) else "batch")
+                outbox = self.settle(events[0], retry, e)
         finally:
             db.close()
+        return outbox
+
+    def handle_event(self, p_manager: ParkingManager, topic: str, payload: Dict[str, Any],
+                     outbox: List[Callable[[], Any]]) -> Optional[Dict[str, Any]]:
+        handler = self.router.resolve(topic)
+        if handler is None:
+            raise ValueError(f"No handler for topic {topic}")
+        return handler(p_manager, topic, payload, outbox)
+
+    def handle_command(self, p_manager: ParkingManager, topic: str, payload: Dict[str, Any],
+                       outbox: List[Callable[[], Any]]) -> Dict[str, Any]:
+        cmd = payload.get("cmd")
+        if cmd in ("LOCK", "UNLOCK"):
+            set_flag(p_manager.db, LOCK_FLAG, cmd == "LOCK")
+            self.is_locked = cmd == "LOCK"
+
+        outbox.append(partial(self.send_to_ws, {
+            "type": "EMERGENCY_STATUS",
+            "is_locked": self.is_locked,
+            "msg": f"Parking is now {'LOCKED' if self.is_locked else 'OPEN'}"
+        }))
+        return {"is_locked": self.is_locked}
+
+    def handle_entry(self, p_manager: ParkingManager, topic: str, payload: Dict[str, Any],
+                     outbox: List[Callable[[], Any]]) -> Dict[str, Any]:
+        if self.is_locked:
+            outbox.append(partial(self.client.publish, "parking/entrance/display", "SYSTEM LOCKED"))
+            return {"is_locked": True}
+
+        res = p_manager.register_entry(payload['country'], payload['registration_no'], payload['floor'])
+
+        sensor_topic = f"parking/sensors/floor/{res['floor']}/spot/{res['spot']}/status"
+        outbox.append(partial(self.client.publish, sensor_topic, "OCCUPIED", qos=self.qos))
+
+        outbox.append(partial(self.send_to_ws, {
+            "type": "VEHICLE_ENTRY",
+            "country": payload['country'],
+            "reg_no": payload['registration_no'],
+            "floor": res['floor'],
+            "spot": res['spot'],
+            "time": "Just now"
+        }))
+        return {"floor": res['floor'], "spot": res['spot']}
+
+    def handle_exit(self, p_manager: ParkingManager, topic: str, payload: Dict[str, Any],
+                    outbox: List[Callable[[], Any]]) -> Dict[str, Any]:
+        res = p_manager.register_exit(payload['country'], payload['registration_no'])
+
+        sensor_topic = f"parking/sensors/floor/{res['floor']}/spot/{res['spot']}/status"
+        outbox.append(partial(self.client.publish, sensor_topic, "FREE", qos=self.qos))
+
+        outbox.append(partial(self.send_to_ws, {
+            "type": "VEHICLE_EXIT",
+            "country": payload['country'],
+            "reg_no": payload['registration_no'],
+            "floor": res['floor'],
+            "spot": res['spot']
+        }))
+        return {"floor": res['floor'], "spot": res['spot']}
+
+    def handle_payment(self, p_manager: ParkingManager, topic: str, payload: Dict[str, Any],
+                       outbox: List[Callable[[], Any]]) -> Dict[str, Any]:
+        country = payload.get('country')
+        reg_no = payload.get('registration_no')
+        fee = p_manager.pay_parking_fee(country, reg_no, None)['fee']
 
-    def start(self):
-        self.client.connect("localhost", 1883, 60)
-        self.client.loop_start()
\ No newline at end of file
+        outbox.append(partial(self.send_to_ws, {
+            "type": "PAYMENT_SUCCESS",
+            "country": country,
+            "reg_no": reg_no,
+            "amount": fee,
+            "total_on_parking": "updated"
+        }))
+        return {"fee": fee}
+
+    def _run_worker(self, shard: int):
+        while not (self._stopping.is_set() and self.queues[shard].empty()):
+            batch = self.next_batch(shard)
+            if batch:
+                self.process_batch(batch)
+
+    def load_state(self):
+        db = self.session_factory()
+        try:
+            self.is_locked = get_flag(db, LOCK_FLAG)
+        finally:
+            db.close()
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        await asyncio.to_thread(self.load_state)
+        await asyncio.to_thread(self.client.connect, MQTT_HOST, MQTT_PORT, MQTT_KEEPALIVE)
+        self._stopping.clear()
+        self._threads = [
+            threading.Thread(target=self._run_worker, args=(shard,), name=f"mqtt-ingest-{shard}", daemon=True)
+            for shard in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        self.client.loop_start()
+
+    def stop(self, timeout: float = 5.0):
+        self.client.loop_stop()
+        self.client.disconnect()
+        self._stopping.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+        self._threads = []
+
+
+class AsyncMQTTService(MQTTService):
+    def __init__(self, session_factory=SessionLocal, spot_index=spot_index, batch_size: int = MQTT_BATCH_SIZE,
+                 batch_linger: float = MQTT_BATCH_LINGER_MS / 1000, queue_size: int = MQTT_QUEUE_SIZE,
+                 workers: int = MQTT_WORKERS, qos: int = MQTT_QOS, deduplicator: Optional[EventDeduplicator] = None,
+                 reconnect_min: float = MQTT_RECONNECT_MIN_SECONDS, reconnect_max: float = MQTT_RECONNECT_MAX_SECONDS,
+                 retry_min: float = MQTT_RETRY_MIN_SECONDS, retry_max: float = MQTT_RETRY_MAX_SECONDS):
+        super().__init__(session_factory, spot_index, batch_size, batch_linger, queue_size, workers, qos,
+                         deduplicator, retry_min=retry_min, retry_max=retry_max)
+        self.queue_size = queue_size
+        self.queues: List["asyncio.Queue[MQTTEvent]"] = [asyncio.Queue() for _ in range(self.workers)]
+        self.reconnect_min = reconnect_min
+        self.reconnect_max = reconnect_max
+        self.paused = False
+        self._closing = False
+        self._sock = None
+        self._tasks: List[asyncio.Task] = []
+        self._connector: Optional[asyncio.Task] = None
+        self.client.on_disconnect = self.on_disconnect
+        self.client.on_socket_open = self.on_socket_open
+        self.client.on_socket_close = self.on_socket_close
+        self.client.on_socket_register_write = self.on_socket_register_write
+        self.client.on_socket_unregister_write = self.on_socket_unregister_write
+
+    def on_socket_open(self, client, userdata, sock):
+        self._sock = sock
+        if not self.paused:
+            self.loop.add_reader(sock, self.client.loop_read)
+
+    def on_socket_close(self, client, userdata, sock):
+        self.loop.remove_reader(sock)
+        self.loop.remove_writer(sock)
+        self._sock = None
+
+    def on_socket_register_write(self, client, userdata, sock):
+        self.loop.add_writer(sock, self.client.loop_write)
+
+    def on_socket_unregister_write(self, client, userdata, sock):
+        self.loop.remove_writer(sock)
+
+    def on_disconnect(self, client, userdata, rc):
+        if not self._closing and rc != mqtt.MQTT_ERR_SUCCESS:
+            print(f"MQTT connection lost ({rc}), reconnecting")
+            mqtt_errors.inc("", "disconnected")
+            self._schedule_connect()
+
+    def send_to_ws(self, data: dict):
+        event_hub.publish(data)
+
+    def on_message(self, client, userdata, msg):
+        event = self.accept(msg)
+        if event is None:
+            return
+        self.queues[self.shard_for(event.payload)].put_nowait(event)
+        if self.pending() >= self.queue_size:
+            self._pause_reading()
+
+    def pending(self) -> int:
+        return sum(events.qsize() for events in self.queues)
+
+    def _pause_reading(self):
+        if self.paused:
+            return
+        self.paused = True
+        if self._sock is not None:
+            self.loop.remove_reader(self._sock)
+
+    def _resume_reading(self):
+        if not self.paused or self.pending() > self.queue_size // 2:
+            return
+        self.paused = False
+        if self._sock is not None:
+            self.loop.add_reader(self._sock, self.client.loop_read)
+
+    async def next_batch(self, shard: int = 0) -> List[MQTTEvent]:
+        events = self.queues[shard]
+        batch = [await events.get()]
+        deadline = self.loop.time() + self.batch_linger
+        while len(batch) < self.batch_size:
+            if not events.empty():
+                batch.append(events.get_nowait())
+                continue
+            remaining = deadline - self.loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(events.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _consume(self, shard: int):
+        while True:
+            batch = await self.next_batch(shard)
+            self._resume_reading()
+            try:
+                await self._process_with_retries(batch)
+            except Exception as e:
+                print(f"MQTT batch of {len(batch)} failed: {e}")
+            finally:
+                for _ in batch:
+                    self.queues[shard].task_done()
+
+    async def _process_with_retries(self, events: List[MQTTEvent]) -> None:
+        delay = self.retry_min
+        while True:
+            retry: List[MQTTEvent] = []
+            for send in await asyncio.to_thread(self.collect_batch, events, retry):
+                send()
+            if not retry:
+                return
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.abandon(retry)
+                raise
+            delay = min(delay * 2, self.retry_max)
+            events = retry
+
+    async def _misc(self):
+        while True:
+            await asyncio.sleep(1)
+            self.client.loop_misc()
+
+    async def _connect_with_backoff(self):
+        delay = self.reconnect_min
+        while not self._closing:
+            try:
+                self.client.connect(MQTT_HOST, MQTT_PORT, MQTT_KEEPALIVE)
+                return
+            except OSError as e:
+                print(f"MQTT connect failed: {e}, retrying in {delay:.1f}s")
+                mqtt_errors.inc("", "connect_failed")
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, self.reconnect_max)
+
+    def _schedule_connect(self):
+        if self._connector is None or self._connector.done():
+            self._connector = self.loop.create_task(self._connect_with_backoff())
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        await asyncio.to_thread(self.load_state)
+        self._closing = False
+        self._tasks = [asyncio.create_task(self._consume(shard)) for shard in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._misc()))
+        self._schedule_connect()
+
+    async def stop(self, timeout: float = 5.0):
+        self._closing = True
+        if self._connector is not None:
+            self._connector.cancel()
+        if self._sock is not None:
+            self.client.disconnect()
+        try:
+            await asyncio.wait_for(asyncio.gather(*(events.join() for events in self.queues)), timeout)
+        except asyncio.TimeoutError:
+            print(f"MQTT drain timed out with {self.pending()} events pending")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,104 @@
+import asyncio
+import os
+import threading
+from typing import Any, Dict, List, Optional, Set
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.app.models.parking import ActiveParking, ParkingHistory
+from src.app.services.spot_index import FLOORS, SPOTS_PER_FLOOR
+
+OCCUPANCY_PUSH_INTERVAL_MS = float(os.getenv("OCCUPANCY_PUSH_INTERVAL_MS", "250"))
+OCCUPANCY_COALESCE_KEY = "occupancy"
+
+
+class OccupancyTracker:
+    def __init__(self, floors=FLOORS, spots_per_floor: int = SPOTS_PER_FLOOR):
+        self.floors = tuple(floors)
+        self.spots_per_floor = spots_per_floor
+        self._lock = threading.Lock()
+        self._occupied: Dict[int, Set[int]] = {floor: set() for floor in self.floors}
+        self._revenue = 0.0
+        self.version = 0
+
+    def seed(self, db: Session) -> None:
+        occupied: Dict[int, Set[int]] = {floor: set() for floor in self.floors}
+        for floor, spot in db.query(ActiveParking.floor, ActiveParking.spot_number):
+            occupied.setdefault(floor, set()).add(spot)
+        revenue = (db.query(func.coalesce(func.sum(ParkingHistory.fee), 0)).scalar()
+                   + db.query(func.coalesce(func.sum(ActiveParking.paid_fee), 0))
+                   .filter(ActiveParking.is_paid.is_(True)).scalar())
+        with self._lock:
+            self._occupied = occupied
+            self._revenue = float(revenue)
+            self.version += 1
+
+    def apply(self, event: Dict[str, Any]) -> None:
+        event_type = event.get("type")
+        if event_type == "BATCH":
+            for item in event["events"]:
+                self.apply(item)
+            return
+        with self._lock:
+            if event_type == "VEHICLE_ENTRY":
+                self._occupied.setdefault(event["floor"], set()).add(event["spot"])
+            elif event_type == "VEHICLE_EXIT":
+                self._occupied.get(event["floor"], set()).discard(event["spot"])
+            elif event_type == "VEHICLE_UPDATED" and "old_floor" in event:
+                self._occupied.get(event["old_floor"], set()).discard(event["old_spot"])
+                self._occupied.setdefault(event["floor"], set()).add(event["spot"])
+            elif event_type == "PAYMENT_SUCCESS":
+                self._revenue += float(event.get("fee", event["amount"]))
+            else:
+                return
+            self.version += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            floors = [self._floor_stats(floor) for floor in sorted(self._occupied)]
+            revenue = self._revenue
+            version = self.version
+        occupied = sum(f["occupied"] for f in floors)
+        capacity = sum(f["capacity"] for f in floors)
+        return {
+            "type": "OCCUPANCY_SNAPSHOT",
+            "version": version,
+            "floors": floors,
+            "occupied": occupied,
+            "free": capacity - occupied,
+            "capacity": capacity,
+            "revenue": round(revenue, 2),
+        }
+
+    def _floor_stats(self, floor: int) -> Dict[str, int]:
+        occupied = len(self._occupied[floor])
+        return {"floor": floor, "occupied": occupied, "free": self.spots_per_floor - occupied,
+                "capacity": self.spots_per_floor}
+
+    @staticmethod
+    def delta(previous: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+        before = {f["floor"]: f for f in previous["floors"]}
+        changed: List[Dict[str, int]] = [f for f in current["floors"] if before.get(f["floor"]) != f]
+        return {
+            "type": "OCCUPANCY_DELTA",
+            "base_version": previous["version"],
+            "version": current["version"],
+            "floors": changed,
+            "occupied": current["occupied"],
+            "free": current["free"],
+            "capacity": current["capacity"],
+            "revenue": current["revenue"],
+        }
+
+    async def stream(self, manager, interval: float = OCCUPANCY_PUSH_INTERVAL_MS / 1000,
+                     last: Optional[Dict[str, Any]] = None) -> None:
+        last = last or self.snapshot()
+        while True:
+            await asyncio.sleep(interval)
+            current = self.snapshot()
+            if current["version"] == last["version"]:
+                continue
+            manager.publish(self.delta(last, current), OCCUPANCY_COALESCE_KEY)
+            last = current
+
+
+occupancy_tracker = OccupancyTracker()
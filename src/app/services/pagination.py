@@ -0,0 +1,85 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session, contains_eager
+from src.app.models.parking import Vehicle, ActiveParking, ParkingHistory
+
+DEFAULT_HISTORY_PAGE_SIZE = 100
+DEFAULT_VEHICLES_PAGE_SIZE = 250
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(*values: Any) -> str:
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[type]) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+    return [_cursor_value(value, kind) for value, kind in zip(values, types)]
+
+
+def _cursor_value(value: Any, kind: type) -> Any:
+    if kind is datetime and isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    elif kind is int and isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise ValueError("Invalid cursor")
+
+
+def history_page(db: Session, limit: int = DEFAULT_HISTORY_PAGE_SIZE, cursor: Optional[str] = None,
+                 since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 floor: Optional[int] = None, country: Optional[str] = None) -> Tuple[List[ParkingHistory], Optional[str]]:
+    query = (
+        db.query(ParkingHistory)
+        .join(ParkingHistory.vehicle)
+        .options(contains_eager(ParkingHistory.vehicle))
+    )
+    if since is not None:
+        query = query.filter(ParkingHistory.exit_time >= since)
+    if until is not None:
+        query = query.filter(ParkingHistory.exit_time < until)
+    if floor is not None:
+        query = query.filter(ParkingHistory.floor == floor)
+    if country is not None:
+        query = query.filter(Vehicle.country == country)
+    if cursor:
+        exit_time, history_id = decode_cursor(cursor, (datetime, int))
+        query = query.filter(tuple_(ParkingHistory.exit_time, ParkingHistory.id) < tuple_(exit_time, history_id))
+
+    rows = query.order_by(ParkingHistory.exit_time.desc(), ParkingHistory.id.desc()).limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].exit_time, items[-1].id) if len(rows) > limit else None
+    return items, next_cursor
+
+
+def active_page(db: Session, limit: int = DEFAULT_VEHICLES_PAGE_SIZE, cursor: Optional[str] = None,
+                floor: Optional[int] = None, country: Optional[str] = None) -> Tuple[List[ActiveParking], Optional[str]]:
+    query = (
+        db.query(ActiveParking)
+        .join(ActiveParking.vehicle)
+        .options(contains_eager(ActiveParking.vehicle))
+    )
+    if floor is not None:
+        query = query.filter(ActiveParking.floor == floor)
+    if country is not None:
+        query = query.filter(Vehicle.country == country)
+    if cursor:
+        vehicle_id, = decode_cursor(cursor, (int,))
+        query = query.filter(ActiveParking.vehicle_id > vehicle_id)
+
+    rows = query.order_by(ActiveParking.vehicle_id).limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].vehicle_id) if len(rows) > limit else None
+    return items, next_cursor
@@ -1,16 +1,36 @@
-from typing import List, Dict, Any
-from sqlalchemy.orm import Session
+from contextlib import contextmanager
+from typing import Callable, List, Dict, Any, Iterable, Optional, Sequence, Tuple
+from sqlalchemy import insert, update, delete, select, literal, and_, case, exists, tuple_, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
 from src.app.models.parking import Vehicle, ActiveParking, ParkingHistory
 from src.app.services.pricing import PriceCalculator
+from src.app.services.tariff import minute_of_day
 from src.app.services.validator import VehicleValidator
+from src.app.services.spot_index import SpotIndex
 from datetime import datetime, timedelta
 
+VEHICLE_LOOKUP = (
+    select(Vehicle)
+    .options(joinedload(Vehicle.active_parking))
+    .where(Vehicle.country == bindparam("country"), Vehicle.registration_no == bindparam("registration_no"))
+    .execution_options(populate_existing=True)
+)
+
 
 class ParkingManager:
-    def __init__(self, db: Session, price_calculator: PriceCalculator, validator: VehicleValidator):
+    MAX_CLAIM_ATTEMPTS = 3
+
+    def __init__(self, db: Session, price_calculator: PriceCalculator, validator: VehicleValidator,
+                 spot_index: Optional[SpotIndex] = None, clock: Optional[Callable[[], datetime]] = None):
         self.db = db
         self.price_calculator = price_calculator
         self.validator = validator
+        self.spot_index = spot_index if spot_index is not None else SpotIndex()
+        self.clock = clock if clock is not None else self._system_time
+        self._deferred: Optional[List[Tuple[List[tuple], List[tuple]]]] = None
 
     def register_entry(self, country: str, registration_no: str, requested_floor: int) -> Dict[str, Any]:
         if not self.validator.validate(country, registration_no):
@@ -19,40 +39,26 @@ class ParkingManager:
         if requested_floor < 0 or requested_floor > 4:
             raise ValueError(f"Floor {requested_floor} is not available")
 
-        vehicle = self.db.query(Vehicle).filter_by(registration_no=registration_no, country=country).first()
+        vehicle = self._find_vehicle(country, registration_no)
         if not vehicle:
             vehicle = Vehicle(country=country, registration_no=registration_no)
             self.db.add(vehicle)
             self.db.flush()
-
-        if self.db.query(ActiveParking).filter_by(vehicle_id=vehicle.id).first():
+        elif vehicle.active_parking:
             raise ValueError("Vehicle already in the parking")
 
-        all_floors = [0, 1, 2, 3, 4]
-        search_order = [requested_floor] + [f for f in all_floors if f != requested_floor]
-
-        assigned_floor = None
-        assigned_spot = None
+        search_order = [requested_floor] + [f for f in self.spot_index.floors if f != requested_floor]
 
-        for floor in search_order:
-            occupied = self.db.query(ActiveParking.spot_number).filter_by(floor=floor).all()
-            occupied_spots = {s[0] for s in occupied}
-
-            for spot in range(1, 51):
-                if spot not in occupied_spots:
-                    assigned_floor = floor
-                    assigned_spot = spot
-                    break
-
-            if assigned_spot:
-                break
-
-        if assigned_spot is None:
+        try:
+            claimed = self._claim_spot(vehicle.id, search_order, self.clock())
+        except IntegrityError:
+            self._rollback()
+            raise ValueError("Vehicle already in the parking")
+        if claimed is None:
             raise ValueError("Parking is completely full")
+        assigned_floor, assigned_spot = claimed
 
-        new_entry = ActiveParking(vehicle_id=vehicle.id, floor=assigned_floor, spot_number=assigned_spot, entry_time=datetime.now())
-        self.db.add(new_entry)
-        self.db.commit()
+        self._commit(released=[], claimed=[claimed])
         return {
             "floor": assigned_floor,
             "spot": assigned_spot,
@@ -60,13 +66,8 @@ class ParkingManager:
         }
 
     def get_payment_info(self, country: str, registration_no: str) -> Dict[str, Any]:
-        vehicle = self.db.query(Vehicle).filter_by(registration_no=registration_no, country=country).first()
-        if not vehicle or not vehicle.active_parking:
-            raise ValueError("Vehicle not found on parking")
-
-        duration = datetime.now() - vehicle.active_parking.entry_time
-        minutes = int(duration.total_seconds() / 60)
-        fee = self.price_calculator.calculate_fee(minutes, vehicle.active_parking.floor)
+        active = self._find_active(country, registration_no)
+        minutes, fee = self._quote(active, country, self.clock())
 
         return {
             "country": country,
@@ -75,77 +76,510 @@ class ParkingManager:
             "minutes": minutes
         }
 
-    def pay_parking_fee(self, country: str, registration_no: str, amount: float) -> Dict[str, Any]:
-        payment_info = self.get_payment_info(country, registration_no)
-        required_fee = payment_info["fee"]
+    def pay_parking_fee(self, country: str, registration_no: str, amount: Optional[float]) -> Dict[str, Any]:
+        active = self._find_active(country, registration_no)
+        payment_time = self.clock()
+        _, required_fee = self._quote(active, country, payment_time)
 
-        if amount < required_fee:
+        if amount is not None and amount < required_fee:
             raise ValueError("Insufficient amount")
 
-        vehicle = self.db.query(Vehicle).filter_by(registration_no=registration_no, country=country).first()
-        active = vehicle.active_parking
-
-        active.is_paid = True
-        active.payment_time = datetime.now()
-        active.paid_fee = required_fee
+        result = self._execute(
+            update(ActiveParking)
+            .where(ActiveParking.vehicle_id == active.vehicle_id)
+            .values(is_paid=True, payment_time=payment_time, paid_fee=required_fee)
+            .execution_options(synchronize_session=False),
+            claimed=[],
+        )
+        if result.rowcount == 0:
+            self._rollback()
+            raise ValueError("Vehicle not found on parking")
 
-        self.db.commit()
+        self._commit(released=[], claimed=[])
 
         return {
             "status": True,
             "fee": required_fee,
-            "payment_time": active.payment_time
+            "payment_time": payment_time
         }
 
     def register_exit(self, country: str, registration_no: str) -> Dict[str, Any]:
-        vehicle = self.db.query(Vehicle).filter_by(registration_no=registration_no, country=country).first()
-        if not vehicle or not vehicle.active_parking:
-            raise ValueError("Vehicle not found on parking")
-
-        active = vehicle.active_parking
+        active = self._find_active(country, registration_no)
         if not active.is_paid:
             raise ValueError("Parking fee not paid")
 
-        if datetime.now() - active.payment_time > timedelta(minutes=15):
+        exit_time = self.clock()
+        paid_after = exit_time - timedelta(minutes=15)
+        if active.payment_time < paid_after:
             raise ValueError("Payment expired. 15 minutes exceeded")
 
-        floor = active.floor
-        spot = active.spot_number
+        stmt = (
+            delete(ActiveParking)
+            .where(ActiveParking.vehicle_id == active.vehicle_id, ActiveParking.is_paid.is_(True),
+                   ActiveParking.payment_time >= paid_after)
+            .execution_options(synchronize_session=False)
+        )
+        if self.db.get_bind().dialect.delete_returning:
+            row = self._execute(stmt.returning(ActiveParking.entry_time, ActiveParking.floor,
+                                               ActiveParking.spot_number, ActiveParking.paid_fee), claimed=[]).first()
+        elif self._execute(stmt, claimed=[]).rowcount:
+            row = (active.entry_time, active.floor, active.spot_number, active.paid_fee)
+        else:
+            row = None
+        if row is None:
+            self._rollback()
+            raise ValueError("Vehicle not found on parking")
+        entry_time, floor, spot, paid_fee = row
+        self.db.expunge(active)
 
-        history_entry = ParkingHistory(
-            vehicle_id=vehicle.id,
-            entry_time=active.entry_time,
-            exit_time=datetime.now(),
+        self._execute(insert(ParkingHistory).values(
+            vehicle_id=active.vehicle_id,
+            entry_time=entry_time,
+            exit_time=exit_time,
             floor=floor,
-            fee=active.paid_fee
-        )
-        self.db.add(history_entry)
-        self.db.delete(active)
-        self.db.commit()
+            fee=paid_fee
+        ), claimed=[])
+        self._commit(released=[(floor, spot)], claimed=[])
         return {"floor": floor, "spot" : spot, "status": True}
 
     def change_vehicle_floor(self, country: str, registration_no: str, new_floor: int) -> Dict[str, Any]:
         if new_floor < 0 or new_floor > 4:
             raise ValueError(f"Floor {new_floor} is not available")
 
-        vehicle = self.db.query(Vehicle).filter_by(registration_no=registration_no, country=country).first()
+        for attempt in range(self.MAX_CLAIM_ATTEMPTS):
+            active = self._find_active(country, registration_no)
+
+            self.spot_index.ensure_seeded(self.db)
+            assigned_spot = self.spot_index.claim(new_floor)
+            if assigned_spot is None and self.spot_index.reconcile_on_miss(self.db):
+                assigned_spot = self.spot_index.claim(new_floor)
+            if assigned_spot is None:
+                raise ValueError(f"No free spots on floor {new_floor}")
+
+            previous = (active.floor, active.spot_number)
+            claimed = (new_floor, assigned_spot)
+
+            try:
+                result = self._execute(
+                    update(ActiveParking)
+                    .where(ActiveParking.vehicle_id == active.vehicle_id)
+                    .values(floor=new_floor, spot_number=assigned_spot)
+                    .execution_options(synchronize_session=False),
+                    claimed=[claimed],
+                )
+                if result.rowcount == 0:
+                    self._abort(claimed=[claimed])
+                    raise ValueError("Vehicle not found on parking")
+                self._commit(released=[previous], claimed=[claimed])
+            except IntegrityError:
+                if self._deferred is not None:
+                    raise
+                self.spot_index.reconcile(self.db)
+                continue
+            return {"status": True, "new_floor": new_floor, "new_spot": assigned_spot,
+                    "old_floor": previous[0], "old_spot": previous[1]}
+
+        raise ValueError(f"Could not claim a spot on floor {new_floor}, try again")
+
+    def register_entries(self, items: Sequence[Tuple[str, str, int]]) -> List[Dict[str, Any]]:
+        if self._insert_statement() is None:
+            return self._each(self.register_entry, items)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        pending: Dict[Tuple[str, str], int] = {}
+        for i, (country, registration_no, requested_floor) in enumerate(items):
+            if not self.validator.validate(country, registration_no):
+                results[i] = self._failure("Invalid registration number")
+            elif requested_floor < 0 or requested_floor > 4:
+                results[i] = self._failure(f"Floor {requested_floor} is not available")
+            elif (country, registration_no) in pending:
+                results[i] = self._failure("Vehicle already in the parking")
+            else:
+                pending[(country, registration_no)] = i
+
+        vehicle_ids = {}
+        for key, vehicle in self._find_vehicles(pending).items():
+            if vehicle.active_parking:
+                results[pending.pop(key)] = self._failure("Vehicle already in the parking")
+            else:
+                vehicle_ids[key] = vehicle.id
+
+        self.spot_index.ensure_seeded(self.db)
+        entry_time = self.clock()
+        search_orders = {}
+        claims: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        for key, i in pending.items():
+            requested_floor = items[i][2]
+            search_orders[key] = [requested_floor] + [f for f in self.spot_index.floors if f != requested_floor]
+            claimed = self.spot_index.claim_first(search_orders[key])
+            if claimed is None:
+                results[i] = self._failure("Parking is completely full")
+            else:
+                claims[key] = claimed
+
+        try:
+            new_vehicles = [{"country": c, "registration_no": r} for c, r in claims if (c, r) not in vehicle_ids]
+            if new_vehicles:
+                rows = self._execute(insert(Vehicle).returning(Vehicle.id, Vehicle.country, Vehicle.registration_no),
+                                     claimed=list(claims.values()), parameters=new_vehicles)
+                vehicle_ids.update({(row.country, row.registration_no): row.id for row in rows})
+            inserted = set()
+            if claims:
+                stmt = (
+                    self._insert_statement()
+                    .on_conflict_do_nothing(index_elements=["floor", "spot_number"])
+                    .returning(ActiveParking.vehicle_id)
+                )
+                rows = self._execute(stmt, claimed=list(claims.values()), parameters=[
+                    {"vehicle_id": vehicle_ids[key], "floor": floor, "spot_number": spot,
+                     "entry_time": entry_time, "is_paid": False}
+                    for key, (floor, spot) in claims.items()
+                ])
+                inserted = {row.vehicle_id for row in rows}
+        except IntegrityError:
+            return self._each(self.register_entry, items)
+
+        for key, claimed in list(claims.items()):
+            i = pending[key]
+            if vehicle_ids[key] not in inserted:
+                self.spot_index.confirm(*claimed)
+                del claims[key]
+                try:
+                    claimed = self._claim_spot(vehicle_ids[key], search_orders[key], entry_time)
+                except IntegrityError:
+                    self._abort(list(claims.values()))
+                    return self._each(self.register_entry, items)
+                if claimed is None:
+                    results[i] = self._failure("Parking is completely full")
+                    continue
+                claims[key] = claimed
+            results[i] = {"floor": claimed[0], "spot": claimed[1], "status": True}
+
+        if claims:
+            self._commit(released=[], claimed=list(claims.values()))
+        return results
+
+    def pay_parking_fees(self, items: Sequence[Tuple[str, str, Optional[float]]]) -> List[Dict[str, Any]]:
+        if not self.db.get_bind().dialect.update_returning:
+            return self._each(self.pay_parking_fee, items)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        vehicles = self._find_vehicles({(country, registration_no) for country, registration_no, _ in items})
+        payment_time = self.clock()
+
+        payable: List[Tuple[int, ActiveParking]] = []
+        seen = set()
+        for i, (country, registration_no, _) in enumerate(items):
+            vehicle = vehicles.get((country, registration_no))
+            if not vehicle or not vehicle.active_parking:
+                results[i] = self._failure("Vehicle not found on parking")
+            elif vehicle.id in seen:
+                results[i] = self._failure("Duplicate vehicle in batch")
+            else:
+                seen.add(vehicle.id)
+                payable.append((i, vehicle.active_parking))
+
+        minutes = [int((payment_time - active.entry_time).total_seconds() / 60) for _, active in payable]
+        fees = self.price_calculator.calculate_fees(
+            minutes,
+            [active.floor for _, active in payable],
+            [minute_of_day(active.entry_time) for _, active in payable],
+            [items[i][0] for i, _ in payable],
+        ).tolist()
+
+        updates: Dict[int, float] = {}
+        pending: List[Tuple[int, int]] = []
+        for (i, active), fee in zip(payable, fees):
+            amount = items[i][2]
+            if amount is not None and amount < fee:
+                results[i] = self._failure("Insufficient amount")
+                continue
+            updates[active.vehicle_id] = fee
+            pending.append((i, active.vehicle_id))
+            results[i] = {"status": True, "fee": fee, "payment_time": payment_time}
+
+        if updates:
+            stmt = (
+                update(ActiveParking)
+                .where(ActiveParking.vehicle_id.in_(list(updates)))
+                .values(is_paid=True, payment_time=payment_time,
+                        paid_fee=case(updates, value=ActiveParking.vehicle_id))
+                .returning(ActiveParking.vehicle_id)
+                .execution_options(synchronize_session=False)
+            )
+            paid = {row.vehicle_id for row in self._execute(stmt, claimed=[])}
+            self._commit(released=[], claimed=[])
+            for i, vehicle_id in pending:
+                if vehicle_id not in paid:
+                    results[i] = self._failure("Vehicle not found on parking")
+        return results
+
+    def register_exits(self, items: Sequence[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        if not self.db.get_bind().dialect.delete_returning:
+            return self._each(self.register_exit, items)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        vehicles = self._find_vehicles(set(items))
+        exit_time = self.clock()
+        paid_after = exit_time - timedelta(minutes=15)
+
+        leaving: Dict[int, int] = {}
+        for i, key in enumerate(items):
+            vehicle = vehicles.get(key)
+            active = vehicle.active_parking if vehicle else None
+            if not active or vehicle.id in leaving:
+                results[i] = self._failure("Vehicle not found on parking")
+            elif not active.is_paid:
+                results[i] = self._failure("Parking fee not paid")
+            elif active.payment_time < paid_after:
+                results[i] = self._failure("Payment expired. 15 minutes exceeded")
+            else:
+                leaving[vehicle.id] = i
+
+        if not leaving:
+            return results
+
+        rows = self._execute(
+            delete(ActiveParking)
+            .where(ActiveParking.vehicle_id.in_(list(leaving)), ActiveParking.is_paid.is_(True),
+                   ActiveParking.payment_time >= paid_after)
+            .returning(ActiveParking.vehicle_id, ActiveParking.entry_time, ActiveParking.floor,
+                       ActiveParking.spot_number, ActiveParking.paid_fee)
+            .execution_options(synchronize_session=False),
+            claimed=[],
+        ).all()
+        for vehicle in vehicles.values():
+            if vehicle.id in leaving and vehicle.active_parking is not None:
+                self.db.expunge(vehicle.active_parking)
+
+        for row in rows:
+            results[leaving.pop(row.vehicle_id)] = {"floor": row.floor, "spot": row.spot_number, "status": True}
+        for i in leaving.values():
+            results[i] = self._failure("Vehicle not found on parking")
+
+        if rows:
+            self._execute(insert(ParkingHistory), claimed=[], parameters=[
+                {"vehicle_id": row.vehicle_id, "entry_time": row.entry_time, "exit_time": exit_time,
+                 "floor": row.floor, "fee": row.paid_fee}
+                for row in rows
+            ])
+            self._commit(released=[(row.floor, row.spot_number) for row in rows], claimed=[])
+        return results
+
+    def _each(self, operation, items: Sequence[tuple]) -> List[Dict[str, Any]]:
+        results = []
+        with self.transaction():
+            for args in items:
+                try:
+                    with self.isolated():
+                        results.append(operation(*args))
+                except ValueError as e:
+                    results.append(self._failure(str(e)))
+        return results
+
+    @staticmethod
+    def _failure(detail: str) -> Dict[str, Any]:
+        return {"status": False, "detail": detail}
+
+    def _find_vehicles(self, keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Vehicle]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        vehicles = (
+            self.db.query(Vehicle)
+            .options(joinedload(Vehicle.active_parking))
+            .filter(tuple_(Vehicle.country, Vehicle.registration_no).in_(keys))
+            .execution_options(populate_existing=True)
+            .all()
+        )
+        return {(vehicle.country, vehicle.registration_no): vehicle for vehicle in vehicles}
+
+    @staticmethod
+    def _system_time() -> datetime:
+        return datetime.now()
+
+    def _find_vehicle(self, country: str, registration_no: str) -> Optional[Vehicle]:
+        params = {"country": country, "registration_no": registration_no}
+        return self.db.execute(VEHICLE_LOOKUP, params).unique().scalar_one_or_none()
+
+    def _find_active(self, country: str, registration_no: str) -> ActiveParking:
+        vehicle = self._find_vehicle(country, registration_no)
         if not vehicle or not vehicle.active_parking:
             raise ValueError("Vehicle not found on parking")
+        return vehicle.active_parking
+
+    def _quote(self, active: ActiveParking, country: str, now: datetime) -> Tuple[int, float]:
+        minutes = int((now - active.entry_time).total_seconds() / 60)
+        return minutes, self.price_calculator.calculate_stay_fee(minutes, active.floor, active.entry_time, country)
+
+    def _claim_spot(self, vehicle_id: int, floors: List[int], entry_time: datetime) -> Optional[Tuple[int, int]]:
+        self.spot_index.ensure_seeded(self.db)
+
+        while (claimed := self.spot_index.claim_first(floors)) is not None:
+            try:
+                inserted = self._insert_active(vehicle_id, claimed[0], claimed[1], entry_time)
+            except Exception:
+                self.spot_index.release(*claimed)
+                raise
+            if inserted:
+                return claimed
+            self.spot_index.confirm(*claimed)
+
+        for floor in floors:
+            spot = self._insert_first_free(vehicle_id, floor, entry_time)
+            if spot is not None:
+                self.spot_index.occupy(floor, spot)
+                return floor, spot
+        return None
+
+    def _insert_statement(self):
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert(ActiveParking)
+        if dialect == "sqlite":
+            return sqlite.insert(ActiveParking)
+        return None
+
+    def _insert_active(self, vehicle_id: int, floor: int, spot: int, entry_time: datetime) -> bool:
+        values = {"vehicle_id": vehicle_id, "floor": floor, "spot_number": spot,
+                  "entry_time": entry_time, "is_paid": False}
+        stmt = self._insert_statement()
+        if stmt is None:
+            try:
+                with self.db.begin_nested():
+                    self.db.execute(insert(ActiveParking).values(**values))
+                return True
+            except IntegrityError:
+                return False
+
+        stmt = stmt.values(**values).on_conflict_do_nothing(index_elements=["floor", "spot_number"])
+        return self.db.execute(stmt.returning(ActiveParking.spot_number)).first() is not None
+
+    def _insert_first_free(self, vehicle_id: int, floor: int, entry_time: datetime) -> Optional[int]:
+        spots = select(literal(1).label("n")).cte("spots", recursive=True)
+        spots = spots.union_all(select(spots.c.n + 1).where(spots.c.n < self.spot_index.spots_per_floor))
+        taken = exists().where(and_(ActiveParking.floor == floor, ActiveParking.spot_number == spots.c.n))
+        first_free = (
+            select(literal(vehicle_id), literal(floor), spots.c.n, literal(entry_time), literal(False))
+            .where(~taken)
+            .order_by(spots.c.n)
+            .limit(1)
+        )
+        columns = ["vehicle_id", "floor", "spot_number", "entry_time", "is_paid"]
+
+        stmt = self._insert_statement()
+        if stmt is None:
+            stmt = insert(ActiveParking).from_select(columns, first_free)
+        else:
+            stmt = stmt.from_select(columns, first_free).on_conflict_do_nothing(
+                index_elements=["floor", "spot_number"])
+        row = self.db.execute(stmt.returning(ActiveParking.spot_number)).first()
+        return row[0] if row else None
+
+    @contextmanager
+    def transaction(self):
+        """Defers commits of the wrapped operations into one transaction, committed on exit."""
+        self._deferred = []
+        try:
+            yield self
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            for _, claimed in self._deferred:
+                for floor, spot in claimed:
+                    self.spot_index.release(floor, spot)
+            raise
+        else:
+            for released, claimed in self._deferred:
+                self._apply_to_index(released, claimed)
+        finally:
+            self._deferred = None
+
+    @contextmanager
+    def isolated(self):
+        """Runs one operation of a transaction() in a savepoint, undoing only that operation on error."""
+        mark = len(self._deferred)
+        savepoint = self.db.begin_nested()
+        try:
+            yield self
+        except Exception:
+            if savepoint.is_active:
+                savepoint.rollback()
+            for _, claimed in self._deferred[mark:]:
+                for floor, spot in claimed:
+                    self.spot_index.release(floor, spot)
+            del self._deferred[mark:]
+            raise
+        else:
+            savepoint.commit()
+
+    def _rollback(self) -> None:
+        if self._deferred is None:
+            self.db.rollback()
+
+    def _abort(self, claimed: List[tuple]) -> None:
+        self._rollback()
+        for floor, spot in claimed:
+            self.spot_index.release(floor, spot)
+
+    def _execute(self, stmt, claimed: List[tuple], parameters: Optional[List[Dict[str, Any]]] = None):
+        try:
+            return self.db.execute(stmt, parameters)
+        except Exception:
+            self._abort(claimed)
+            raise
+
+    def _commit(self, released: List[tuple], claimed: List[tuple]) -> None:
+        try:
+            if self._deferred is None:
+                self.db.commit()
+            else:
+                self.db.flush()
+        except Exception:
+            self._abort(claimed)
+            raise
+
+        if self._deferred is None:
+            self._apply_to_index(released, claimed)
+        else:
+            self._deferred.append((released, claimed))
+
+    def _apply_to_index(self, released: List[tuple], claimed: List[tuple]) -> None:
+        for floor, spot in claimed:
+            self.spot_index.confirm(floor, spot)
+        for floor, spot in released:
+            self.spot_index.release(floor, spot)
+
+
+class AsyncParkingManager:
+    def __init__(self, db: AsyncSession, price_calculator: PriceCalculator, validator: VehicleValidator,
+                 spot_index: Optional[SpotIndex] = None, clock: Optional[Callable[[], datetime]] = None):
+        self.db = db
+        self.manager = ParkingManager(db.sync_session, price_calculator, validator, spot_index, clock)
+
+    async def register_entry(self, country: str, registration_no: str, requested_floor: int) -> Dict[str, Any]:
+        return await self._run(self.manager.register_entry, country, registration_no, requested_floor)
+
+    async def get_payment_info(self, country: str, registration_no: str) -> Dict[str, Any]:
+        return await self._run(self.manager.get_payment_info, country, registration_no)
+
+    async def pay_parking_fee(self, country: str, registration_no: str, amount: Optional[float]) -> Dict[str, Any]:
+        return await self._run(self.manager.pay_parking_fee, country, registration_no, amount)
+
+    async def register_exit(self, country: str, registration_no: str) -> Dict[str, Any]:
+        return await self._run(self.manager.register_exit, country, registration_no)
 
-        occupied = self.db.query(ActiveParking.spot_number).filter_by(floor=new_floor).all()
-        occupied_spots = {s[0] for s in occupied}
+    async def change_vehicle_floor(self, country: str, registration_no: str, new_floor: int) -> Dict[str, Any]:
+        return await self._run(self.manager.change_vehicle_floor, country, registration_no, new_floor)
 
-        assigned_spot = None
-        for spot in range(1, 51):
-            if spot not in occupied_spots:
-                assigned_spot = spot
-                break
+    async def register_entries(self, items: Sequence[Tuple[str, str, int]]) -> List[Dict[str, Any]]:
+        return await self._run(self.manager.register_entries, items)
 
-        if assigned_spot is None:
-            raise ValueError(f"No free spots on floor {new_floor}")
+    async def pay_parking_fees(self, items: Sequence[Tuple[str, str, Optional[float]]]) -> List[Dict[str, Any]]:
+        return await self._run(self.manager.pay_parking_fees, items)
 
-        vehicle.active_parking.floor = new_floor
-        vehicle.active_parking.spot_number = assigned_spot
+    async def register_exits(self, items: Sequence[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        return await self._run(self.manager.register_exits, items)
 
-        self.db.commit()
-        return {"status": True, "new_floor": new_floor, "new_spot": assigned_spot}
\ No newline at end of file
+    async def _run(self, method, *args):
+        return await self.db.run_sync(lambda _: method(*args))
@@ -1,22 +1,29 @@
-from typing import Dict
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional, Sequence
+import numpy as np
+from src.app.services.tariff import Tariff, minute_of_day
 
 
 class PriceCalculator:
-    def __init__(self, prices: Dict[int, int | float]):
+    def __init__(self, prices: Dict[int, int | float], tariff: Optional[Mapping[str, Any]] = None):
         self.prices = prices
+        self.tariff = Tariff.from_dict(prices, tariff or {})
 
     def calculate_fee(self, minutes: int, floor: int) -> float:
         if not isinstance(minutes, int):
             raise TypeError("Minutes must be an integer")
 
-        if minutes < 0:
-            raise ValueError("Time can't be negative")
+        return self.tariff.fee(minutes, floor)
 
-        if floor not in self.prices:
-            raise ValueError(f"Floor {floor} not in price list")
+    def calculate_stay_fee(self, minutes: int, floor: int, entry_time: Optional[datetime] = None,
+                           country: Optional[str] = None) -> float:
+        if not isinstance(minutes, int):
+            raise TypeError("Minutes must be an integer")
 
-        if minutes <= 30:
-            return 0.0
+        entry_minute = minute_of_day(entry_time) if entry_time is not None else 0
+        return self.tariff.fee(minutes, floor, entry_minute, country)
 
-        fee = ((minutes - 30) / 60) * self.prices[floor]
-        return round(fee, 2)
+    def calculate_fees(self, minutes: Sequence[int], floors: Sequence[int],
+                       entry_minutes: Optional[Sequence[int]] = None,
+                       countries: Optional[Sequence[Optional[str]]] = None) -> np.ndarray:
+        return self.tariff.fees(minutes, floors, entry_minutes, countries)
@@ -0,0 +1,66 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from src.app.models.parking import Vehicle, ActiveParking
+from src.app.services.pricing import PriceCalculator
+
+MINUTE = np.timedelta64(1, "m")
+
+
+def fee_quotes(db: Session, price_calculator: PriceCalculator, floor: Optional[int] = None,
+               country: Optional[str] = None, now: Optional[datetime] = None, details: bool = True) -> Dict[str, Any]:
+    now = now or datetime.now()
+    query = (
+        select(Vehicle.country, Vehicle.registration_no, ActiveParking.floor, ActiveParking.spot_number,
+               ActiveParking.entry_time, ActiveParking.is_paid)
+        .join(ActiveParking.vehicle)
+        .order_by(ActiveParking.floor, ActiveParking.spot_number)
+    )
+    if floor is not None:
+        query = query.where(ActiveParking.floor == floor)
+    if country is not None:
+        query = query.where(Vehicle.country == country)
+    rows = db.execute(query).all()
+
+    countries = [row.country for row in rows]
+    floors = np.array([row.floor for row in rows], dtype=np.int64)
+    entry_times = np.array([row.entry_time for row in rows], dtype="datetime64[us]")
+    is_paid = np.array([bool(row.is_paid) for row in rows], dtype=bool)
+
+    minutes = np.maximum((np.datetime64(now, "us") - entry_times) // MINUTE, 0).astype(np.int64)
+    entry_minutes = ((entry_times - entry_times.astype("datetime64[D]")) // MINUTE).astype(np.int64)
+    cents = price_calculator.tariff.fee_cents_array(minutes, floors, entry_minutes, countries)
+    due = np.where(is_paid, 0, cents)
+
+    per_floor = {}
+    for value in np.unique(floors).tolist():
+        mask = floors == value
+        per_floor[value] = {
+            "vehicles": int(mask.sum()),
+            "fee": int(cents[mask].sum()) / 100,
+            "due": int(due[mask].sum()) / 100,
+        }
+
+    result = {
+        "generated_at": now,
+        "vehicles": len(rows),
+        "fee": int(cents.sum()) / 100,
+        "due": int(due.sum()) / 100,
+        "floors": per_floor,
+    }
+    if details:
+        result["quotes"] = [
+            {
+                "country": row.country,
+                "registration_no": row.registration_no,
+                "floor": row.floor,
+                "spot": row.spot_number,
+                "minutes": int(m),
+                "fee": int(c) / 100,
+                "is_paid": bool(row.is_paid),
+            }
+            for row, m, c in zip(rows, minutes.tolist(), cents.tolist())
+        ]
+    return result
@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+TRAFFIC_RECORD_FILE = os.getenv("TRAFFIC_RECORD_FILE", "")
+RECORDED_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+RECORD_EXCLUDED_PATHS = frozenset({"/login", "/logout"})
+RECORDED_HEADERS = frozenset({"idempotency-key", "content-type"})
+
+
+class TrafficRecorder:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(entry, separators=(",", ":"), default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "a", encoding="utf-8", buffering=1)
+            self._file.write(line)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_records(path: str) -> List[Dict[str, Any]]:
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def _decode_body(body: bytes) -> Any:
+    if not body:
+        return None
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body.decode(errors="replace")
+
+
+class RecordingMiddleware:
+    def __init__(self, app, recorder: TrafficRecorder):
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or not self.recorder.enabled or scope["method"] not in RECORDED_METHODS
+                or scope["path"] in RECORD_EXCLUDED_PATHS):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.time()
+        request_body = bytearray()
+        response_body = bytearray()
+        status = {}
+
+        async def receive_and_capture():
+            message = await receive()
+            if message["type"] == "http.request":
+                request_body.extend(message.get("body", b""))
+            return message
+
+        async def send_and_capture(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response_body.extend(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_and_capture, send_and_capture)
+        finally:
+            self.recorder.record({
+                "t": started,
+                "src": "http",
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope["query_string"].decode(),
+                "headers": {k.decode().lower(): v.decode() for k, v in scope["headers"]
+                            if k.decode().lower() in RECORDED_HEADERS},
+                "body": _decode_body(bytes(request_body)),
+                "status": status.get("code"),
+                "response": _decode_body(bytes(response_body)),
+            })
+
+
+traffic_recorder = TrafficRecorder(TRAFFIC_RECORD_FILE or None)
@@ -0,0 +1,184 @@
+import bisect
+import heapq
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Set, Tuple
+from sqlalchemy import or_, text
+from sqlalchemy.orm import Session
+from src.app.models.parking import Vehicle
+
+SEARCH_MODES = ("contains", "prefix", "exact")
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+PREFIX_RANK_WINDOW = 10
+SEARCH_GAP_TTL_SECONDS = float(os.getenv("SEARCH_GAP_TTL_SECONDS", "300"))
+SEARCH_MAX_GAPS = int(os.getenv("SEARCH_MAX_GAPS", "1000"))
+
+
+def normalize_plate(value: str) -> str:
+    return "".join(ch for ch in value.upper() if ch.isalnum())
+
+
+def trigrams(value: str) -> Set[str]:
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(left: Set[str], right: Set[str]) -> float:
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class NgramIndex:
+    def __init__(self, gap_ttl: float = SEARCH_GAP_TTL_SECONDS, max_gaps: int = SEARCH_MAX_GAPS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.gap_ttl = gap_ttl
+        self.max_gaps = max_gaps
+        self.clock = clock
+        self._gaps: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._plates: Dict[int, Tuple[str, str, str]] = {}
+        self._postings: Dict[str, Set[int]] = {}
+        self._exact: Dict[str, Set[int]] = {}
+        self._sorted: List[Tuple[str, int]] = []
+        self.last_id = 0
+
+    def refresh(self, db: Session) -> None:
+        with self._lock:
+            expired = self.clock() - self.gap_ttl
+            self._gaps = {vehicle_id: seen for vehicle_id, seen in self._gaps.items() if seen > expired}
+            gaps = list(self._gaps)
+        condition = Vehicle.id > self.last_id
+        if gaps:
+            condition = or_(condition, Vehicle.id.in_(gaps))
+        rows = (
+            db.query(Vehicle.id, Vehicle.country, Vehicle.registration_no)
+            .filter(condition)
+            .order_by(Vehicle.id)
+            .all()
+        )
+        if not rows:
+            return
+        bulk = len(rows) > 1
+        with self._lock:
+            for vehicle_id, country, registration_no in rows:
+                self._add(vehicle_id, country, registration_no, bulk)
+            if bulk:
+                self._sorted.sort()
+
+    def add(self, vehicle_id: int, country: str, registration_no: str) -> None:
+        with self._lock:
+            self._add(vehicle_id, country, registration_no, False)
+
+    def _add(self, vehicle_id: int, country: str, registration_no: str, bulk: bool) -> None:
+        if vehicle_id in self._plates:
+            return
+        self._gaps.pop(vehicle_id, None)
+        if vehicle_id > self.last_id + 1:
+            now = self.clock()
+            for missing in range(max(self.last_id + 1, vehicle_id - self.max_gaps), vehicle_id):
+                if missing not in self._plates:
+                    self._gaps[missing] = now
+        normalized = normalize_plate(registration_no)
+        self._plates[vehicle_id] = (country, registration_no, normalized)
+        self._exact.setdefault(normalized, set()).add(vehicle_id)
+        for size in (2, 3):
+            for i in range(len(normalized) - size + 1):
+                self._postings.setdefault(normalized[i:i + size], set()).add(vehicle_id)
+        if bulk:
+            self._sorted.append((normalized, vehicle_id))
+        else:
+            bisect.insort(self._sorted, (normalized, vehicle_id))
+        self.last_id = max(self.last_id, vehicle_id)
+
+    def search(self, q: str, mode: str = "contains", limit: int = DEFAULT_SEARCH_LIMIT) -> List[Dict[str, Any]]:
+        query = normalize_plate(q)
+        if not query:
+            return []
+
+        with self._lock:
+            if mode == "exact":
+                candidates = self._exact.get(query, set())
+            elif mode == "prefix" or len(query) < 2:
+                candidates = self._prefix_candidates(query, limit * PREFIX_RANK_WINDOW)
+            else:
+                candidates = self._contains_candidates(query)
+            plates = [(vehicle_id, self._plates[vehicle_id]) for vehicle_id in candidates]
+
+        query_grams = trigrams(query)
+        scored = (
+            (similarity(query_grams, trigrams(normalized)), registration_no, vehicle_id, country)
+            for vehicle_id, (country, registration_no, normalized) in plates
+        )
+        best = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1]))
+        return [
+            {"id": vehicle_id, "country": country, "registration_no": registration_no, "similarity": round(score, 4)}
+            for score, registration_no, vehicle_id, country in best
+        ]
+
+    def _prefix_candidates(self, query: str, window: int) -> List[int]:
+        start = bisect.bisect_left(self._sorted, (query, -1))
+        candidates = []
+        for normalized, vehicle_id in self._sorted[start:start + window]:
+            if not normalized.startswith(query):
+                break
+            candidates.append(vehicle_id)
+        return candidates
+
+    def _contains_candidates(self, query: str) -> Set[int]:
+        size = 3 if len(query) >= 3 else 2
+        grams = sorted({query[i:i + size] for i in range(len(query) - size + 1)},
+                       key=lambda gram: len(self._postings.get(gram, ())))
+        candidates = set(self._postings.get(grams[0], set()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates &= self._postings.get(gram, set())
+        if len(query) > size:
+            candidates = {vid for vid in candidates if query in self._plates[vid][2]}
+        return candidates
+
+
+class VehicleSearch:
+    def __init__(self):
+        self.ngram_index = NgramIndex()
+
+    def search(self, db: Session, q: str, mode: str = "contains",
+               limit: int = DEFAULT_SEARCH_LIMIT) -> List[Dict[str, Any]]:
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unsupported search mode {mode}")
+        if db.get_bind().dialect.name == "postgresql":
+            return self._search_postgres(db, q, mode, limit)
+        self.ngram_index.refresh(db)
+        return self.ngram_index.search(q, mode, limit)
+
+    def _search_postgres(self, db: Session, q: str, mode: str, limit: int) -> List[Dict[str, Any]]:
+        query = normalize_plate(q)
+        if not query:
+            return []
+        if mode == "exact":
+            condition, pattern = "registration_no = :pattern", query
+        elif mode == "prefix":
+            condition, pattern = "registration_no ILIKE :pattern", f"{_escape_like(query)}%"
+        else:
+            condition, pattern = "registration_no ILIKE :pattern", f"%{_escape_like(query)}%"
+
+        rows = db.execute(text(
+            f"SELECT id, country, registration_no, similarity(registration_no, :q) AS score "
+            f"FROM vehicles WHERE {condition} "
+            f"ORDER BY score DESC, registration_no LIMIT :limit"
+        ), {"q": query, "pattern": pattern, "limit": limit}).all()
+        return [
+            {"id": row.id, "country": row.country, "registration_no": row.registration_no,
+             "similarity": round(float(row.score), 4)}
+            for row in rows
+        ]
+
+
+vehicle_search = VehicleSearch()
@@ -0,0 +1,238 @@
+import heapq
+import itertools
+import math
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.app.config import ParkingConfig
+from src.app.models.base import Base
+from src.app.services.parking_manager import ParkingManager
+from src.app.services.spot_index import SpotIndex
+
+ARRIVAL, PAYMENT, EXIT = "arrival", "payment", "exit"
+
+DEFAULT_HOURLY_ARRIVALS = (
+    2, 1, 1, 1, 2, 6, 18, 40, 45, 30, 22, 20,
+    22, 20, 18, 20, 26, 30, 22, 14, 10, 7, 5, 3,
+)
+
+PLATE_LETTERS = "ABCDEFGHJKLMNPRSTUWXYZ"
+
+
+def default_vehicle(rng: random.Random) -> Dict[str, Any]:
+    country = rng.choices(["PL", "UA", "DE", "CZ"], weights=[94, 4, 1, 1])[0]
+    prefix = "GD" if country == "PL" else rng.choice(PLATE_LETTERS) + rng.choice(PLATE_LETTERS)
+    return {
+        "country": country,
+        "registration_no": f"{prefix}{rng.choice(PLATE_LETTERS)}{rng.randint(100, 999)}{rng.choice(PLATE_LETTERS)}",
+        "floor": rng.randint(0, 4),
+    }
+
+
+class VirtualClock:
+    def __init__(self, start: datetime):
+        self.now = start
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, to: datetime) -> None:
+        if to < self.now:
+            raise ValueError("Virtual time can't go backwards")
+        self.now = to
+
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    days: float = 7
+    start: datetime = datetime(2026, 1, 5)
+    hourly_arrivals: Sequence[float] = DEFAULT_HOURLY_ARRIVALS
+    weekend_factor: float = 0.6
+    dwell_median_minutes: float = 150
+    dwell_sigma: float = 0.9
+    min_dwell_minutes: float = 5
+    pay_lead_minutes: Tuple[float, float] = (1, 12)
+    late_exit_probability: float = 0.03
+    fleet_size: int = 4000
+    sample_minutes: int = 60
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        if self.days <= 0:
+            raise ValueError("Simulation must cover a positive number of days")
+        if len(self.hourly_arrivals) != 24 or min(self.hourly_arrivals) < 0:
+            raise ValueError("Hourly arrivals must be 24 non-negative rates")
+        if not 0 < self.pay_lead_minutes[0] <= self.pay_lead_minutes[1]:
+            raise ValueError("Invalid payment lead time")
+
+
+@dataclass
+class SimulationReport:
+    start: datetime
+    end: datetime
+    capacity: int
+    events: int = 0
+    entries: int = 0
+    exits: int = 0
+    payments: int = 0
+    expired_payments: int = 0
+    revenue: float = 0.0
+    peak_occupancy: int = 0
+    average_occupancy: float = 0.0
+    rejections: Counter = field(default_factory=Counter)
+    occupancy_samples: List[Tuple[datetime, int]] = field(default_factory=list)
+    wall_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        simulated = (self.end - self.start).total_seconds()
+        return {
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "simulated_hours": round(simulated / 3600, 2),
+            "wall_seconds": round(self.wall_seconds, 3),
+            "speedup": round(simulated / self.wall_seconds) if self.wall_seconds else None,
+            "events": self.events,
+            "entries": self.entries,
+            "exits": self.exits,
+            "payments": self.payments,
+            "expired_payments": self.expired_payments,
+            "rejections": dict(self.rejections),
+            "revenue": round(self.revenue, 2),
+            "capacity": self.capacity,
+            "peak_occupancy": self.peak_occupancy,
+            "average_occupancy": round(self.average_occupancy, 2),
+            "occupancy_samples": [(t.isoformat(), n) for t, n in self.occupancy_samples],
+        }
+
+
+def in_memory_manager(parking_config: ParkingConfig, clock: Callable[[], datetime]) -> ParkingManager:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    return ParkingManager(session, parking_config.price_calculator, parking_config.validator, SpotIndex(), clock)
+
+
+class Simulation:
+    def __init__(self, config: SimulationConfig = SimulationConfig(), parking_config: Optional[ParkingConfig] = None,
+                 vehicle_factory: Callable[[random.Random], Dict[str, Any]] = default_vehicle,
+                 manager_factory: Callable[[ParkingConfig, Callable[[], datetime]], ParkingManager] = in_memory_manager):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.clock = VirtualClock(config.start)
+        self.manager = manager_factory(parking_config or ParkingConfig.from_dict({}), self.clock)
+        self.end = config.start + timedelta(days=config.days)
+        self.fleet = self._build_fleet(vehicle_factory)
+        self.parked: Set[Tuple[str, str]] = set()
+        self._queue: List[Tuple[datetime, int, str, Optional[Dict[str, Any]]]] = []
+        self._sequence = itertools.count()
+        capacity = len(self.manager.spot_index.floors) * self.manager.spot_index.spots_per_floor
+        self.report = SimulationReport(start=config.start, end=self.end, capacity=capacity)
+        self._occupied = 0
+        self._occupancy_area = 0.0
+        self._last_change = config.start
+
+    def _build_fleet(self, vehicle_factory) -> List[Dict[str, Any]]:
+        fleet = {}
+        while len(fleet) < self.config.fleet_size:
+            vehicle = vehicle_factory(self.rng)
+            fleet.setdefault((vehicle["country"], vehicle["registration_no"]), vehicle)
+        return list(fleet.values())
+
+    def schedule(self, at: datetime, kind: str, vehicle: Optional[Dict[str, Any]] = None) -> None:
+        heapq.heappush(self._queue, (at, next(self._sequence), kind, vehicle))
+
+    def run(self) -> SimulationReport:
+        started = time.perf_counter()
+        self.schedule(self._next_arrival(self.config.start), ARRIVAL)
+        next_sample = self.config.start
+        while self._queue and self._queue[0][0] <= self.end:
+            at, _, kind, vehicle = heapq.heappop(self._queue)
+            while next_sample <= at:
+                self.report.occupancy_samples.append((next_sample, self._occupied))
+                next_sample += timedelta(minutes=self.config.sample_minutes)
+            self.clock.advance(at)
+            self.report.events += 1
+            getattr(self, f"_on_{kind}")(vehicle)
+
+        self._track_occupancy(self.end, 0)
+        self.report.average_occupancy = self._occupancy_area / (self.end - self.config.start).total_seconds()
+        self.report.wall_seconds = time.perf_counter() - started
+        return self.report
+
+    def _next_arrival(self, after: datetime) -> datetime:
+        moment = after
+        while moment <= self.end:
+            hour_start = moment.replace(minute=0, second=0, microsecond=0)
+            rate = self.config.hourly_arrivals[moment.hour] * (self.config.weekend_factor if moment.weekday() >= 5 else 1)
+            hour_end = hour_start + timedelta(hours=1)
+            if rate > 0:
+                candidate = moment + timedelta(hours=self.rng.expovariate(rate))
+                if candidate < hour_end:
+                    return candidate
+            moment = hour_end
+        return moment
+
+    def _dwell(self) -> timedelta:
+        minutes = self.rng.lognormvariate(math.log(self.config.dwell_median_minutes), self.config.dwell_sigma)
+        return timedelta(minutes=max(minutes, self.config.min_dwell_minutes))
+
+    def _track_occupancy(self, at: datetime, change: int) -> None:
+        self._occupancy_area += self._occupied * (at - self._last_change).total_seconds()
+        self._last_change = at
+        self._occupied += change
+        self.report.peak_occupancy = max(self.report.peak_occupancy, self._occupied)
+
+    def _dispatch(self, operation, *args) -> Optional[Dict[str, Any]]:
+        try:
+            return operation(*args)
+        except ValueError as e:
+            self.report.rejections[str(e)] += 1
+            return None
+
+    def _on_arrival(self, _: Optional[Dict[str, Any]]) -> None:
+        now = self.clock()
+        self.schedule(self._next_arrival(now), ARRIVAL)
+
+        vehicle = self.rng.choice(self.fleet)
+        key = (vehicle["country"], vehicle["registration_no"])
+        if key in self.parked:
+            return
+        if self._dispatch(self.manager.register_entry, *key, vehicle["floor"]) is None:
+            return
+        self.report.entries += 1
+        self.parked.add(key)
+        self._track_occupancy(now, 1)
+
+        dwell = self._dwell()
+        lead = timedelta(minutes=self.rng.uniform(*self.config.pay_lead_minutes))
+        if self.rng.random() < self.config.late_exit_probability:
+            lead += timedelta(minutes=self.rng.uniform(15, 45))
+        self.schedule(now + max(dwell - lead, timedelta(0)), PAYMENT, vehicle)
+        self.schedule(now + max(dwell, lead), EXIT, vehicle)
+
+    def _on_payment(self, vehicle: Dict[str, Any]) -> None:
+        result = self._dispatch(self.manager.pay_parking_fee, vehicle["country"], vehicle["registration_no"], None)
+        if result is not None:
+            self.report.payments += 1
+            self.report.revenue += result["fee"]
+
+    def _on_exit(self, vehicle: Dict[str, Any]) -> None:
+        key = (vehicle["country"], vehicle["registration_no"])
+        try:
+            self.manager.register_exit(*key)
+        except ValueError as e:
+            if "expired" not in str(e):
+                self.report.rejections[str(e)] += 1
+                return
+            self.report.expired_payments += 1
+            self._on_payment(vehicle)
+            self.schedule(self.clock() + timedelta(minutes=1), EXIT, vehicle)
+            return
+        self.report.exits += 1
+        self.parked.discard(key)
+        self._track_occupancy(self.clock(), -1)
@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from src.app.models.parking import ActiveParking
+
+FLOORS = (0, 1, 2, 3, 4)
+SPOTS_PER_FLOOR = 50
+SPOT_INDEX_MISS_RECONCILE_SECONDS = float(os.getenv("SPOT_INDEX_MISS_RECONCILE_SECONDS", "5"))
+
+
+class SpotIndex:
+    """Process-wide index of free spots, one bitmap per floor (bit n-1 set = spot n free).
+
+    Claimed spots stay pending until the caller confirms (committed) or releases them
+    (rolled back), so a reconcile running concurrently never hands them out twice.
+    """
+
+    def __init__(self, floors: Iterable[int] = FLOORS, spots_per_floor: int = SPOTS_PER_FLOOR,
+                 miss_interval: float = SPOT_INDEX_MISS_RECONCILE_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self.floors = tuple(floors)
+        self.spots_per_floor = spots_per_floor
+        self._all_free = (1 << spots_per_floor) - 1
+        self._free: Dict[int, int] = {floor: self._all_free for floor in self.floors}
+        self._pending: Set[Tuple[int, int]] = set()
+        self._journal: Optional[List[Tuple[str, int, int]]] = None
+        self._lock = threading.Lock()
+        self.miss_interval = miss_interval
+        self.clock = clock
+        self._last_miss_reconcile = float("-inf")
+        self.is_seeded = False
+
+    def reconcile(self, db: Session) -> None:
+        with self._lock:
+            self._journal = []
+        try:
+            rows = db.query(ActiveParking.floor, ActiveParking.spot_number).all()
+        except Exception:
+            with self._lock:
+                self._journal = None
+            raise
+
+        free = {floor: self._all_free for floor in self.floors}
+        for floor, spot in rows:
+            if floor in free and 1 <= spot <= self.spots_per_floor:
+                free[floor] &= ~(1 << (spot - 1))
+
+        with self._lock:
+            for op, floor, spot in self._journal:
+                bit = 1 << (spot - 1)
+                free[floor] = free[floor] | bit if op == "release" else free[floor] & ~bit
+            for floor, spot in self._pending:
+                free[floor] &= ~(1 << (spot - 1))
+            self._free = free
+            self._journal = None
+            self.is_seeded = True
+
+    def ensure_seeded(self, db: Session) -> None:
+        if not self.is_seeded:
+            self.reconcile(db)
+
+    def reconcile_on_miss(self, db: Session) -> bool:
+        with self._lock:
+            now = self.clock()
+            if now - self._last_miss_reconcile < self.miss_interval:
+                return False
+            self._last_miss_reconcile = now
+        self.reconcile(db)
+        return True
+
+    def claim(self, floor: int) -> Optional[int]:
+        with self._lock:
+            bits = self._free.get(floor, 0)
+            if not bits:
+                return None
+            lowest = bits & -bits
+            self._free[floor] = bits ^ lowest
+            spot = lowest.bit_length()
+            self._pending.add((floor, spot))
+            return spot
+
+    def claim_first(self, floors: Iterable[int]) -> Optional[Tuple[int, int]]:
+        for floor in floors:
+            spot = self.claim(floor)
+            if spot is not None:
+                return floor, spot
+        return None
+
+    def confirm(self, floor: int, spot: int) -> None:
+        with self._lock:
+            self._pending.discard((floor, spot))
+            if self._journal is not None:
+                self._journal.append(("occupy", floor, spot))
+
+    def release(self, floor: int, spot: int) -> None:
+        if not self._is_valid(floor, spot):
+            return
+        with self._lock:
+            self._pending.discard((floor, spot))
+            self._free[floor] |= 1 << (spot - 1)
+            if self._journal is not None:
+                self._journal.append(("release", floor, spot))
+
+    def occupy(self, floor: int, spot: int) -> None:
+        if not self._is_valid(floor, spot):
+            return
+        with self._lock:
+            self._free[floor] &= ~(1 << (spot - 1))
+            if self._journal is not None:
+                self._journal.append(("occupy", floor, spot))
+
+    def is_free(self, floor: int, spot: int) -> bool:
+        return self._is_valid(floor, spot) and bool(self._free[floor] & (1 << (spot - 1)))
+
+    def free_count(self, floor: int) -> int:
+        return bin(self._free.get(floor, 0)).count("1")
+
+    def _is_valid(self, floor: int, spot: int) -> bool:
+        return floor in self._free and 1 <= spot <= self.spots_per_floor
+
+
+spot_index = SpotIndex()
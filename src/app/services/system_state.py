@@ -0,0 +1,18 @@
+from sqlalchemy.orm import Session
+from src.app.models.parking import SystemState
+
+LOCK_FLAG = "is_locked"
+
+
+def get_flag(db: Session, key: str, default: bool = False) -> bool:
+    row = db.get(SystemState, key)
+    return default if row is None else row.value == "true"
+
+
+def set_flag(db: Session, key: str, value: bool) -> None:
+    row = db.get(SystemState, key)
+    if row is None:
+        db.add(SystemState(key=key, value="true" if value else "false"))
+    else:
+        row.value = "true" if value else "false"
+    db.flush()
@@ -0,0 +1,214 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+import numpy as np
+
+MINUTES_PER_DAY = 1440
+DEFAULT_GRACE_MINUTES = 30
+
+
+def _to_cents(value: float) -> int:
+    return int(round(float(value) * 100))
+
+
+def _to_percent(multiplier: float) -> int:
+    return int(round(float(multiplier) * 100))
+
+
+def parse_clock(value: str) -> int:
+    hours, minutes = value.split(":")
+    minute = int(hours) * 60 + int(minutes)
+    if not 0 <= minute <= MINUTES_PER_DAY:
+        raise ValueError(f"Invalid time of day {value}")
+    return minute
+
+
+def minute_of_day(moment: datetime) -> int:
+    return moment.hour * 60 + moment.minute
+
+
+@dataclass(frozen=True)
+class RateBand:
+    start_minute: int
+    end_minute: int
+    multiplier: float
+
+    def __post_init__(self):
+        if not 0 <= self.start_minute < self.end_minute <= MINUTES_PER_DAY:
+            raise ValueError(f"Invalid rate band {self.start_minute}-{self.end_minute}")
+        if self.multiplier < 0:
+            raise ValueError("Rate band multiplier can't be negative")
+
+    @classmethod
+    def parse(cls, start: str, end: str, multiplier: float) -> Tuple["RateBand", ...]:
+        start_minute, end_minute = parse_clock(start), parse_clock(end)
+        if start_minute < end_minute:
+            return (cls(start_minute, end_minute, multiplier),)
+        bands = [cls(start_minute, MINUTES_PER_DAY, multiplier)]
+        if end_minute > 0:
+            bands.append(cls(0, end_minute, multiplier))
+        return tuple(bands)
+
+
+def bands_from_config(items: Iterable[Mapping[str, Any]]) -> Tuple[RateBand, ...]:
+    bands: Tuple[RateBand, ...] = ()
+    for item in items:
+        bands += RateBand.parse(item["start"], item["end"], item["multiplier"])
+    return bands
+
+
+@dataclass(frozen=True)
+class Tariff:
+    hourly_rates: Mapping[int, float]
+    grace_minutes: int = DEFAULT_GRACE_MINUTES
+    bands: Tuple[RateBand, ...] = ()
+    daily_cap: Optional[float] = None
+    country_surcharges: Mapping[str, float] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if not 0 <= self.grace_minutes < MINUTES_PER_DAY:
+            raise ValueError("Grace period must be shorter than a day")
+        ordered = tuple(sorted(self.bands, key=lambda band: band.start_minute))
+        for previous, band in zip(ordered, ordered[1:]):
+            if band.start_minute < previous.end_minute:
+                raise ValueError("Rate bands must not overlap")
+        object.__setattr__(self, "bands", ordered)
+        object.__setattr__(self, "hourly_rates", MappingProxyType({int(k): v for k, v in self.hourly_rates.items()}))
+        object.__setattr__(self, "country_surcharges", MappingProxyType(dict(self.country_surcharges)))
+
+        self._set("_rate_cents", {floor: _to_cents(rate) for floor, rate in self.hourly_rates.items()})
+        self._set("_cap_cents", None if self.daily_cap is None else _to_cents(self.daily_cap))
+        self._set("_surcharge_percent", {c: _to_percent(m) for c, m in self.country_surcharges.items()})
+        self._set("_band_spans", tuple(
+            (band.start_minute, band.end_minute - band.start_minute, _to_percent(band.multiplier) - 100)
+            for band in self.bands
+        ))
+        self._set("_full_day_cents", {
+            floor: self._cap(self._round(rate * self._weighted_minutes(0, MINUTES_PER_DAY)))
+            for floor, rate in self._rate_cents.items()
+        })
+
+        max_floor = max(self._rate_cents, default=-1)
+        rate_table = np.full(max_floor + 1, -1, dtype=np.int64)
+        full_day_table = np.zeros(max_floor + 1, dtype=np.int64)
+        for floor, rate in self._rate_cents.items():
+            if floor >= 0:
+                rate_table[floor] = rate
+                full_day_table[floor] = self._full_day_cents[floor]
+        self._set("_rate_table", rate_table)
+        self._set("_full_day_table", full_day_table)
+
+    def _set(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_dict(cls, hourly_rates: Mapping[int, float], data: Mapping[str, Any]) -> "Tariff":
+        return cls(
+            hourly_rates=hourly_rates,
+            grace_minutes=int(data.get("grace_minutes", DEFAULT_GRACE_MINUTES)),
+            bands=bands_from_config(data.get("bands", ())),
+            daily_cap=data.get("daily_cap"),
+            country_surcharges=data.get("country_surcharges", {}),
+        )
+
+    @staticmethod
+    def _round(weighted_cents: int) -> int:
+        return (weighted_cents + 3000) // 6000
+
+    def _cap(self, cents: int) -> int:
+        return cents if self._cap_cents is None else min(cents, self._cap_cents)
+
+    def _weighted_minutes(self, start: int, end: int) -> int:
+        weighted = 100 * (end - start)
+        for band_start, band_length, extra_percent in self._band_spans:
+            weighted += extra_percent * (self._band_minutes(end, band_start, band_length)
+                                         - self._band_minutes(start, band_start, band_length))
+        return weighted
+
+    @staticmethod
+    def _band_minutes(moment: int, band_start: int, band_length: int) -> int:
+        return (moment // MINUTES_PER_DAY) * band_length + min(max(moment % MINUTES_PER_DAY - band_start, 0),
+                                                                band_length)
+
+    def _block_cents(self, rate: int, entry_minute: int, start: int, end: int) -> int:
+        return self._cap(self._round(rate * self._weighted_minutes(entry_minute + start, entry_minute + end)))
+
+    def fee_cents(self, minutes: int, floor: int, entry_minute: int = 0, country: Optional[str] = None) -> int:
+        if minutes < 0:
+            raise ValueError("Time can't be negative")
+        if floor not in self._rate_cents:
+            raise ValueError(f"Floor {floor} not in price list")
+        if minutes <= self.grace_minutes:
+            return 0
+
+        rate = self._rate_cents[floor]
+        blocks = -(-minutes // MINUTES_PER_DAY)
+        total = self._block_cents(rate, entry_minute, self.grace_minutes, min(minutes, MINUTES_PER_DAY))
+        if blocks >= 2:
+            total += (blocks - 2) * self._full_day_cents[floor]
+            total += self._block_cents(rate, entry_minute, (blocks - 1) * MINUTES_PER_DAY, minutes)
+        return (total * self._surcharge_percent.get(country, 100) + 50) // 100
+
+    def fee(self, minutes: int, floor: int, entry_minute: int = 0, country: Optional[str] = None) -> float:
+        return self.fee_cents(minutes, floor, entry_minute, country) / 100
+
+    def _weighted_minutes_array(self, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+        weighted = 100 * (end - start)
+        for band_start, band_length, extra_percent in self._band_spans:
+            weighted += extra_percent * (self._band_minutes_array(end, band_start, band_length)
+                                         - self._band_minutes_array(start, band_start, band_length))
+        return weighted
+
+    @staticmethod
+    def _band_minutes_array(moment: np.ndarray, band_start: int, band_length: int) -> np.ndarray:
+        return (moment // MINUTES_PER_DAY) * band_length + np.clip(moment % MINUTES_PER_DAY - band_start, 0,
+                                                                   band_length)
+
+    def _block_cents_array(self, rate: np.ndarray, entry_minute: np.ndarray, start, end: np.ndarray) -> np.ndarray:
+        cents = (rate * self._weighted_minutes_array(entry_minute + start, entry_minute + end) + 3000) // 6000
+        return cents if self._cap_cents is None else np.minimum(cents, self._cap_cents)
+
+    def fee_cents_array(self, minutes: Sequence[int], floors: Sequence[int], entry_minutes: Optional[Sequence[int]] = None,
+                        countries: Optional[Sequence[Optional[str]]] = None) -> np.ndarray:
+        minutes = np.asarray(minutes, dtype=np.int64)
+        floors = np.asarray(floors, dtype=np.int64)
+        if minutes.shape != floors.shape:
+            raise ValueError("Minutes and floors must have the same length")
+        entry_minutes = (np.zeros_like(minutes) if entry_minutes is None
+                         else np.asarray(entry_minutes, dtype=np.int64))
+        if minutes.size == 0:
+            return np.zeros(0, dtype=np.int64)
+        if (minutes < 0).any():
+            raise ValueError("Time can't be negative")
+        known = (floors >= 0) & (floors < len(self._rate_table))
+        rate = np.where(known, self._rate_table[np.where(known, floors, 0)], -1)
+        if (rate < 0).any():
+            raise ValueError(f"Floor {int(floors[rate < 0][0])} not in price list")
+
+        blocks = -(-minutes // MINUTES_PER_DAY)
+        total = self._block_cents_array(rate, entry_minutes, self.grace_minutes, np.minimum(minutes, MINUTES_PER_DAY))
+        last_block = self._block_cents_array(rate, entry_minutes, (blocks - 1) * MINUTES_PER_DAY, minutes)
+        total += np.where(blocks >= 2, (blocks - 2) * self._full_day_table[floors] + last_block, 0)
+        total = np.where(minutes > self.grace_minutes, total, 0)
+        return (total * self._surcharge_array(countries, minutes.shape) + 50) // 100
+
+    def _surcharge_array(self, countries: Optional[Sequence[Optional[str]]], shape: Tuple[int, ...]) -> np.ndarray:
+        if countries is None or not self._surcharge_percent:
+            return np.full(shape, 100, dtype=np.int64)
+        unique, inverse = np.unique(np.asarray(countries, dtype=object).astype(str), return_inverse=True)
+        percents = np.array([self._surcharge_percent.get(country, 100) for country in unique], dtype=np.int64)
+        return percents[inverse].reshape(shape)
+
+    def fees(self, minutes: Sequence[int], floors: Sequence[int], entry_minutes: Optional[Sequence[int]] = None,
+             countries: Optional[Sequence[Optional[str]]] = None) -> np.ndarray:
+        return self.fee_cents_array(minutes, floors, entry_minutes, countries) / 100
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "grace_minutes": self.grace_minutes,
+            "bands": [{"start_minute": b.start_minute, "end_minute": b.end_minute, "multiplier": b.multiplier}
+                      for b in self.bands],
+            "daily_cap": self.daily_cap,
+            "country_surcharges": dict(self.country_surcharges),
+        }
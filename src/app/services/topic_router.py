@@ -0,0 +1,50 @@
+from typing import Callable, Dict, List, Optional, Tuple
+
+Handler = Callable[..., None]
+
+
+def topic_matches(pattern: str, topic: str) -> bool:
+    pattern_levels = pattern.split("/")
+    topic_levels = topic.split("/")
+    for i, level in enumerate(pattern_levels):
+        if level == "#":
+            return i == len(pattern_levels) - 1
+        if i >= len(topic_levels):
+            return False
+        if level != "+" and level != topic_levels[i]:
+            return False
+    return len(pattern_levels) == len(topic_levels)
+
+
+class TopicRouter:
+    def __init__(self):
+        self._exact: Dict[str, Handler] = {}
+        self._wildcards: List[Tuple[str, Handler]] = []
+
+    def add(self, pattern: str, handler: Handler) -> None:
+        levels = pattern.split("/")
+        if "#" in levels[:-1] or any(("+" in level or "#" in level) and len(level) > 1 for level in levels):
+            raise ValueError(f"Invalid topic pattern {pattern}")
+        if "+" in levels or "#" in levels:
+            self._wildcards.append((pattern, handler))
+        else:
+            self._exact[pattern] = handler
+
+    def route(self, pattern: str) -> Callable[[Handler], Handler]:
+        def decorator(handler: Handler) -> Handler:
+            self.add(pattern, handler)
+            return handler
+        return decorator
+
+    def resolve(self, topic: str) -> Optional[Handler]:
+        handler = self._exact.get(topic)
+        if handler is not None:
+            return handler
+        for pattern, candidate in self._wildcards:
+            if topic_matches(pattern, topic):
+                return candidate
+        return None
+
+    @property
+    def subscriptions(self) -> List[str]:
+        return list(self._exact) + [pattern for pattern, _ in self._wildcards]
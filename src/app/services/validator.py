@@ -1,10 +1,10 @@
-from typing import List
+from typing import Iterable
 
 
 class VehicleValidator:
-    def __init__(self, basic_letters: List[str], special_letters: List[str]):
-        self.basic_letters = basic_letters
-        self.special_letters = special_letters
+    def __init__(self, basic_letters: Iterable[str], special_letters: Iterable[str]):
+        self.basic_letters = frozenset(basic_letters)
+        self.special_letters = frozenset(special_letters)
 
     def validate(self, country_abbreviation: str, registration_no: str) -> bool:
         if country_abbreviation != "PL":
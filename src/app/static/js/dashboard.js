@@ -7,6 +7,10 @@ const eventsDiv = document.getElementById('events');
 const revenueSpan = document.getElementById('revenue');
 const statusSpan = document.getElementById('status');
 const occupancySpan = document.getElementById('occupancy');
+const floorsSpan = document.getElementById('floors');
+
+const activeVehicles = new Map();
+let occupancyVersion = null;
 
 async function handleLogin() {
     const user = document.getElementById('username').value;
@@ -67,45 +71,99 @@ function initWebSocket() {
         const data = JSON.parse(event.data);
         console.log("WS Data:", data);
 
-        let message = "";
-        const time = new Date().toLocaleTimeString();
-
-        switch(data.type) {
-            case "VEHICLE_ENTRY":
-                message = `<p class="entry">[${time}] <b>${data.reg_no}</b> entered. Floor ${data.floor}, Spot ${data.spot}</p>`;
-                occupancySpan.innerText = parseInt(occupancySpan.innerText) + 1;
-                listActiveVehicles();
-                break;
-            case "VEHICLE_UPDATED":
-                message = `<p class="exit">[${time}] <b>${data.reg_no}</b> moved to Floor ${data.floor}</p>`;
-                listActiveVehicles();
-                break;
-            case "VEHICLE_EXIT":
-                message = `<p class="exit">[${time}] <b>${data.reg_no}</b> exited.</p>`;
-                let current = parseInt(occupancySpan.innerText);
-                occupancySpan.innerText = current > 0 ? current - 1 : 0;
-                listActiveVehicles();
-                break;
-            case "PAYMENT_SUCCESS":
-                message = `<p class="payment">[${time}] Paid: <b>${data.reg_no}</b> (+${data.amount} PLN)</p>`;
-                revenueSpan.innerText = (parseFloat(revenueSpan.innerText) + data.amount).toFixed(2) + " PLN";
-                listActiveVehicles();
-                break;
-            case "EMERGENCY_STATUS":
-                statusSpan.innerText = data.is_locked ? "LOCKED" : "OPEN";
-                document.body.style.backgroundColor = data.is_locked ? "#fee2e2" : "#f3f4f6";
-                message = `<p class="emergency">[${time}] ${data.msg}</p>`;
-                break;
+        if (data.type === "BATCH") {
+            data.events.forEach(handleEvent);
+        } else {
+            handleEvent(data);
         }
-        if(message) eventsDiv.innerHTML = message + eventsDiv.innerHTML;
     };
 
     socket.onclose = () => {
         console.log("WebSocket disconnected");
         socket = null;
+        occupancyVersion = null;
     };
 }
 
+function handleEvent(data) {
+    let message = "";
+    const time = new Date().toLocaleTimeString();
+
+    switch(data.type) {
+        case "OCCUPANCY_SNAPSHOT":
+            renderOccupancy(data);
+            break;
+        case "OCCUPANCY_DELTA":
+            applyOccupancyDelta(data);
+            break;
+        case "VEHICLE_ENTRY":
+            message = `<p class="entry">[${time}] <b>${data.reg_no}</b> entered. Floor ${data.floor}, Spot ${data.spot}</p>`;
+            activeVehicles.set(vehicleKey(data.country, data.reg_no), {
+                country: data.country, reg_no: data.reg_no, floor: data.floor, spot: data.spot, is_paid: false
+            });
+            renderVehicles();
+            break;
+        case "VEHICLE_UPDATED":
+            message = `<p class="exit">[${time}] <b>${data.reg_no}</b> moved to Floor ${data.floor}</p>`;
+            updateVehicle(data.country, data.reg_no, {floor: data.floor, spot: data.spot});
+            break;
+        case "VEHICLE_EXIT":
+            message = `<p class="exit">[${time}] <b>${data.reg_no}</b> exited.</p>`;
+            activeVehicles.delete(vehicleKey(data.country, data.reg_no));
+            renderVehicles();
+            break;
+        case "PAYMENT_SUCCESS":
+            message = `<p class="payment">[${time}] Paid: <b>${data.reg_no}</b> (+${data.amount} PLN)</p>`;
+            updateVehicle(data.country, data.reg_no, {is_paid: true});
+            break;
+        case "EMERGENCY_STATUS":
+            statusSpan.innerText = data.is_locked ? "LOCKED" : "OPEN";
+            document.body.style.backgroundColor = data.is_locked ? "#fee2e2" : "#f3f4f6";
+            message = `<p class="emergency">[${time}] ${data.msg}</p>`;
+            break;
+    }
+    if(message) eventsDiv.innerHTML = message + eventsDiv.innerHTML;
+}
+
+let floorStats = new Map();
+
+function renderOccupancy(data) {
+    floorStats = new Map(data.floors.map(f => [f.floor, f]));
+    renderTotals(data);
+}
+
+function applyOccupancyDelta(data) {
+    if (occupancyVersion === null || data.base_version > occupancyVersion) {
+        socket.send("snapshot");
+        return;
+    }
+    if (data.version <= occupancyVersion) return;
+    data.floors.forEach(f => floorStats.set(f.floor, f));
+    renderTotals(data);
+}
+
+function renderTotals(data) {
+    occupancyVersion = data.version;
+    occupancySpan.innerText = `${data.occupied} / ${data.capacity}`;
+    revenueSpan.innerText = data.revenue.toFixed(2) + " PLN";
+    floorsSpan.innerText = [...floorStats.values()]
+        .sort((a, b) => a.floor - b.floor)
+        .map(f => `${f.floor}: ${f.free}`)
+        .join("  ");
+}
+
+function vehicleKey(country, reg) {
+    return `${country}/${reg}`;
+}
+
+function updateVehicle(country, reg, changes) {
+    const vehicle = activeVehicles.get(vehicleKey(country, reg));
+    if (vehicle) {
+        Object.assign(vehicle, changes);
+        renderVehicles();
+    }
+}
+
 async function manualEntry() {
     const regInput = document.getElementById('park_reg');
     const countryInput = document.getElementById('park_country');
@@ -176,33 +234,47 @@ async function updateFloor() {
 }
 
 async function listActiveVehicles() {
-    const res = await fetch('/vehicles');
-    const vehicles = await res.json();
-
-    const tbody = document.querySelector("#vehicles-table tbody");
-    tbody.innerHTML = "";
-
-    vehicles.forEach(v => {
-        const isPaid = v.is_paid;
-        const reg = v.vehicle.registration_no;
-        const country = v.vehicle.country;
-
-        let actionBtn = "";
-        if (!isPaid) {
-            actionBtn = `<button onclick="payForVehicle('${country}', '${reg}')" class="btn-warning" style="padding:2px 5px; font-size:12px;">Pay Now</button>`;
-        } else {
-            actionBtn = `<span style="color:green; font-weight:bold;">PAID</span>`;
-        }
+    activeVehicles.clear();
+    let url = '/vehicles';
+    while (url) {
+        const res = await fetch(url);
+        const vehicles = await res.json();
+        vehicles.forEach(v => {
+            activeVehicles.set(vehicleKey(v.vehicle.country, v.vehicle.registration_no), {
+                country: v.vehicle.country,
+                reg_no: v.vehicle.registration_no,
+                floor: v.floor,
+                spot: v.spot_number,
+                is_paid: v.is_paid
+            });
+        });
+        const cursor = res.headers.get('X-Next-Cursor');
+        url = cursor ? `/vehicles?cursor=${encodeURIComponent(cursor)}` : null;
+    }
+    renderVehicles();
+}
 
-        const row = `
+let renderPending = false;
+
+function renderVehicles() {
+    if (renderPending) return;
+    renderPending = true;
+    requestAnimationFrame(() => {
+        renderPending = false;
+        const rows = [...activeVehicles.values()].map(v => {
+            const actionBtn = v.is_paid
+                ? `<span style="color:green; font-weight:bold;">PAID</span>`
+                : `<button onclick="payForVehicle('${v.country}', '${v.reg_no}')" class="btn-warning" style="padding:2px 5px; font-size:12px;">Pay Now</button>`;
+            return `
             <tr>
-                <td><b>${reg}</b> (${country})</td>
-                <td>Floor ${v.floor}, Spot ${v.spot_number}</td>
-                <td>${isPaid ? 'Yes' : 'No'}</td>
+                <td><b>${v.reg_no}</b> (${v.country})</td>
+                <td>Floor ${v.floor}, Spot ${v.spot}</td>
+                <td>${v.is_paid ? 'Yes' : 'No'}</td>
                 <td>${actionBtn}</td>
             </tr>
         `;
-        tbody.innerHTML += row;
+        });
+        document.querySelector("#vehicles-table tbody").innerHTML = rows.join("");
     });
 }
 
@@ -1,23 +1,101 @@
+import asyncio
+import json
+import os
+from collections import deque
 from fastapi import WebSocket
-from typing import List
+from typing import Deque, Dict, List, Optional, Tuple
+
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", "100"))
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))
+WS_MAX_DROPPED = int(os.getenv("WS_MAX_DROPPED", "500"))
+
+
+class ClientChannel:
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue_size = queue_size
+        self.pending: Deque[Tuple[Optional[str], str]] = deque()
+        self.ready = asyncio.Event()
+        self.dropped = 0
+        self.task: Optional[asyncio.Task] = None
+
+    def push(self, text: str, coalesce_key: Optional[str] = None) -> None:
+        if coalesce_key is not None:
+            for i, (key, _) in enumerate(self.pending):
+                if key == coalesce_key:
+                    self.pending[i] = (coalesce_key, text)
+                    return
+        if len(self.pending) >= self.queue_size:
+            self.pending.popleft()
+            self.dropped += 1
+        self.pending.append((coalesce_key, text))
+        self.ready.set()
+
 
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    def __init__(self, queue_size: int = WS_QUEUE_SIZE, send_timeout: float = WS_SEND_TIMEOUT,
+                 max_dropped: int = WS_MAX_DROPPED):
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.max_dropped = max_dropped
+        self.clients: Dict[WebSocket, ClientChannel] = {}
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self.clients)
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        channel = ClientChannel(websocket, self.queue_size)
+        self.clients[websocket] = channel
+        channel.task = asyncio.create_task(self._write(channel))
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        channel = self.clients.pop(websocket, None)
+        if channel is not None and channel.task is not None:
+            channel.task.cancel()
+
+    def publish(self, message: dict, coalesce_key: Optional[str] = None):
+        text = json.dumps(message, default=str)
+        for channel in list(self.clients.values()):
+            channel.push(text, coalesce_key)
+            if channel.dropped > self.max_dropped:
+                self._evict(channel)
+
+    async def broadcast(self, message: dict, coalesce_key: Optional[str] = None):
+        self.publish(message, coalesce_key)
+
+    def send_to(self, websocket: WebSocket, message: dict, coalesce_key: Optional[str] = None):
+        channel = self.clients.get(websocket)
+        if channel is not None:
+            channel.push(json.dumps(message, default=str), coalesce_key)
+
+    async def _write(self, channel: ClientChannel):
+        try:
+            while True:
+                while not channel.pending:
+                    channel.ready.clear()
+                    await channel.ready.wait()
+                _, text = channel.pending.popleft()
+                await asyncio.wait_for(channel.websocket.send_text(text), self.send_timeout)
+                channel.dropped = 0
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._evict(channel)
+
+    def _evict(self, channel: ClientChannel):
+        if self.clients.get(channel.websocket) is not channel:
+            return
+        self.disconnect(channel.websocket)
+        asyncio.ensure_future(self._close(channel.websocket))
+
+    @staticmethod
+    async def _close(websocket: WebSocket):
+        try:
+            await websocket.close()
+        except Exception:
+            pass
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception:
-                continue
 
-ws_manager = ConnectionManager()
\ No newline at end of file
+ws_manager = ConnectionManager()
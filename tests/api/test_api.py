@@ -104,4 +104,9 @@ def test_get_history():
     response = requests.get(f"{BASE_URL}/entry/history")
     assert response.status_code == 200
     history = response.json()
-    assert any(h['vehicle']['registration_no'] == reg_no for h in history)
\ No newline at end of file
+    assert any(h['vehicle']['registration_no'] == reg_no for h in history)
+
+def test_get_vehicles_list_invalid_cursor():
+    response = requests.get(f"{BASE_URL}/vehicles", params={"cursor": "WyJ4Il0"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,215 @@
+import json
+import os
+import platform
+import tempfile
+import time
+import warnings
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from src.app.models.base import Base
+from src.app.models.parking import Vehicle, ActiveParking, ParkingHistory
+from src.app.services.search import NgramIndex
+from src.app.services.spot_index import FLOORS, SPOTS_PER_FLOOR
+
+PERF_DATABASE_URL = os.getenv("PERF_DATABASE_URL", "")
+PERF_SAMPLES = int(os.getenv("PERF_SAMPLES", "100"))
+PERF_WARMUP = int(os.getenv("PERF_WARMUP", "5"))
+PERF_ROUNDS = PERF_WARMUP + PERF_SAMPLES
+PERF_RESULTS_FILE = os.getenv("PERF_RESULTS_FILE", "perf-results.json")
+PERF_BASELINE_FILE = os.getenv("PERF_BASELINE_FILE", os.path.join(os.path.dirname(__file__), "baseline.json"))
+PERF_REGRESSION_THRESHOLD = float(os.getenv("PERF_REGRESSION_THRESHOLD", "0.5"))
+PERF_NOISE_FLOOR_MS = float(os.getenv("PERF_NOISE_FLOOR_MS", "1.0"))
+PERF_UPDATE_BASELINE = os.getenv("PERF_UPDATE_BASELINE", "false").lower() in ("1", "true", "yes")
+PERF_COMPARE = os.getenv("PERF_COMPARE", "false").lower() in ("1", "true", "yes")
+
+FILL_LEVELS = {"empty": 0.0, "half": 0.5, "full99": 0.99}
+HISTORY_SIZES = {"history1k": 1_000, "history50k": 50_000}
+CAPACITY = len(FLOORS) * SPOTS_PER_FLOOR
+START = datetime(2026, 1, 5, 8)
+
+
+def summarize(samples, operations):
+    latencies = np.array(samples) * 1000
+    return {
+        "samples": len(samples),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+        "mean_ms": round(float(latencies.mean()), 3),
+        "throughput": round(operations / float(np.sum(samples)), 1),
+    }
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": f"{platform.system()}-{platform.machine()}",
+        "database": PERF_DATABASE_URL.split(":", 1)[0] or "sqlite",
+    }
+
+
+def load_baseline(path=PERF_BASELINE_FILE):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        baseline = json.load(f)
+    current = environment()
+    if any(baseline.get(key) != value for key, value in current.items()):
+        return {}
+    return baseline.get("cases", {})
+
+
+def regressions(case, result, baseline, threshold=PERF_REGRESSION_THRESHOLD, noise_floor_ms=PERF_NOISE_FLOOR_MS):
+    reference = baseline.get(case)
+    if reference is None:
+        return []
+    found = []
+    for metric in ("p50_ms", "p95_ms"):
+        limit = max(reference[metric] * (1 + threshold), reference[metric] + noise_floor_ms)
+        if result[metric] > limit:
+            found.append(f"{case} {metric} {result[metric]} > {round(limit, 3)} (baseline {reference[metric]})")
+    return found
+
+
+class Benchmark:
+    def __init__(self, results, baseline, compare=PERF_COMPARE, warmup=PERF_WARMUP):
+        self.results = results
+        self.baseline = baseline
+        self.compare = compare
+        self.warmup = warmup
+        self.runs = defaultdict(int)
+        self.samples = defaultdict(list)
+        self.operations = defaultdict(int)
+
+    @contextmanager
+    def measure(self, case, operations=1):
+        started = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - started
+        self.runs[case] += 1
+        if self.runs[case] > self.warmup:
+            self.samples[case].append(elapsed)
+            self.operations[case] += operations
+
+    def check(self):
+        found = []
+        for case, samples in self.samples.items():
+            result = summarize(samples, self.operations[case])
+            self.results[case] = result
+            found += regressions(case, result, self.baseline)
+        if not self.compare:
+            for regression in found:
+                warnings.warn(f"Performance regression: {regression}")
+            return
+        assert not found, "Performance regressions:\n" + "\n".join(found)
+
+
+@pytest.fixture(scope="session")
+def perf_results():
+    results = {}
+    yield results
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        **environment(),
+        "samples": PERF_SAMPLES,
+        "warmup": PERF_WARMUP,
+        "cases": dict(sorted(results.items())),
+    }
+    with open(PERF_RESULTS_FILE, "w") as f:
+        json.dump(report, f, indent=2)
+    if PERF_UPDATE_BASELINE:
+        with open(PERF_BASELINE_FILE, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+@pytest.fixture
+def benchmark(perf_results):
+    return Benchmark(perf_results, {} if PERF_UPDATE_BASELINE else load_baseline())
+
+
+@pytest.fixture(scope="session")
+def perf_engine():
+    path = None
+    url = PERF_DATABASE_URL
+    if not url:
+        fd, path = tempfile.mkstemp(prefix="perf-", suffix=".db")
+        os.close(fd)
+        url = f"sqlite:///{path}"
+    engine = create_engine(url, connect_args={"check_same_thread": False} if url.startswith("sqlite") else {})
+    yield engine
+    engine.dispose()
+    if path is not None:
+        os.remove(path)
+
+
+@pytest.fixture(scope="session")
+def perf_session_factory(perf_engine):
+    return sessionmaker(bind=perf_engine)
+
+
+@pytest.fixture(scope="session")
+def client(perf_session_factory):
+    from src.app import main
+
+    def override_get_db():
+        db = perf_session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    main.app.dependency_overrides[main.get_db] = override_get_db
+    yield TestClient(main.app)
+    main.app.dependency_overrides.pop(main.get_db, None)
+
+
+def plate(n, prefix="GD"):
+    letters = "BCDEFGKLNPRSTWZ"
+    return f"{prefix}{letters[n % 15]}{n // 15 % 900 + 100}{letters[n // 13500 % 15]}"
+
+
+@pytest.fixture
+def lot(perf_engine, perf_session_factory):
+    from src.app.services.search import vehicle_search
+    from src.app.services.spot_index import spot_index
+
+    def build(fill=0.0, history=0):
+        Base.metadata.drop_all(bind=perf_engine)
+        Base.metadata.create_all(bind=perf_engine)
+        parked = int(CAPACITY * fill)
+        history_vehicles = min(history, 5_000)
+        vehicles = [{"id": i + 1, "country": "PL", "registration_no": plate(i, "GA")}
+                    for i in range(history_vehicles)]
+        vehicles += [{"id": history_vehicles + i + 1, "country": "PL", "registration_no": plate(i, "GK")}
+                     for i in range(parked)]
+        with perf_engine.begin() as connection:
+            if vehicles:
+                connection.execute(insert(Vehicle), vehicles)
+            if parked:
+                connection.execute(insert(ActiveParking), [
+                    {"vehicle_id": history_vehicles + i + 1, "entry_time": START, "floor": FLOORS[i % len(FLOORS)],
+                     "spot_number": i // len(FLOORS) + 1, "is_paid": False}
+                    for i in range(parked)
+                ])
+            if history:
+                connection.execute(insert(ParkingHistory), [
+                    {"vehicle_id": i % history_vehicles + 1, "entry_time": START - timedelta(minutes=3 * i + 90),
+                     "exit_time": START - timedelta(minutes=3 * i), "floor": i % len(FLOORS), "fee": 6.0}
+                    for i in range(history)
+                ])
+
+        db = perf_session_factory()
+        try:
+            spot_index.reconcile(db)
+        finally:
+            db.close()
+        vehicle_search.ngram_index = NgramIndex()
+        return parked
+
+    return build
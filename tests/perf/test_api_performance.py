@@ -1,88 +1,82 @@
+import itertools
 import pytest
-import random
-import time
-import uuid
-import os
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker
-from src.app import models
-
-
-PERF_DB_FILE = "perf_stability_test.db"
-SQLALCHEMY_DATABASE_URL = f"sqlite:///{PERF_DB_FILE}"
-engine_test = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-TestingSessionLocal = sessionmaker(bind=engine_test)
-
-from src.app.main import app, get_db
-from src.app.models.base import Base
-
-def override_get_db():
-    db = TestingSessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-app.dependency_overrides[get_db] = override_get_db
-
-class TestPerformance:
-    @pytest.fixture(scope="class", autouse=True)
-    def setup_db(self):
-        Base.metadata.create_all(bind=engine_test)
-        yield
-        Base.metadata.drop_all(bind=engine_test)
-        engine_test.dispose()
-        if os.path.exists(PERF_DB_FILE):
-            os.remove(PERF_DB_FILE)
-
-    @pytest.fixture
-    def client(self):
-        def override_get_db():
-            db = TestingSessionLocal()
-            try:
-                yield db
-            finally:
-                db.close()
-
-        app.dependency_overrides[get_db] = override_get_db
-        return TestClient(app)
-
-    def test_parking_entry_performance(self, client):
-        for _ in range(1000):
-            unique_id = str(uuid.uuid4()).upper()[:7]
-            reg_no = f"G{unique_id}"
-            payload = {
-                "country": "PL",
-                "registration_no": reg_no,
-                "floor": random.randint(0, 4)
-            }
-
-            start = time.perf_counter()
-            response = client.post("/entry", json=payload)
-            end = time.perf_counter()
+from src.app.services.spot_index import FLOORS, spot_index
+from tests.perf.conftest import FILL_LEVELS, HISTORY_SIZES, PERF_ROUNDS, plate
 
+fill_levels = pytest.mark.parametrize("fill", FILL_LEVELS.values(), ids=FILL_LEVELS.keys())
+history_sizes = pytest.mark.parametrize("history", HISTORY_SIZES.values(), ids=HISTORY_SIZES.keys())
+plates = itertools.count()
+
+
+def case(name, fill=None, history=None):
+    params = [f"fill={fill:.0%}"] if fill is not None else []
+    params += [f"history={history}"] if history is not None else []
+    return f"{name}[{','.join(params)}]"
+
+
+def other_free_floor(floor):
+    return next((f for f in FLOORS if f != floor and spot_index.free_count(f)), None)
+
+
+class TestApiPerformance:
+    @fill_levels
+    @history_sizes
+    def test_vehicle_lifecycle(self, client, lot, benchmark, fill, history):
+        lot(fill, history)
+
+        for _ in range(PERF_ROUNDS):
+            reg_no = plate(next(plates))
+            with benchmark.measure(case("entry", fill, history)):
+                response = client.post("/entry", json={"country": "PL", "registration_no": reg_no, "floor": 2})
             assert response.status_code == 201
-            assert (end - start) < 0.5
-
-    def test_mass_payment_and_exit_performance(self, client):
-        registrations = []
-        for _ in range(100):
-            unique_id = str(uuid.uuid4()).upper()[:7]
-            reg_no = f"X{unique_id}"
-            res = client.post("/entry", json={"country": "PL", "registration_no": reg_no, "floor": 0})
-            if res.status_code == 201:
-                registrations.append(reg_no)
-
-        for reg in registrations:
-            start_pay = time.perf_counter()
-            pay_resp = client.post(f"/payment/PL/{reg}", json={"amount": 100.0})
-            end_pay = time.perf_counter()
-            assert pay_resp.status_code == 200
-            assert (end_pay - start_pay) < 0.5
-
-            start_exit = time.perf_counter()
-            exit_resp = client.delete(f"/entry/PL/{reg}")
-            end_exit = time.perf_counter()
-            assert exit_resp.status_code == 200
-            assert (end_exit - start_exit) < 0.5
\ No newline at end of file
+            floor = response.json()["status"]["floor"]
+
+            with benchmark.measure(case("payment", fill, history)):
+                response = client.post(f"/payment/PL/{reg_no}", json={"amount": 100.0})
+            assert response.status_code == 200
+
+            new_floor = other_free_floor(floor)
+            if new_floor is not None:
+                with benchmark.measure(case("floor_change", fill, history)):
+                    response = client.patch(f"/entry/PL/{reg_no}", json={"new_floor": new_floor})
+                assert response.status_code == 200
+
+            with benchmark.measure(case("exit", fill, history)):
+                response = client.delete(f"/entry/PL/{reg_no}")
+            assert response.status_code == 200
+
+        benchmark.check()
+
+    @fill_levels
+    def test_search(self, client, lot, benchmark, fill):
+        lot(fill, HISTORY_SIZES["history1k"])
+        client.get("/vehicles/search", params={"q": "GK"})
+
+        for i in range(PERF_ROUNDS):
+            with benchmark.measure(case("search_prefix", fill)):
+                response = client.get("/vehicles/search", params={"q": plate(i, "GK")[:4], "mode": "prefix"})
+            assert response.status_code == 200
+
+            with benchmark.measure(case("search_contains", fill)):
+                response = client.get("/vehicles/search", params={"q": str(100 + i % 900)})
+            assert response.status_code == 200
+
+        benchmark.check()
+
+    @history_sizes
+    def test_history_listing(self, client, lot, benchmark, history):
+        lot(0.5, history)
+
+        cursor = None
+        for _ in range(PERF_ROUNDS):
+            with benchmark.measure(case("history_page", history=history)):
+                response = client.get("/entry/history", params={"limit": 50, "cursor": cursor} if cursor
+                                      else {"limit": 50})
+            assert response.status_code == 200
+            cursor = response.headers.get("X-Next-Cursor")
+
+            with benchmark.measure(case("history_floor_filter", history=history)):
+                response = client.get("/entry/history", params={"limit": 50, "floor": 3})
+            assert response.status_code == 200
+
+        benchmark.check()
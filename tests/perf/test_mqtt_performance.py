@@ -0,0 +1,37 @@
+import itertools
+from types import SimpleNamespace
+import pytest
+from src.app.services.mqtt_service import MQTTService, MQTTEvent
+from src.app.services.recorder import TrafficRecorder
+from src.app.services.spot_index import spot_index
+from tests.perf.conftest import FILL_LEVELS, PERF_ROUNDS, plate
+from tests.perf.test_api_performance import case
+
+BATCH_VEHICLES = 16
+plates = itertools.count()
+
+
+def lifecycle_batch(count):
+    reg_nos = [plate(next(plates), "GW") for _ in range(count)]
+    return (
+        [MQTTEvent("parking/entrance/camera", {"country": "PL", "registration_no": r, "floor": 1}) for r in reg_nos]
+        + [MQTTEvent("parking/parking_meter/pay", {"country": "PL", "registration_no": r}) for r in reg_nos]
+        + [MQTTEvent("parking/exit/camera", {"country": "PL", "registration_no": r}) for r in reg_nos]
+    )
+
+
+class TestMqttPerformance:
+    @pytest.mark.parametrize("fill", FILL_LEVELS.values(), ids=FILL_LEVELS.keys())
+    def test_ingestion(self, lot, perf_session_factory, benchmark, fill):
+        parked = lot(fill, 1_000)
+        service = MQTTService(session_factory=perf_session_factory, spot_index=spot_index,
+                              recorder=TrafficRecorder())
+        service.client = SimpleNamespace(publish=lambda *args, **kwargs: None, ack=lambda *args, **kwargs: None)
+        vehicles = min(BATCH_VEHICLES, len(spot_index.floors) * spot_index.spots_per_floor - parked)
+
+        for _ in range(PERF_ROUNDS):
+            events = lifecycle_batch(vehicles)
+            with benchmark.measure(case("mqtt_batch", fill), operations=len(events)):
+                service.process_batch(events)
+
+        benchmark.check()
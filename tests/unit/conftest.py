@@ -1,10 +1,12 @@
 import pytest
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from src.app.models.base import Base
 from src.app.services.pricing import PriceCalculator
 from src.app.services.validator import VehicleValidator
 from src.app.services.parking_manager import ParkingManager
+from src.app.services.spot_index import SpotIndex
 
 
 @pytest.fixture
@@ -47,5 +49,42 @@ def vehicle_validator(basic_letters, special_letters):
 
 
 @pytest.fixture
-def parking_manager(db_session, price_calculator, vehicle_validator):
-    return ParkingManager(db_session, price_calculator, vehicle_validator)
\ No newline at end of file
+def spot_index():
+    return SpotIndex()
+
+
+@pytest.fixture
+def parking_manager(db_session, price_calculator, vehicle_validator, spot_index):
+    return ParkingManager(db_session, price_calculator, vehicle_validator, spot_index)
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+
+    def on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def on_commit(self, conn):
+        self.commits += 1
+
+    @contextmanager
+    def budget(self, statements: int, commits: int = 1):
+        self.statements.clear()
+        self.commits = 0
+        yield self
+        listing = "\n".join(self.statements)
+        assert len(self.statements) <= statements, f"{len(self.statements)} statements over budget of {statements}:\n{listing}"
+        assert self.commits <= commits, f"{self.commits} commits over budget of {commits}"
+
+
+@pytest.fixture
+def query_counter(db_session):
+    counter = QueryCounter()
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", counter.on_execute)
+    event.listen(engine, "commit", counter.on_commit)
+    yield counter
+    event.remove(engine, "before_cursor_execute", counter.on_execute)
+    event.remove(engine, "commit", counter.on_commit)
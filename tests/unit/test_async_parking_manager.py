@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from src.app.models.base import Base
+from src.app.services.parking_manager import AsyncParkingManager
+from src.app.database import to_async_url
+
+pytest.importorskip("aiosqlite")
+
+
+def run_with_manager(scenario, price_calculator, vehicle_validator, spot_index):
+    async def runner():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        try:
+            async with async_sessionmaker(engine)() as session:
+                manager = AsyncParkingManager(session, price_calculator, vehicle_validator, spot_index)
+                return await scenario(manager)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(runner())
+
+
+class TestAsyncParkingManager:
+    def test_full_cycle(self, price_calculator, vehicle_validator, spot_index):
+        async def scenario(manager):
+            entry = await manager.register_entry("PL", "GD5P227", 2)
+            moved = await manager.change_vehicle_floor("PL", "GD5P227", 3)
+            info = await manager.get_payment_info("PL", "GD5P227")
+            await manager.pay_parking_fee("PL", "GD5P227", info["fee"])
+            exit_result = await manager.register_exit("PL", "GD5P227")
+            return entry, moved, exit_result
+
+        entry, moved, exit_result = run_with_manager(scenario, price_calculator, vehicle_validator, spot_index)
+
+        assert (entry["floor"], entry["spot"]) == (2, 1)
+        assert moved["new_floor"] == 3
+        assert (exit_result["floor"], exit_result["spot"]) == (3, 1)
+        assert spot_index.is_free(3, 1)
+
+    def test_errors_propagate(self, price_calculator, vehicle_validator, spot_index):
+        async def scenario(manager):
+            await manager.register_exit("PL", "GD5P227")
+
+        with pytest.raises(ValueError):
+            run_with_manager(scenario, price_calculator, vehicle_validator, spot_index)
+
+    def test_sync_managers_run_off_the_event_loop(self):
+        from src.app.main import resolve
+
+        def blocking(country, registration_no):
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return "threadpool"
+            return "event loop"
+
+        async def awaitable(country, registration_no):
+            return "awaited"
+
+        assert asyncio.run(resolve(blocking, "PL", "GD5P227")) == "threadpool"
+        assert asyncio.run(resolve(awaitable, "PL", "GD5P227")) == "awaited"
+
+    def test_async_url(self):
+        assert to_async_url("postgresql://u:p@db/parking") == "postgresql+asyncpg://u:p@db/parking"
+        assert to_async_url("sqlite:///parking.db") == "sqlite+aiosqlite:///parking.db"
+        with pytest.raises(ValueError):
+            to_async_url("mysql://u:p@db/parking")
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta
+from sqlalchemy import delete
+from src.app.models.parking import Vehicle, ActiveParking, ParkingHistory
+from src.app.services.occupancy import OccupancyTracker
+
+
+def plates(n, start=0):
+    return [f"GD5P{i:03d}" for i in range(start, start + n)]
+
+
+class TestBatchOperations:
+    def test_entries_allocate_spots_in_one_transaction(self, parking_manager, db_session, query_counter):
+        parking_manager.spot_index.ensure_seeded(db_session)
+        items = [("PL", reg_no, 2) for reg_no in plates(60)]
+
+        with query_counter.budget(statements=3):
+            results = parking_manager.register_entries(items)
+
+        assert all(result["status"] for result in results)
+        assert [r["floor"] for r in results[:50]] == [2] * 50
+        assert {r["floor"] for r in results[50:]} == {0}
+        assert len({(r["floor"], r["spot"]) for r in results}) == 60
+        assert db_session.query(ActiveParking).count() == 60
+
+    def test_entries_report_per_item_errors(self, parking_manager, db_session):
+        parking_manager.register_entry("PL", "GD00001", 0)
+
+        results = parking_manager.register_entries([
+            ("PL", "GD5P227", 0),
+            ("PL", "GD1", 0),
+            ("PL", "GD00001", 1),
+            ("PL", "GD5P227", 1),
+            ("PL", "GD5P228", 7),
+        ])
+
+        assert results[0] == {"floor": 0, "spot": 2, "status": True}
+        assert [r["detail"] for r in results[1:]] == [
+            "Invalid registration number",
+            "Vehicle already in the parking",
+            "Vehicle already in the parking",
+            "Floor 7 is not available",
+        ]
+        assert db_session.query(Vehicle).count() == 2
+
+    def test_entries_skip_spots_taken_behind_the_index(self, parking_manager, db_session):
+        parking_manager.spot_index.ensure_seeded(db_session)
+        vehicle = Vehicle(country="PL", registration_no="GD00001")
+        db_session.add(vehicle)
+        db_session.flush()
+        db_session.add(ActiveParking(vehicle_id=vehicle.id, floor=0, spot_number=1, entry_time=datetime.now()))
+        db_session.commit()
+
+        results = parking_manager.register_entries([("PL", "GD5P227", 0), ("PL", "GD5P228", 0)])
+
+        assert {(r["floor"], r["spot"]) for r in results} == {(0, 2), (0, 3)}
+        assert not parking_manager.spot_index.is_free(0, 1)
+
+    def test_entries_when_full(self, parking_manager, db_session):
+        results = parking_manager.register_entries([("PL", reg_no, 0) for reg_no in plates(252)])
+
+        assert sum(r["status"] for r in results) == 250
+        assert results[-1] == {"status": False, "detail": "Parking is completely full"}
+
+    def test_payments_and_exits(self, parking_manager, db_session, query_counter, mocker):
+        now = datetime(2026, 1, 1, 12, 0, 0)
+        mock_datetime = mocker.patch('src.app.services.parking_manager.datetime')
+        mock_datetime.now.return_value = now - timedelta(minutes=90)
+        parking_manager.register_entries([("PL", reg_no, 0) for reg_no in plates(3)])
+        mock_datetime.now.return_value = now
+
+        with query_counter.budget(statements=2):
+            paid = parking_manager.pay_parking_fees([
+                ("PL", "GD5P000", 6.0), ("PL", "GD5P001", 1.0), ("PL", "GD5P002", None), ("UA", "GD5P000", None),
+            ])
+
+        assert [r["status"] for r in paid] == [True, False, True, False]
+        assert paid[1]["detail"] == "Insufficient amount"
+        assert paid[2] == {"status": True, "fee": 6.0, "payment_time": now}
+
+        with query_counter.budget(statements=3):
+            exited = parking_manager.register_exits([("PL", "GD5P000"), ("PL", "GD5P001"), ("PL", "GD5P002")])
+
+        assert exited[0] == {"floor": 0, "spot": 1, "status": True}
+        assert exited[1] == {"status": False, "detail": "Parking fee not paid"}
+        assert exited[2]["status"] is True
+        assert [h.fee for h in db_session.query(ParkingHistory).order_by(ParkingHistory.id)] == [6.0, 6.0]
+        assert parking_manager.spot_index.is_free(0, 1)
+        assert db_session.query(ActiveParking).count() == 1
+
+    def test_payment_skips_vehicle_that_exited_concurrently(self, parking_manager, db_session, mocker):
+        parking_manager.register_entries([("PL", reg_no, 0) for reg_no in plates(2)])
+        find_vehicles = parking_manager._find_vehicles
+
+        def find_then_exit(keys):
+            vehicles = find_vehicles(keys)
+            db_session.execute(delete(ActiveParking).where(ActiveParking.vehicle_id == vehicles[("PL", "GD5P001")].id)
+                               .execution_options(synchronize_session=False))
+            return vehicles
+
+        mocker.patch.object(parking_manager, "_find_vehicles", side_effect=find_then_exit)
+
+        results = parking_manager.pay_parking_fees([("PL", "GD5P000", None), ("PL", "GD5P001", None)])
+
+        assert results[0]["status"] is True
+        assert results[1] == {"status": False, "detail": "Vehicle not found on parking"}
+        assert db_session.query(ActiveParking).one().is_paid is True
+
+    def test_payment_rejects_duplicates_in_one_batch(self, parking_manager):
+        parking_manager.register_entry("PL", "GD5P227", 0)
+
+        results = parking_manager.pay_parking_fees([("PL", "GD5P227", None), ("PL", "GD5P227", None)])
+
+        assert results[0]["status"] is True
+        assert results[1] == {"status": False, "detail": "Duplicate vehicle in batch"}
+
+    def test_exit_rejects_duplicates_in_one_batch(self, parking_manager, db_session):
+        parking_manager.register_entry("PL", "GD5P227", 0)
+        parking_manager.pay_parking_fee("PL", "GD5P227", None)
+
+        results = parking_manager.register_exits([("PL", "GD5P227"), ("PL", "GD5P227")])
+
+        assert [r["status"] for r in results] == [True, False]
+        assert db_session.query(ParkingHistory).count() == 1
+
+    def test_fallback_runs_items_one_by_one(self, parking_manager, db_session, mocker):
+        mocker.patch.object(parking_manager, "_insert_statement", return_value=None)
+
+        results = parking_manager.register_entries([("PL", "GD5P227", 1), ("PL", "GD1", 1)])
+
+        assert results[0] == {"floor": 1, "spot": 1, "status": True}
+        assert results[1]["status"] is False
+        assert db_session.query(ActiveParking).count() == 1
+
+
+class TestBatchEvents:
+    def test_occupancy_applies_batched_events(self):
+        tracker = OccupancyTracker()
+        tracker.apply({"type": "BATCH", "events": [
+            {"type": "VEHICLE_ENTRY", "floor": 1, "spot": 1},
+            {"type": "VEHICLE_ENTRY", "floor": 1, "spot": 2},
+            {"type": "PAYMENT_SUCCESS", "amount": 4.0, "fee": 4.0},
+        ]})
+
+        snapshot = tracker.snapshot()
+        assert snapshot["occupied"] == 2
+        assert snapshot["revenue"] == 4.0
+        assert snapshot["version"] == 3
@@ -0,0 +1,130 @@
+import asyncio
+import os
+import socket
+from sqlalchemy import create_engine
+from src.app.services.cluster import LeaderElection, UnixSocketEventBus, create_event_bus
+from src.app.services.events import EventHub
+from src.app.services.system_state import LOCK_FLAG, get_flag, set_flag
+
+
+class TestLeaderElection:
+    def test_only_one_holder_of_lock_file(self, tmp_path):
+        engine = create_engine("sqlite://")
+        lock_file = str(tmp_path / "mqtt.lock")
+        first = LeaderElection(engine, lock_file=lock_file)
+        second = LeaderElection(engine, lock_file=lock_file)
+
+        assert first.try_acquire() is True
+        assert second.try_acquire() is False
+
+        first.release()
+        assert second.try_acquire() is True
+        second.release()
+
+    def test_no_leader_without_file_locks(self, tmp_path, mocker, capsys):
+        mocker.patch("src.app.services.cluster.fcntl", None)
+        election = LeaderElection(create_engine("sqlite://"), lock_file=str(tmp_path / "mqtt.lock"))
+
+        assert election.try_acquire() is False
+        assert election.try_acquire() is False
+        assert capsys.readouterr().out.count("MQTT leader election unavailable") == 1
+
+    def test_run_starts_and_stops_leader(self, tmp_path):
+        calls = []
+        election = LeaderElection(create_engine("sqlite://"), lock_file=str(tmp_path / "mqtt.lock"))
+
+        async def scenario():
+            task = asyncio.create_task(election.run(lambda: calls.append("elected"),
+                                                    lambda: calls.append("lost"), interval=0.01))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        asyncio.run(scenario())
+
+        assert calls == ["elected", "lost"]
+        assert election.is_leader is False
+
+    def test_failed_startup_is_cleaned_up(self, tmp_path):
+        calls = []
+        election = LeaderElection(create_engine("sqlite://"), lock_file=str(tmp_path / "mqtt.lock"))
+
+        def fail():
+            calls.append("elected")
+            raise OSError("refused")
+
+        async def scenario():
+            task = asyncio.create_task(election.run(fail, lambda: calls.append("lost"), interval=0.01))
+            await asyncio.sleep(0.035)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        asyncio.run(scenario())
+
+        assert calls[:4] == ["elected", "lost", "elected", "lost"]
+        assert election.is_leader is False
+
+
+class TestUnixSocketEventBus:
+    def test_events_reach_other_workers_only(self, tmp_path):
+        received = {"a": [], "b": []}
+
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            a, b = UnixSocketEventBus(str(tmp_path)), UnixSocketEventBus(str(tmp_path))
+            a.start(loop, received["a"].append)
+            b.start(loop, received["b"].append)
+            a.send({"type": "VEHICLE_ENTRY", "floor": 1, "spot": 3})
+            await asyncio.sleep(0.05)
+            a.stop()
+            b.stop()
+
+        asyncio.run(scenario())
+
+        assert received == {"a": [], "b": [{"type": "VEHICLE_ENTRY", "floor": 1, "spot": 3}]}
+        assert os.listdir(tmp_path) == []
+
+    def test_stale_sockets_are_removed(self, tmp_path):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        stale.bind(str(tmp_path / "dead.sock"))
+        stale.close()
+
+        async def scenario():
+            bus = UnixSocketEventBus(str(tmp_path))
+            bus.start(asyncio.get_running_loop(), lambda event: None)
+            bus.send({"type": "VEHICLE_EXIT"})
+            bus.stop()
+
+        asyncio.run(scenario())
+
+        assert not (tmp_path / "dead.sock").exists()
+
+
+class TestEventHubBus:
+    def test_publish_delivers_locally_and_forwards(self, mocker):
+        hub = EventHub()
+        received = []
+        bus = mocker.Mock()
+        hub.subscribe(received.append)
+        hub.attach(bus)
+
+        hub.publish({"type": "PAYMENT_SUCCESS"})
+        hub.deliver({"type": "VEHICLE_EXIT"})
+
+        assert received == [{"type": "PAYMENT_SUCCESS"}, {"type": "VEHICLE_EXIT"}]
+        bus.send.assert_called_once_with({"type": "PAYMENT_SUCCESS"})
+
+    def test_create_event_bus(self):
+        assert create_event_bus("local") is None
+        assert isinstance(create_event_bus("unix"), UnixSocketEventBus)
+
+
+class TestSystemState:
+    def test_lock_flag_round_trip(self, db_session):
+        assert get_flag(db_session, LOCK_FLAG) is False
+
+        set_flag(db_session, LOCK_FLAG, True)
+        assert get_flag(db_session, LOCK_FLAG) is True
+
+        set_flag(db_session, LOCK_FLAG, False)
+        assert get_flag(db_session, LOCK_FLAG) is False
@@ -0,0 +1,56 @@
+import json
+import pytest
+from src.app.config import ParkingConfig, ConfigStore, load_config, parse_prices
+
+
+class TestParkingConfig:
+    def test_defaults(self, monkeypatch):
+        for name in ("PARKING_CONFIG_FILE", "PARKING_PRICES", "PARKING_BASIC_LETTERS", "PARKING_SPECIAL_LETTERS"):
+            monkeypatch.delenv(name, raising=False)
+
+        config = load_config()
+
+        assert dict(config.prices) == {0: 6, 1: 5, 2: 4, 3: 3, 4: 2}
+        assert config.special_letters == frozenset({"H", "U"})
+        assert config.validator.validate("PL", "GD5P227")
+        assert config.price_calculator.calculate_fee(90, 0) == 6.0
+
+    def test_is_immutable(self):
+        config = ParkingConfig.from_dict({})
+        with pytest.raises(AttributeError):
+            config.basic_letters = frozenset()
+        with pytest.raises(TypeError):
+            config.prices[0] = 100
+
+    def test_load_from_file(self, tmp_path, monkeypatch):
+        config_file = tmp_path / "parking.json"
+        config_file.write_text(json.dumps({"prices": {"0": 10, "1": 8}, "basic_letters": ["G"], "special_letters": []}))
+        monkeypatch.setenv("PARKING_CONFIG_FILE", str(config_file))
+
+        config = load_config()
+
+        assert dict(config.prices) == {0: 10, 1: 8}
+        assert config.validator.validate("PL", "GD5P227")
+        assert not config.validator.validate("PL", "WX5P227")
+
+    def test_load_from_env(self, monkeypatch):
+        monkeypatch.delenv("PARKING_CONFIG_FILE", raising=False)
+        monkeypatch.setenv("PARKING_PRICES", "0:7,1:6.5")
+        monkeypatch.setenv("PARKING_SPECIAL_LETTERS", "H")
+
+        config = load_config()
+
+        assert dict(config.prices) == {0: 7.0, 1: 6.5}
+        assert config.special_letters == frozenset({"H"})
+
+    def test_parse_prices(self):
+        assert parse_prices("0:6, 4:2") == {0: 6.0, 4: 2.0}
+
+    def test_reload_swaps_config(self):
+        configs = iter([ParkingConfig.from_dict({}), ParkingConfig.from_dict({"prices": {0: 1}})])
+        store = ConfigStore(loader=lambda: next(configs))
+
+        first = store.current
+        assert store.current is first
+        assert dict(store.reload().prices) == {0: 1}
+        assert store.current is not first
@@ -0,0 +1,96 @@
+import pytest
+from src.app.services.dedup import TTLCache, EventDeduplicator
+from src.app.services.idempotency import IdempotencyStore, IdempotencyConflict, fingerprint
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    def test_entries_expire(self):
+        clock = FakeClock()
+        cache = TTLCache(max_size=10, ttl=5, clock=clock)
+        cache.put("a", 1)
+
+        clock.now = 4.9
+        assert cache.get("a") == 1
+        clock.now = 5.0
+        assert cache.get("a") is None
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(max_size=2, ttl=60, clock=FakeClock())
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+
+    def test_add_keeps_existing_value(self):
+        cache = TTLCache(max_size=10, ttl=60, clock=FakeClock())
+
+        assert cache.add("a", 1) is None
+        assert cache.add("a", 2) == 1
+        assert cache.get("a") == 1
+
+
+class TestEventDeduplicator:
+    def test_event_id_identifies_redelivery(self):
+        dedup = EventDeduplicator(clock=FakeClock())
+        payload = {"event_id": "e-1", "country": "PL", "registration_no": "GD5P227"}
+
+        assert dedup.is_duplicate("parking/entrance/camera", payload, b"first") is False
+        assert dedup.is_duplicate("parking/entrance/camera", payload, b"second") is True
+
+    def test_identical_payloads_deduplicated_within_window(self):
+        clock = FakeClock()
+        dedup = EventDeduplicator(window=2, clock=clock)
+        raw = b'{"country": "PL", "registration_no": "GD5P227"}'
+
+        assert dedup.is_duplicate("parking/parking_meter/pay", {}, raw) is False
+        assert dedup.is_duplicate("parking/parking_meter/pay", {}, raw) is True
+        assert dedup.is_duplicate("parking/exit/camera", {}, raw) is False
+        clock.now = 3
+        assert dedup.is_duplicate("parking/parking_meter/pay", {}, raw) is False
+
+    def test_forgotten_key_accepts_redelivery(self):
+        dedup = EventDeduplicator(clock=FakeClock())
+        payload = {"event_id": "e-1"}
+
+        assert dedup.is_duplicate("parking/entrance/camera", payload, b"") is False
+        dedup.forget(dedup.key("parking/entrance/camera", payload, b"")[0])
+        assert dedup.is_duplicate("parking/entrance/camera", payload, b"") is False
+
+
+class TestIdempotencyStore:
+    def test_replays_completed_response(self):
+        store = IdempotencyStore()
+        key, body = "entry:abc", fingerprint({"registration_no": "GD5P227"})
+
+        assert store.begin(key, body) is None
+        store.complete(key, body, {"status": "ok"})
+
+        assert store.begin(key, body) == {"status": "ok"}
+
+    def test_rejects_in_flight_and_mismatched_requests(self):
+        store = IdempotencyStore()
+        store.begin("entry:abc", fingerprint({"floor": 1}))
+
+        with pytest.raises(IdempotencyConflict, match="in progress"):
+            store.begin("entry:abc", fingerprint({"floor": 1}))
+        with pytest.raises(IdempotencyConflict, match="different request"):
+            store.begin("entry:abc", fingerprint({"floor": 2}))
+
+    def test_abandoned_key_can_be_retried(self):
+        store = IdempotencyStore()
+        store.begin("entry:abc", "f")
+        store.abandon("entry:abc")
+
+        assert store.begin("entry:abc", "f") is None
@@ -0,0 +1,50 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+import pytest
+from src.app.models.parking import Vehicle, ParkingHistory
+from src.app.services.export import history_rows, ndjson_chunks, csv_chunks, gzip_chunks, export_history
+
+
+@pytest.fixture
+def history(db_session):
+    start = datetime(2026, 1, 1, 8, 0, 0)
+    for i in range(5):
+        vehicle = Vehicle(country="PL" if i < 3 else "DE", registration_no=f"GD{i:05d}")
+        db_session.add(vehicle)
+        db_session.flush()
+        db_session.add(ParkingHistory(vehicle_id=vehicle.id, entry_time=start,
+                                      exit_time=start + timedelta(minutes=i), floor=i % 5, fee=i * 1.5))
+    db_session.commit()
+
+
+class TestExport:
+    def test_history_rows_in_exit_order(self, db_session, history):
+        rows = list(history_rows(db_session))
+        assert [r["registration_no"] for r in rows] == [f"GD{i:05d}" for i in range(5)]
+        assert [r["country"] for r in history_rows(db_session, country="DE")] == ["DE", "DE"]
+
+    def test_ndjson_first_row_is_flushed_alone(self, db_session, history):
+        chunks = list(ndjson_chunks(history_rows(db_session), batch_size=2))
+        assert len(chunks) == 3
+        first = json.loads(chunks[0])
+        assert first["registration_no"] == "GD00000"
+        assert first["exit_time"] == "2026-01-01T08:00:00"
+
+    def test_csv_has_header_and_all_rows(self, db_session, history):
+        text = b"".join(csv_chunks(history_rows(db_session), batch_size=2)).decode()
+        rows = list(csv.DictReader(io.StringIO(text)))
+        assert len(rows) == 5
+        assert rows[4]["fee"] == "6.0"
+
+    def test_gzip_roundtrip(self, db_session, history):
+        plain = b"".join(export_history(db_session, "ndjson"))
+        compressed = b"".join(gzip_chunks(ndjson_chunks(history_rows(db_session))))
+        assert gzip.decompress(compressed) == plain
+        assert len(plain.splitlines()) == 5
+
+    def test_unknown_format(self, db_session):
+        with pytest.raises(ValueError):
+            export_history(db_session, "xml")
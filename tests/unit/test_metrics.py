@@ -0,0 +1,91 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from src.app.services.metrics import (MetricsRegistry, MetricsMiddleware, instrument_engine,
+                                      http_requests, http_db_queries, mqtt_errors, mqtt_latency, mqtt_messages)
+from src.app.services.mqtt_service import MQTTService
+
+
+class TestMetricsRegistry:
+    def test_renders_prometheus_text(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("events_total", "Events", ("topic",))
+        histogram = registry.histogram("latency_seconds", "Latency", (), (0.1, 1))
+        registry.gauge("clients", "Clients", lambda: {(): 3})
+        counter.inc('a"b')
+        counter.inc('a"b', amount=2)
+        for value in (0.05, 0.1, 3):
+            histogram.observe(value)
+
+        assert registry.render().splitlines() == [
+            "# HELP events_total Events",
+            "# TYPE events_total counter",
+            'events_total{topic="a\\"b"} 3',
+            "# HELP latency_seconds Latency",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{le="0.1"} 2',
+            'latency_seconds_bucket{le="1"} 2',
+            'latency_seconds_bucket{le="+Inf"} 3',
+            "latency_seconds_sum 3.15",
+            "latency_seconds_count 3",
+            "# HELP clients Clients",
+            "# TYPE clients gauge",
+            "clients 3",
+        ]
+
+    def test_failing_gauge_is_skipped(self):
+        registry = MetricsRegistry()
+        registry.gauge("broken", "Broken", lambda: 1 / 0)
+
+        assert registry.render().splitlines() == ["# HELP broken Broken", "# TYPE broken gauge"]
+
+
+class TestMetricsMiddleware:
+    def test_records_route_status_and_queries(self, db_session):
+        engine = db_session.get_bind()
+        instrument_engine(engine)
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        def item(item_id: int):
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+                connection.execute(text("SELECT 2"))
+            return {"id": item_id}
+
+        app.add_middleware(MetricsMiddleware)
+        client = TestClient(app)
+        before = http_requests.value("/items/{item_id}", "GET", "200")
+        requests = http_db_queries.count("/items/{item_id}", "GET")
+        queries = http_db_queries.total("/items/{item_id}", "GET")
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/missing")
+
+        assert http_requests.value("/items/{item_id}", "GET", "200") == before + 2
+        assert http_requests.value("unmatched", "GET", "404") >= 1
+        assert http_db_queries.count("/items/{item_id}", "GET") == requests + 2
+        assert http_db_queries.total("/items/{item_id}", "GET") == queries + 4
+
+
+class TestMqttMetrics:
+    def test_counts_messages_errors_and_handler_latency(self, db_session, spot_index, mocker):
+        service = MQTTService(session_factory=sessionmaker(bind=db_session.get_bind()), spot_index=spot_index)
+        service.client = mocker.Mock()
+        service.send_to_ws = mocker.Mock()
+        topic = "parking/exit/camera"
+        messages = mqtt_messages.value(topic)
+        invalid = mqtt_errors.value(topic, "invalid_payload")
+        rejected = mqtt_errors.value(topic, "rejected")
+        handled = mqtt_latency.count(topic)
+
+        service.accept(mocker.Mock(topic=topic, payload=b"not json", mid=None, qos=0))
+        event = service.accept(mocker.Mock(topic=topic, payload=b'{"country": "PL", "registration_no": "GD0000X"}',
+                                           mid=None, qos=0))
+        service.process_batch([event])
+
+        assert mqtt_messages.value(topic) == messages + 2
+        assert mqtt_errors.value(topic, "invalid_payload") == invalid + 1
+        assert mqtt_errors.value(topic, "rejected") == rejected + 1
+        assert mqtt_latency.count(topic) == handled + 1
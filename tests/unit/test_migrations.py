@@ -0,0 +1,118 @@
+import pytest
+from sqlalchemy import create_engine, text, inspect
+from sqlalchemy.orm import Session
+from src.app.migrations import MIGRATIONS, MigrationConflict, migrate, current_version
+from src.app.models import Base
+from src.app.models.parking import Vehicle, ActiveParking, ParkingHistory
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE vehicles (id INTEGER PRIMARY KEY, country VARCHAR(3) NOT NULL, "
+    "registration_no VARCHAR(10) NOT NULL UNIQUE)",
+    "CREATE TABLE active_parking (vehicle_id INTEGER PRIMARY KEY REFERENCES vehicles(id), "
+    "entry_time DATETIME NOT NULL, floor INTEGER NOT NULL, spot_number INTEGER NOT NULL, is_paid BOOLEAN, "
+    "payment_time DATETIME, paid_fee FLOAT)",
+    "CREATE TABLE parking_history (id INTEGER PRIMARY KEY, vehicle_id INTEGER NOT NULL REFERENCES vehicles(id), "
+    "entry_time DATETIME NOT NULL, exit_time DATETIME NOT NULL, floor INTEGER NOT NULL, fee FLOAT NOT NULL)",
+]
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+def query_plan(session, query):
+    sql = str(query.statement.compile(session.get_bind(), compile_kwargs={"literal_binds": True}))
+    return " ".join(row[3] for row in session.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+class TestMigrations:
+    def test_fresh_database(self, engine):
+        assert migrate(engine) == [m.version for m in MIGRATIONS]
+        assert migrate(engine) == []
+        with engine.connect() as connection:
+            assert current_version(connection) == MIGRATIONS[-1].version
+
+    def test_upgrades_legacy_schema(self, engine):
+        with engine.begin() as connection:
+            for statement in LEGACY_SCHEMA:
+                connection.execute(text(statement))
+
+        migrate(engine)
+
+        indexes = {
+            table: {index["name"] for index in inspect(engine).get_indexes(table)}
+            for table in ("vehicles", "active_parking", "parking_history")
+        }
+        assert "uq_vehicles_country_registration_no" in indexes["vehicles"]
+        assert "uq_active_parking_floor_spot" in indexes["active_parking"]
+        assert {"ix_parking_history_exit_time_id", "ix_parking_history_vehicle_id_exit_time"} <= indexes["parking_history"]
+
+    def test_fresh_database_matches_models(self, engine):
+        migrate(engine)
+        inspector = inspect(engine)
+
+        for table in Base.metadata.sorted_tables:
+            assert {c["name"] for c in inspector.get_columns(table.name)} == {c.name for c in table.columns}
+            assert {i["name"] for i in inspector.get_indexes(table.name)} == {i.name for i in table.indexes}
+            assert inspector.get_unique_constraints(table.name) == []
+
+    def test_legacy_schema_allows_same_plate_in_two_countries(self, engine):
+        with engine.begin() as connection:
+            for statement in LEGACY_SCHEMA:
+                connection.execute(text(statement))
+            connection.execute(text("INSERT INTO vehicles (id, country, registration_no) VALUES (1, 'PL', 'AB12345')"))
+            connection.execute(text("INSERT INTO active_parking (vehicle_id, entry_time, floor, spot_number) "
+                                    "VALUES (1, '2026-01-05 08:00:00', 0, 1)"))
+
+        migrate(engine)
+
+        with Session(engine) as session:
+            session.add(Vehicle(country="DE", registration_no="AB12345"))
+            session.commit()
+            assert session.query(Vehicle).count() == 2
+            assert session.get(ActiveParking, 1).vehicle.country == "PL"
+
+    def test_legacy_duplicate_spots_abort_with_the_offending_rows(self, engine):
+        with engine.begin() as connection:
+            for statement in LEGACY_SCHEMA:
+                connection.execute(text(statement))
+            for vehicle_id, reg_no, spot in [(1, "GD5P227", 3), (2, "GD5P228", 3), (3, "GD5P229", 4)]:
+                connection.execute(text("INSERT INTO vehicles (id, country, registration_no) VALUES (:id, 'PL', :reg)"),
+                                   {"id": vehicle_id, "reg": reg_no})
+                connection.execute(text("INSERT INTO active_parking (vehicle_id, entry_time, floor, spot_number) "
+                                        "VALUES (:id, '2026-01-05 08:00:00', 1, :spot)"), {"id": vehicle_id, "spot": spot})
+
+        with pytest.raises(MigrationConflict, match=r"active_parking \(floor, spot_number\) = \(1, 3\): vehicle_id 1, 2"):
+            migrate(engine)
+
+        with engine.connect() as connection:
+            assert current_version(connection) == 1
+            assert connection.execute(text("SELECT COUNT(*) FROM active_parking")).scalar() == 3
+        assert "uq_active_parking_floor_spot" not in {i["name"] for i in inspect(engine).get_indexes("active_parking")}
+
+    def test_hot_queries_use_indexes(self, engine):
+        migrate(engine)
+        session = Session(engine)
+
+        vehicle_lookup = session.query(Vehicle).filter_by(registration_no="GD5P227", country="PL")
+        assert "INDEX uq_vehicles_country_registration_no (country=? AND registration_no=?)" in query_plan(session, vehicle_lookup)
+
+        spot_lookup = session.query(ActiveParking.vehicle_id).filter_by(floor=2, spot_number=7)
+        assert "INDEX uq_active_parking_floor_spot (floor=? AND spot_number=?)" in query_plan(session, spot_lookup)
+
+        floor_lookup = session.query(ActiveParking.spot_number).filter_by(floor=2)
+        assert "uq_active_parking_floor_spot (floor=?)" in query_plan(session, floor_lookup)
+
+        history_lookup = (
+            session.query(ParkingHistory).filter_by(vehicle_id=1).order_by(ParkingHistory.exit_time.desc())
+        )
+        plan = query_plan(session, history_lookup)
+        assert "INDEX ix_parking_history_vehicle_id_exit_time (vehicle_id=?)" in plan
+        assert "TEMP B-TREE" not in plan
+
+        history_page = session.query(ParkingHistory).order_by(ParkingHistory.exit_time.desc(), ParkingHistory.id.desc())
+        assert "ix_parking_history_exit_time_id" in query_plan(session, history_page)
+        session.close()
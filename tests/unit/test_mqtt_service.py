@@ -0,0 +1,325 @@
+import asyncio
+import json
+import threading
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.app.models.base import Base
+from sqlalchemy.exc import IntegrityError, OperationalError
+from src.app.models.parking import ActiveParking, ParkingHistory
+from src.app.services.parking_manager import ParkingManager
+from src.app.services.mqtt_service import MQTTService, AsyncMQTTService, MQTTEvent, is_transient
+
+
+@pytest.fixture
+def mqtt_service(db_session, spot_index, mocker):
+    service = MQTTService(session_factory=sessionmaker(bind=db_session.get_bind()), spot_index=spot_index,
+                          batch_size=10, batch_linger=0.01)
+    service.client = mocker.Mock()
+    service.send_to_ws = mocker.Mock()
+    return service
+
+
+def entry(reg_no, floor=0):
+    return MQTTEvent("parking/entrance/camera", {"country": "PL", "registration_no": reg_no, "floor": floor})
+
+
+class TestMQTTService:
+    def test_on_message_only_enqueues(self, mqtt_service, mocker):
+        msg = mocker.Mock(topic="parking/entrance/camera", mid=1, qos=1,
+                          payload=b'{"country": "PL", "registration_no": "GD5P227", "floor": 0}')
+        mqtt_service.on_message(None, None, msg)
+
+        assert sum(events.qsize() for events in mqtt_service.queues) == 1
+        mqtt_service.client.publish.assert_not_called()
+
+    def test_duplicates_are_acked_without_queueing(self, mqtt_service, mocker):
+        raw = b'{"event_id": "cam-1", "country": "PL", "registration_no": "GD5P227", "floor": 0}'
+        for mid in (1, 2):
+            mqtt_service.on_message(None, None, mocker.Mock(topic="parking/entrance/camera", payload=raw, mid=mid, qos=1))
+
+        assert sum(events.qsize() for events in mqtt_service.queues) == 1
+        mqtt_service.client.ack.assert_called_once_with(2, 1)
+
+    def test_events_are_acked_after_processing(self, mqtt_service, mocker):
+        mqtt_service.process_batch([
+            entry("GD5P227")._replace(mid=7, qos=1),
+            entry("GD5P227")._replace(mid=8, qos=1),
+        ])
+
+        assert [call.args for call in mqtt_service.client.ack.call_args_list] == [(7, 1), (8, 1)]
+
+    def test_next_batch_respects_size(self, mqtt_service):
+        for i in range(15):
+            mqtt_service.queues[0].put(entry(f"GD5P2{i:02d}"))
+
+        assert len(mqtt_service.next_batch()) == 10
+        assert len(mqtt_service.next_batch()) == 5
+        assert mqtt_service.next_batch(timeout=0.01) == []
+
+    def test_batch_isolates_failing_events(self, mqtt_service, db_session):
+        mqtt_service.process_batch([
+            entry("GD5P227"),
+            entry("GD5P227"),
+            MQTTEvent("parking/exit/camera", {"country": "PL", "registration_no": "GD0000X"}),
+            entry("GD5P228"),
+        ])
+
+        assert db_session.query(ActiveParking).count() == 2
+        published = [call.args for call in mqtt_service.client.publish.call_args_list]
+        assert published == [
+            ("parking/sensors/floor/0/spot/1/status", "OCCUPIED"),
+            ("parking/sensors/floor/0/spot/2/status", "OCCUPIED"),
+        ]
+        assert mqtt_service.send_to_ws.call_count == 2
+
+    def test_transient_failure_is_retried_in_order_before_acking(self, mqtt_service, db_session, mocker):
+        register_entry = ParkingManager.register_entry
+        failures = [OperationalError("INSERT", {}, Exception("database is locked"))]
+
+        def flaky(manager, *args):
+            if failures:
+                raise failures.pop()
+            return register_entry(manager, *args)
+
+        mocker.patch.object(ParkingManager, "register_entry", flaky)
+        mqtt_service.retry_min = 0.001
+        raw = b'{"event_id": "cam-7", "country": "PL", "registration_no": "GD5P227", "floor": 0}'
+        event = mqtt_service.accept(mocker.Mock(topic="parking/entrance/camera", payload=raw, mid=7, qos=1))
+        payment = MQTTEvent("parking/parking_meter/pay", {"country": "PL", "registration_no": "GD5P227"}, 8, 1)
+
+        mqtt_service.process_batch([event, payment])
+
+        assert db_session.query(ActiveParking).one().is_paid is True
+        assert [call.args for call in mqtt_service.client.ack.call_args_list] == [(7, 1), (8, 1)]
+        assert mqtt_service.accept(mocker.Mock(topic=event.topic, payload=raw, mid=9, qos=1)) is None
+
+    def test_stopping_abandons_retries_unacked(self, mqtt_service, db_session, mocker):
+        mocker.patch.object(ParkingManager, "register_entry",
+                            side_effect=OperationalError("INSERT", {}, Exception("database is locked")))
+        raw = b'{"event_id": "cam-7", "country": "PL", "registration_no": "GD5P227", "floor": 0}'
+        msg = mocker.Mock(topic="parking/entrance/camera", payload=raw, mid=7, qos=1)
+        mqtt_service._stopping.set()
+
+        mqtt_service.process_batch([mqtt_service.accept(msg)])
+
+        mqtt_service.client.ack.assert_not_called()
+        assert mqtt_service.accept(mocker.Mock(topic=msg.topic, payload=raw, mid=8, qos=1)) is not None
+
+    def test_integrity_errors_are_rejected_not_retried(self, mqtt_service, mocker):
+        mocker.patch.object(ParkingManager, "register_entry",
+                            side_effect=IntegrityError("INSERT", {}, Exception("UNIQUE constraint failed")))
+
+        mqtt_service.process_batch([entry("GD5P227")._replace(mid=7, qos=1)])
+
+        mqtt_service.client.ack.assert_called_once_with(7, 1)
+        assert is_transient(OperationalError("SELECT", {}, Exception("server closed the connection")))
+        assert not is_transient(AttributeError("bug"))
+
+    def test_failed_connect_starts_no_workers(self, shared_session_factory, spot_index, mocker):
+        service = MQTTService(session_factory=shared_session_factory, spot_index=spot_index)
+        service.client = mocker.Mock()
+        service.client.connect.side_effect = OSError("refused")
+
+        async def scenario():
+            with pytest.raises(OSError):
+                await service.start()
+
+        asyncio.run(scenario())
+
+        assert service._threads == []
+        service.stop()
+
+    def test_start_connects_off_the_event_loop(self, shared_session_factory, spot_index, mocker):
+        service = MQTTService(session_factory=shared_session_factory, spot_index=spot_index)
+        service.client = mocker.Mock()
+        threads = []
+        service.client.connect.side_effect = lambda *args: threads.append(threading.current_thread())
+
+        async def scenario():
+            await service.start()
+            await asyncio.to_thread(service.stop)
+
+        asyncio.run(scenario())
+
+        assert threads and threads[0] is not threading.main_thread()
+
+    def test_tagged_events_publish_processing_acks(self, mqtt_service):
+        mqtt_service.process_batch([
+            MQTTEvent("parking/entrance/camera", {"country": "PL", "registration_no": "GD5P227", "floor": 0,
+                                                  "event_id": "e1"}),
+            MQTTEvent("parking/exit/camera", {"country": "PL", "registration_no": "GD0000X", "event_id": "e2"}),
+        ])
+
+        acks = [json.loads(call.args[1]) for call in mqtt_service.client.publish.call_args_list
+                if call.args[0] == "parking/sensors/ack"]
+        assert acks == [
+            {"event_id": "e1", "topic": "parking/entrance/camera", "ok": True, "error": None, "floor": 0, "spot": 1},
+            {"event_id": "e2", "topic": "parking/exit/camera", "ok": False, "error": "Vehicle not found on parking"},
+        ]
+
+    def test_full_cycle_in_one_batch(self, mqtt_service, db_session, spot_index):
+        mqtt_service.process_batch([
+            entry("GD5P227", 2),
+            MQTTEvent("parking/parking_meter/pay", {"country": "PL", "registration_no": "GD5P227"}),
+            MQTTEvent("parking/exit/camera", {"country": "PL", "registration_no": "GD5P227"}),
+        ])
+
+        assert db_session.query(ActiveParking).count() == 0
+        assert db_session.query(ParkingHistory).count() == 1
+        assert spot_index.is_free(2, 1)
+
+    def test_side_effects_wait_for_commit(self, mqtt_service, mocker):
+        mocker.patch("src.app.services.parking_manager.ParkingManager.transaction",
+                     side_effect=RuntimeError("database unavailable"))
+
+        mqtt_service.process_batch([entry("GD5P227"), entry("GD5P228")])
+
+        mqtt_service.client.publish.assert_not_called()
+        mqtt_service.send_to_ws.assert_not_called()
+
+    def test_lock_rejects_entries(self, mqtt_service, db_session):
+        mqtt_service.process_batch([
+            MQTTEvent("parking/system/command", {"cmd": "LOCK"}),
+            entry("GD5P227"),
+        ])
+
+        assert mqtt_service.is_locked is True
+        assert db_session.query(ActiveParking).count() == 0
+        mqtt_service.client.publish.assert_called_once_with("parking/entrance/display", "SYSTEM LOCKED")
+
+    def test_unknown_topic_is_rejected(self, mqtt_service, db_session):
+        mqtt_service.process_batch([MQTTEvent("parking/unknown", {"country": "PL"}), entry("GD5P227")])
+
+        assert db_session.query(ActiveParking).count() == 1
+
+    def test_same_vehicle_always_lands_on_same_shard(self, mqtt_service):
+        mqtt_service.workers = 4
+        shards = {mqtt_service.shard_for({"country": "PL", "registration_no": f"GD5P2{i:02d}"}) for i in range(40)}
+
+        assert shards == {0, 1, 2, 3}
+        assert mqtt_service.shard_for({"country": "PL", "registration_no": "GD5P227"}) == \
+            mqtt_service.shard_for({"registration_no": "GD5P227", "country": "PL", "floor": 3})
+        assert mqtt_service.shard_for({"cmd": "LOCK"}) == 0
+
+    def test_lock_state_survives_restart(self, mqtt_service, db_session, spot_index):
+        mqtt_service.process_batch([MQTTEvent("parking/system/command", {"cmd": "LOCK"})])
+
+        restarted = MQTTService(session_factory=sessionmaker(bind=db_session.get_bind()), spot_index=spot_index)
+        restarted.load_state()
+
+        assert restarted.is_locked is True
+
+
+@pytest.fixture
+def shared_session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'parking.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def message(event, mocker, mid=None, qos=0):
+    return mocker.Mock(topic=event.topic, payload=json.dumps(event.payload).encode(), mid=mid, qos=qos)
+
+
+class TestAsyncMQTTService:
+    def make_service(self, session_factory, spot_index, mocker, **kwargs):
+        service = AsyncMQTTService(session_factory=session_factory, spot_index=spot_index,
+                                   batch_size=10, batch_linger=0.01, **kwargs)
+        service.client = mocker.Mock()
+        service.send_to_ws = mocker.Mock()
+        return service
+
+    def test_drains_queue_on_stop(self, shared_session_factory, spot_index, mocker):
+        service = self.make_service(shared_session_factory, spot_index, mocker)
+
+        async def scenario():
+            await service.start()
+            for i in range(25):
+                service.on_message(None, None, message(entry(f"GD5P2{i:02d}", i % 5), mocker))
+            await service.stop()
+
+        asyncio.run(scenario())
+
+        db = shared_session_factory()
+        assert db.query(ActiveParking).count() == 25
+        assert service.send_to_ws.call_count == 25
+        db.close()
+
+    def test_retries_transient_failures(self, shared_session_factory, spot_index, mocker):
+        service = self.make_service(shared_session_factory, spot_index, mocker, retry_min=0.001)
+        register_entry = ParkingManager.register_entry
+        failures = [OperationalError("INSERT", {}, Exception("database is locked"))] * 2
+
+        def flaky(manager, *args):
+            if failures:
+                raise failures.pop()
+            return register_entry(manager, *args)
+
+        mocker.patch.object(ParkingManager, "register_entry", flaky)
+
+        async def scenario():
+            await service.start()
+            service.on_message(None, None, message(entry("GD5P227"), mocker, mid=7, qos=1))
+            await service.stop()
+
+        asyncio.run(scenario())
+
+        db = shared_session_factory()
+        assert db.query(ActiveParking).count() == 1
+        db.close()
+        service.client.ack.assert_called_once_with(7, 1)
+
+    def test_pauses_reading_when_queue_is_full(self, shared_session_factory, spot_index, mocker):
+        service = self.make_service(shared_session_factory, spot_index, mocker, queue_size=4)
+
+        async def scenario():
+            service.loop = asyncio.get_running_loop()
+            for i in range(4):
+                service.on_message(None, None, message(entry(f"GD5P2{i:02d}"), mocker))
+            paused = service.paused
+            consumers = [asyncio.create_task(service._consume(shard)) for shard in range(service.workers)]
+            await asyncio.wait_for(asyncio.gather(*(events.join() for events in service.queues)), 5)
+            for consumer in consumers:
+                consumer.cancel()
+            return paused
+
+        assert asyncio.run(scenario()) is True
+        assert service.paused is False
+
+    def test_reconnects_with_exponential_backoff(self, shared_session_factory, spot_index, mocker):
+        service = self.make_service(shared_session_factory, spot_index, mocker,
+                                    reconnect_min=0.001, reconnect_max=0.004)
+        service.client.connect.side_effect = [OSError("refused")] * 4 + [None]
+        sleep = mocker.patch("src.app.services.mqtt_service.asyncio.sleep", new=mocker.AsyncMock())
+        mocker.patch("src.app.services.mqtt_service.random.uniform", return_value=1.0)
+
+        asyncio.run(service._connect_with_backoff())
+
+        assert service.client.connect.call_count == 5
+        assert [call.args[0] for call in sleep.await_args_list] == [0.001, 0.002, 0.004, 0.004]
+
+    def test_parallel_shards_keep_per_vehicle_order(self, shared_session_factory, spot_index, mocker):
+        service = MQTTService(session_factory=shared_session_factory, spot_index=spot_index,
+                              batch_size=5, batch_linger=0.001, workers=4)
+        service.client = mocker.Mock()
+        service.send_to_ws = mocker.Mock()
+
+        async def scenario():
+            await service.start()
+            for i in range(20):
+                reg_no = f"GD5P2{i:02d}"
+                service.on_message(None, None, message(entry(reg_no, i % 5), mocker))
+                service.on_message(None, None, message(MQTTEvent("parking/parking_meter/pay",
+                                                                 {"country": "PL", "registration_no": reg_no}), mocker))
+                service.on_message(None, None, message(MQTTEvent("parking/exit/camera",
+                                                                 {"country": "PL", "registration_no": reg_no}), mocker))
+            await asyncio.to_thread(service.stop)
+
+        asyncio.run(scenario())
+
+        db = shared_session_factory()
+        assert db.query(ParkingHistory).count() == 20
+        assert db.query(ActiveParking).count() == 0
+        db.close()
@@ -0,0 +1,95 @@
+import asyncio
+from src.app.services.events import EventHub
+from src.app.services.occupancy import OccupancyTracker, OCCUPANCY_COALESCE_KEY
+
+
+class RecordingManager:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, message, coalesce_key=None):
+        self.published.append((message, coalesce_key))
+
+
+class TestOccupancyTracker:
+    def test_seed_counts_active_spots_and_revenue(self, parking_manager, db_session, mocker):
+        parking_manager.register_entry("PL", "GD5P227", 1)
+        parking_manager.register_entry("PL", "GD5P228", 1)
+        mocker.patch.object(parking_manager.price_calculator, "calculate_stay_fee", return_value=12.5)
+        parking_manager.pay_parking_fee("PL", "GD5P227", 12.5)
+
+        tracker = OccupancyTracker()
+        tracker.seed(db_session)
+        snapshot = tracker.snapshot()
+
+        assert snapshot["type"] == "OCCUPANCY_SNAPSHOT"
+        assert snapshot["occupied"] == 2
+        assert snapshot["free"] == 248
+        assert snapshot["floors"][1] == {"floor": 1, "occupied": 2, "free": 48, "capacity": 50}
+        assert snapshot["revenue"] == 12.5
+
+    def test_events_update_counts(self):
+        tracker = OccupancyTracker()
+        tracker.apply({"type": "VEHICLE_ENTRY", "floor": 0, "spot": 1})
+        tracker.apply({"type": "VEHICLE_ENTRY", "floor": 0, "spot": 2})
+        tracker.apply({"type": "VEHICLE_UPDATED", "floor": 3, "spot": 1, "old_floor": 0, "old_spot": 2})
+        tracker.apply({"type": "PAYMENT_SUCCESS", "amount": 20, "fee": 15.0})
+        tracker.apply({"type": "VEHICLE_EXIT", "floor": 0, "spot": 1})
+
+        snapshot = tracker.snapshot()
+        assert [f["occupied"] for f in snapshot["floors"]] == [0, 0, 0, 1, 0]
+        assert snapshot["revenue"] == 15.0
+        assert snapshot["version"] == 5
+
+    def test_unrelated_events_do_not_bump_version(self):
+        tracker = OccupancyTracker()
+        tracker.apply({"type": "EMERGENCY_STATUS", "is_locked": True})
+
+        assert tracker.version == 0
+
+    def test_delta_contains_only_changed_floors(self):
+        tracker = OccupancyTracker()
+        before = tracker.snapshot()
+        tracker.apply({"type": "VEHICLE_ENTRY", "floor": 2, "spot": 7})
+
+        delta = tracker.delta(before, tracker.snapshot())
+
+        assert delta["type"] == "OCCUPANCY_DELTA"
+        assert delta["base_version"] == 0
+        assert delta["version"] == 1
+        assert delta["floors"] == [{"floor": 2, "occupied": 1, "free": 49, "capacity": 50}]
+        assert delta["occupied"] == 1
+
+    def test_stream_throttles_bursts_into_one_delta(self):
+        async def scenario():
+            tracker = OccupancyTracker()
+            manager = RecordingManager()
+            task = asyncio.create_task(tracker.stream(manager, interval=0.05))
+            await asyncio.sleep(0.01)
+            for spot in range(1, 21):
+                tracker.apply({"type": "VEHICLE_ENTRY", "floor": 0, "spot": spot})
+            await asyncio.sleep(0.12)
+            task.cancel()
+            return manager.published
+
+        published = asyncio.run(scenario())
+
+        assert len(published) == 1
+        delta, key = published[0]
+        assert key == OCCUPANCY_COALESCE_KEY
+        assert delta["occupied"] == 20
+
+
+class TestEventHub:
+    def test_failing_subscriber_does_not_block_others(self):
+        hub = EventHub()
+        received = []
+
+        def broken(event):
+            raise RuntimeError("boom")
+
+        hub.subscribe(broken)
+        hub.subscribe(received.append)
+        hub.publish({"type": "VEHICLE_ENTRY"})
+
+        assert received == [{"type": "VEHICLE_ENTRY"}]
@@ -0,0 +1,80 @@
+import pytest
+from datetime import datetime, timedelta
+from src.app.models.parking import Vehicle, ActiveParking, ParkingHistory
+from src.app.services.pagination import history_page, active_page, encode_cursor, decode_cursor
+
+
+@pytest.fixture
+def history(db_session):
+    start = datetime(2026, 1, 1, 8, 0, 0)
+    for i in range(7):
+        vehicle = Vehicle(country="PL" if i % 2 == 0 else "UA", registration_no=f"GD{i:05d}")
+        db_session.add(vehicle)
+        db_session.flush()
+        exit_time = start + timedelta(hours=i // 2)
+        db_session.add(ParkingHistory(vehicle_id=vehicle.id, entry_time=start, exit_time=exit_time,
+                                      floor=i % 5, fee=float(i)))
+    db_session.commit()
+    return start
+
+
+class TestPagination:
+    def test_cursor_roundtrip(self):
+        time = datetime(2026, 1, 1, 8, 0, 0)
+        assert decode_cursor(encode_cursor(time, 5), (datetime, int)) == [time, 5]
+
+    def test_invalid_cursor(self):
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor", (datetime, int))
+        with pytest.raises(ValueError):
+            decode_cursor(encode_cursor(1), (datetime, int))
+
+    @pytest.mark.parametrize("values", [["x"], [True], [1.5], [None], [[3]]])
+    def test_active_cursor_rejects_wrong_types(self, db_session, values):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            active_page(db_session, cursor=encode_cursor(*values))
+
+    @pytest.mark.parametrize("values", [["x", 1], [5, 1], ["2026-01-01T08:00:00", "1"], ["2026-01-01T08:00:00", None]])
+    def test_history_cursor_rejects_wrong_types(self, db_session, values):
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            history_page(db_session, cursor=encode_cursor(*values))
+
+    def test_history_pages_cover_all_rows_newest_first(self, db_session, history):
+        seen = []
+        cursor = None
+        while True:
+            items, cursor = history_page(db_session, limit=3, cursor=cursor)
+            seen.extend(items)
+            if cursor is None:
+                break
+
+        assert len(seen) == 7
+        assert len({h.id for h in seen}) == 7
+        keys = [(h.exit_time, h.id) for h in seen]
+        assert keys == sorted(keys, reverse=True)
+
+    def test_history_filters(self, db_session, history):
+        items, cursor = history_page(db_session, country="UA")
+        assert cursor is None
+        assert {h.vehicle.country for h in items} == {"UA"}
+
+        items, _ = history_page(db_session, since=history + timedelta(hours=2), until=history + timedelta(hours=3))
+        assert len(items) == 2
+
+        items, _ = history_page(db_session, floor=0)
+        assert [h.floor for h in items] == [0, 0]
+
+    def test_active_pages(self, db_session):
+        for i in range(5):
+            vehicle = Vehicle(country="PL", registration_no=f"GD{i:05d}")
+            db_session.add(vehicle)
+            db_session.flush()
+            db_session.add(ActiveParking(vehicle_id=vehicle.id, floor=i % 2, spot_number=i + 1))
+        db_session.commit()
+
+        first, cursor = active_page(db_session, limit=3)
+        second, last_cursor = active_page(db_session, limit=3, cursor=cursor)
+
+        assert [a.vehicle_id for a in first + second] == [1, 2, 3, 4, 5]
+        assert last_cursor is None
+        assert all(a.floor == 1 for a in active_page(db_session, floor=1)[0])
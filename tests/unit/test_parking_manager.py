@@ -1,5 +1,6 @@
 import pytest
 from datetime import datetime
+from sqlalchemy.exc import IntegrityError
 from src.app.models.parking import Vehicle, ActiveParking, ParkingHistory
 
 
@@ -110,4 +111,54 @@ class TestParkingManager:
         active = parking_manager.db.query(ActiveParking).join(Vehicle).filter(
             Vehicle.registration_no == "GD5P227"
         ).first()
-        assert active.floor == 1
\ No newline at end of file
+        assert active.floor == 1
+
+    def test_entry_skips_spot_taken_by_another_writer(self, parking_manager, db_session, spot_index):
+        spot_index.ensure_seeded(db_session)
+        other = Vehicle(country="PL", registration_no="GD1234A")
+        db_session.add(other)
+        db_session.flush()
+        db_session.add(ActiveParking(vehicle_id=other.id, floor=0, spot_number=1))
+        db_session.commit()
+
+        result = parking_manager.register_entry("PL", "GD5P227", 0)
+
+        assert result["floor"] == 0
+        assert result["spot"] == 2
+        assert not spot_index.is_free(0, 1)
+
+    def test_entry_falls_back_to_db_when_index_is_stale(self, parking_manager, db_session, spot_index):
+        spot_index.ensure_seeded(db_session)
+        for floor in spot_index.floors:
+            while spot_index.claim(floor) is not None:
+                pass
+
+        result = parking_manager.register_entry("PL", "GD5P227", 2)
+
+        assert result["floor"] == 2
+        assert result["spot"] == 1
+
+    def test_floor_spot_is_unique(self, db_session):
+        first = Vehicle(country="PL", registration_no="GD1234A")
+        second = Vehicle(country="PL", registration_no="GD1234B")
+        db_session.add_all([first, second])
+        db_session.flush()
+        db_session.add_all([
+            ActiveParking(vehicle_id=first.id, floor=1, spot_number=7),
+            ActiveParking(vehicle_id=second.id, floor=1, spot_number=7),
+        ])
+        with pytest.raises(IntegrityError):
+            db_session.commit()
+
+    def test_change_floor_retries_after_conflict(self, parking_manager, db_session, spot_index):
+        parking_manager.register_entry("PL", "GD5P227", 0)
+        other = Vehicle(country="PL", registration_no="GD1234A")
+        db_session.add(other)
+        db_session.flush()
+        db_session.add(ActiveParking(vehicle_id=other.id, floor=1, spot_number=1))
+        db_session.commit()
+
+        result = parking_manager.change_vehicle_floor("PL", "GD5P227", 1)
+
+        assert result["new_spot"] == 2
+        assert spot_index.is_free(0, 1)
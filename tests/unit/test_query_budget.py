@@ -0,0 +1,84 @@
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from src.app.models.parking import ActiveParking, ParkingHistory
+
+
+@pytest.fixture
+def parked(parking_manager):
+    parking_manager.register_entry("PL", "GD00001", 0)
+    parking_manager.register_entry("PL", "GD5P227", 0)
+    return parking_manager
+
+
+class TestQueryBudget:
+    def test_entry_of_new_vehicle(self, parked, query_counter):
+        with query_counter.budget(statements=3):
+            parked.register_entry("PL", "GD5P228", 1)
+
+    def test_entry_of_returning_vehicle(self, parked, query_counter):
+        parked.pay_parking_fee("PL", "GD5P227", None)
+        parked.register_exit("PL", "GD5P227")
+
+        with query_counter.budget(statements=2):
+            parked.register_entry("PL", "GD5P227", 1)
+
+    def test_rejected_entry_does_not_write(self, parked, query_counter):
+        with query_counter.budget(statements=1, commits=0):
+            with pytest.raises(ValueError):
+                parked.register_entry("PL", "GD5P227", 1)
+
+    def test_payment_info(self, parked, query_counter):
+        with query_counter.budget(statements=1, commits=0):
+            parked.get_payment_info("PL", "GD5P227")
+
+    def test_payment(self, parked, query_counter):
+        with query_counter.budget(statements=2):
+            result = parked.pay_parking_fee("PL", "GD5P227", 10.0)
+        assert result["fee"] == 0.0
+
+    def test_exit(self, parked, query_counter, db_session):
+        parked.pay_parking_fee("PL", "GD5P227", None)
+
+        with query_counter.budget(statements=3):
+            result = parked.register_exit("PL", "GD5P227")
+
+        assert result == {"floor": 0, "spot": 2, "status": True}
+        assert db_session.query(ParkingHistory).one().floor == 0
+
+    def test_change_floor(self, parked, query_counter, db_session):
+        with query_counter.budget(statements=2):
+            result = parked.change_vehicle_floor("PL", "GD5P227", 3)
+
+        assert result["new_floor"] == 3
+        assert db_session.query(ActiveParking).filter_by(floor=3).count() == 1
+
+
+class TestGuardedWrites:
+    def test_exit_after_concurrent_exit_is_rejected(self, parked, db_session):
+        parked.pay_parking_fee("PL", "GD5P227", None)
+        stale = parked._find_active("PL", "GD5P227")
+        parked.register_exit("PL", "GD5P227")
+        parked._find_active = lambda country, registration_no: stale
+
+        with pytest.raises(ValueError, match="not found"):
+            parked.register_exit("PL", "GD5P227")
+        assert db_session.query(ParkingHistory).count() == 1
+
+    def test_payment_expiry_is_checked_in_the_delete(self, parked, db_session, mocker):
+        paid_at = datetime(2026, 1, 1, 12, 0, 0)
+        mock_datetime = mocker.patch('src.app.services.parking_manager.datetime')
+        mock_datetime.now.return_value = paid_at + timedelta(minutes=10)
+        parked.db.query(ActiveParking).update({"entry_time": paid_at - timedelta(minutes=10)})
+        parked.pay_parking_fee("PL", "GD5P227", None)
+        stale = parked._find_active("PL", "GD5P227")
+        db_session.execute(update(ActiveParking).where(ActiveParking.vehicle_id == stale.vehicle_id)
+                           .values(payment_time=paid_at).execution_options(synchronize_session=False))
+        parked._find_active = lambda country, registration_no: stale
+
+        mock_datetime.now.return_value = paid_at + timedelta(minutes=16)
+        with pytest.raises(ValueError, match="not found"):
+            parked.register_exit("PL", "GD5P227")
+
+        assert db_session.query(ActiveParking).filter_by(vehicle_id=stale.vehicle_id).count() == 1
+        assert db_session.query(ParkingHistory).count() == 0
@@ -0,0 +1,52 @@
+import pytest
+from datetime import datetime, timedelta
+from src.app.models.parking import Vehicle, ActiveParking
+from src.app.services.quotes import fee_quotes
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def active(db_session):
+    stays = [("PL", 0, 90, False), ("UA", 0, 150, True), ("PL", 2, 20, False), ("PL", 4, 3 * 60, False)]
+    for i, (country, floor, minutes, paid) in enumerate(stays):
+        vehicle = Vehicle(country=country, registration_no=f"GD{i:05d}")
+        db_session.add(vehicle)
+        db_session.flush()
+        db_session.add(ActiveParking(vehicle_id=vehicle.id, floor=floor, spot_number=i + 1,
+                                     entry_time=NOW - timedelta(minutes=minutes, seconds=30), is_paid=paid))
+    db_session.commit()
+
+
+class TestFeeQuotes:
+    def test_quotes_match_single_vehicle_fees(self, db_session, price_calculator, active):
+        result = fee_quotes(db_session, price_calculator, now=NOW)
+
+        for quote in result["quotes"]:
+            assert quote["fee"] == price_calculator.calculate_fee(quote["minutes"], quote["floor"])
+        assert [q["minutes"] for q in result["quotes"]] == [90, 150, 20, 180]
+
+    def test_totals_per_floor(self, db_session, price_calculator, active):
+        result = fee_quotes(db_session, price_calculator, now=NOW, details=False)
+
+        assert "quotes" not in result
+        assert result["vehicles"] == 4
+        assert result["fee"] == 6.0 + 12.0 + 0.0 + 5.0
+        assert result["due"] == 6.0 + 5.0
+        assert result["floors"] == {
+            0: {"vehicles": 2, "fee": 18.0, "due": 6.0},
+            2: {"vehicles": 1, "fee": 0.0, "due": 0.0},
+            4: {"vehicles": 1, "fee": 5.0, "due": 5.0},
+        }
+
+    def test_filters(self, db_session, price_calculator, active):
+        assert fee_quotes(db_session, price_calculator, floor=0, now=NOW)["vehicles"] == 2
+        assert fee_quotes(db_session, price_calculator, floor=0, country="UA", now=NOW)["fee"] == 12.0
+
+    def test_empty_lot(self, db_session, price_calculator):
+        result = fee_quotes(db_session, price_calculator, now=NOW)
+
+        assert result["vehicles"] == 0
+        assert result["fee"] == 0
+        assert result["floors"] == {}
+        assert result["quotes"] == []
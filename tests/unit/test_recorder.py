@@ -0,0 +1,73 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+from src.app.services.mqtt_service import MQTTService, MQTTEvent
+from src.app.services.recorder import TrafficRecorder, RecordingMiddleware, read_records
+
+
+@pytest.fixture
+def recorder(tmp_path):
+    recorder = TrafficRecorder(str(tmp_path / "traffic.jsonl"))
+    yield recorder
+    recorder.close()
+
+
+class TestTrafficRecorder:
+    def test_disabled_without_path(self):
+        assert not TrafficRecorder().enabled
+
+    def test_appends_records_and_skips_torn_lines(self, recorder):
+        recorder.record({"t": 2.0, "src": "mqtt"})
+        recorder.record({"t": 1.0, "src": "http"})
+        recorder.close()
+        with open(recorder.path, "a") as f:
+            f.write('{"t": 3.0, "src"')
+
+        assert read_records(recorder.path) == [{"t": 2.0, "src": "mqtt"}, {"t": 1.0, "src": "http"}]
+
+    def test_mqtt_events_are_recorded_with_results(self, recorder, db_session, spot_index, mocker):
+        service = MQTTService(session_factory=sessionmaker(bind=db_session.get_bind()), spot_index=spot_index,
+                              recorder=recorder)
+        service.client = mocker.Mock()
+        service.send_to_ws = mocker.Mock()
+        service.process_batch([
+            MQTTEvent("parking/entrance/camera", {"country": "PL", "registration_no": "GD5P227", "floor": 0},
+                      received_at=10.0),
+            MQTTEvent("parking/exit/camera", {"country": "PL", "registration_no": "GD0000X"}, received_at=11.0),
+        ])
+        service.accept(mocker.Mock(topic="parking/exit/camera", payload=b"not json", mid=None, qos=0))
+        recorder.close()
+
+        records = read_records(recorder.path)
+        assert records[0] == {"t": 10.0, "src": "mqtt", "topic": "parking/entrance/camera",
+                              "payload": {"country": "PL", "registration_no": "GD5P227", "floor": 0},
+                              "result": {"ok": True, "error": None, "floor": 0, "spot": 1}}
+        assert records[1]["result"] == {"ok": False, "error": "Vehicle not found on parking"}
+        assert records[2]["raw"] == "not json"
+        assert records[2]["result"] == {"ok": False, "error": "Invalid payload"}
+
+    def test_middleware_records_mutations_only(self, recorder):
+        app = FastAPI()
+
+        @app.post("/entry", status_code=201)
+        def entry(body: dict):
+            return {"status": body}
+
+        @app.get("/stats")
+        def stats():
+            return {}
+
+        app.add_middleware(RecordingMiddleware, recorder=recorder)
+        client = TestClient(app)
+        client.get("/stats")
+        client.post("/entry?x=1", json={"floor": 1}, headers={"Idempotency-Key": "k1", "X-Other": "y"})
+        recorder.close()
+
+        [record] = read_records(recorder.path)
+        assert record["method"] == "POST"
+        assert record["path"] == "/entry"
+        assert record["query"] == "x=1"
+        assert record["headers"] == {"idempotency-key": "k1", "content-type": "application/json"}
+        assert record["body"] == {"floor": 1}
+        assert (record["status"], record["response"]) == (201, {"status": {"floor": 1}})
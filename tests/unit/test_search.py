@@ -0,0 +1,80 @@
+import pytest
+from src.app.models.parking import Vehicle
+from src.app.services.search import NgramIndex, VehicleSearch, normalize_plate, trigrams, similarity
+
+
+@pytest.fixture
+def vehicles(db_session):
+    plates = ["GD5P227", "GD12345", "GA77123", "WX5P227", "PO227AB", "GD5P2"]
+    db_session.add_all([Vehicle(country="PL", registration_no=p) for p in plates])
+    db_session.commit()
+    return plates
+
+
+class TestSearch:
+    def test_normalize_plate(self):
+        assert normalize_plate("gd 5p-227") == "GD5P227"
+
+    def test_similarity(self):
+        assert similarity(trigrams("GD5P227"), trigrams("GD5P227")) == 1.0
+        assert similarity(trigrams("GD5P227"), trigrams("XYZ")) == 0.0
+
+    def test_contains_ranked_by_similarity(self, db_session, vehicles):
+        results = VehicleSearch().search(db_session, "5p2")
+        assert [r["registration_no"] for r in results] == ["GD5P2", "GD5P227", "WX5P227"]
+        assert results[0]["similarity"] >= results[-1]["similarity"]
+
+    def test_prefix_and_exact(self, db_session, vehicles):
+        search = VehicleSearch()
+        assert {r["registration_no"] for r in search.search(db_session, "GD", "prefix")} == {"GD5P227", "GD12345", "GD5P2"}
+        assert [r["registration_no"] for r in search.search(db_session, "gd5p227", "exact")] == ["GD5P227"]
+        assert search.search(db_session, "GD5P22", "exact") == []
+
+    def test_short_query_and_limit(self, db_session, vehicles):
+        search = VehicleSearch()
+        assert len(search.search(db_session, "G", limit=2)) == 2
+        assert {r["registration_no"] for r in search.search(db_session, "27")} == {"GD5P227", "WX5P227", "PO227AB"}
+
+    def test_refresh_picks_up_new_vehicles(self, db_session, vehicles):
+        search = VehicleSearch()
+        assert search.search(db_session, "KR", "prefix") == []
+        db_session.add(Vehicle(country="PL", registration_no="KR12345"))
+        db_session.commit()
+        assert [r["registration_no"] for r in search.search(db_session, "KR", "prefix")] == ["KR12345"]
+
+    def test_unknown_mode(self, db_session):
+        with pytest.raises(ValueError):
+            VehicleSearch().search(db_session, "GD", "fuzzy")
+
+    def test_index_is_incremental(self):
+        index = NgramIndex()
+        index.add(2, "PL", "GD5P227")
+        index.add(1, "PL", "GA12345")
+        assert index.last_id == 2
+        assert [r["id"] for r in index.search("G", "prefix")] == [1, 2]
+
+    def test_refresh_picks_up_lower_ids_committed_late(self, db_session):
+        now = [0.0]
+        search = VehicleSearch()
+        search.ngram_index = NgramIndex(gap_ttl=60, clock=lambda: now[0])
+        db_session.add_all([Vehicle(id=1, country="PL", registration_no="GD11111"),
+                            Vehicle(id=3, country="PL", registration_no="GD33333")])
+        db_session.commit()
+        assert len(search.search(db_session, "GD", "prefix")) == 2
+
+        db_session.add(Vehicle(id=2, country="PL", registration_no="GD22222"))
+        db_session.commit()
+        assert [r["id"] for r in search.search(db_session, "GD", "prefix")] == [1, 2, 3]
+
+    def test_unfilled_gaps_expire(self, db_session):
+        now = [0.0]
+        index = NgramIndex(gap_ttl=60, clock=lambda: now[0])
+        db_session.add_all([Vehicle(id=1, country="PL", registration_no="GD11111"),
+                            Vehicle(id=5, country="PL", registration_no="GD55555")])
+        db_session.commit()
+        index.refresh(db_session)
+        assert sorted(index._gaps) == [2, 3, 4]
+
+        now[0] = 61
+        index.refresh(db_session)
+        assert index._gaps == {}
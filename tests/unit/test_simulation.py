@@ -0,0 +1,79 @@
+import pytest
+from datetime import datetime
+from src.app.services.parking_manager import ParkingManager
+from src.app.services.simulation import Simulation, SimulationConfig, VirtualClock
+
+
+def quiet_hours(rate):
+    return tuple([rate] * 24)
+
+
+class TestVirtualClock:
+    def test_advances_only_forward(self):
+        clock = VirtualClock(datetime(2026, 1, 1))
+        clock.advance(datetime(2026, 1, 2))
+        assert clock() == datetime(2026, 1, 2)
+        with pytest.raises(ValueError):
+            clock.advance(datetime(2026, 1, 1))
+
+
+class TestParkingManagerClock:
+    def test_fees_and_expiry_follow_injected_clock(self, db_session, price_calculator, vehicle_validator, spot_index):
+        clock = VirtualClock(datetime(2026, 1, 1, 10, 0))
+        manager = ParkingManager(db_session, price_calculator, vehicle_validator, spot_index, clock)
+
+        manager.register_entry("PL", "GD5P227", 0)
+        clock.advance(datetime(2026, 1, 1, 11, 30))
+        assert manager.pay_parking_fee("PL", "GD5P227", None)["fee"] == 6.0
+
+        clock.advance(datetime(2026, 1, 1, 11, 46))
+        with pytest.raises(ValueError, match="expired"):
+            manager.register_exit("PL", "GD5P227")
+
+
+class TestSimulation:
+    def test_config_validation(self):
+        with pytest.raises(ValueError):
+            SimulationConfig(days=0)
+        with pytest.raises(ValueError):
+            SimulationConfig(hourly_arrivals=(1, 2))
+
+    def test_same_seed_gives_same_report(self):
+        config = SimulationConfig(days=0.25, seed=7, fleet_size=300)
+
+        first = Simulation(config).run().as_dict()
+        second = Simulation(config).run().as_dict()
+
+        for report in (first, second):
+            report.pop("wall_seconds")
+            report.pop("speedup")
+        assert first == second
+
+    def test_report_is_consistent(self):
+        simulation = Simulation(SimulationConfig(days=1, seed=3, fleet_size=500, hourly_arrivals=quiet_hours(8)))
+        report = simulation.run()
+
+        assert report.entries > 0
+        assert report.entries - report.exits == len(simulation.parked)
+        assert report.payments >= report.exits
+        assert report.revenue > 0
+        assert 0 < report.average_occupancy <= report.peak_occupancy <= report.capacity
+        assert len(report.occupancy_samples) == 24
+        assert simulation.clock() <= simulation.end
+
+    def test_late_exits_pay_again(self):
+        config = SimulationConfig(days=0.5, seed=5, late_exit_probability=1.0, fleet_size=200,
+                                  hourly_arrivals=quiet_hours(4))
+        report = Simulation(config).run()
+
+        assert report.expired_payments > 0
+        assert report.payments >= report.exits + report.expired_payments
+        assert "Payment expired. 15 minutes exceeded" not in report.rejections
+
+    def test_overflow_is_reported_as_rejections(self):
+        config = SimulationConfig(days=0.1, seed=1, hourly_arrivals=quiet_hours(150), dwell_median_minutes=600,
+                                  dwell_sigma=0.1, fleet_size=1000)
+        report = Simulation(config).run()
+
+        assert report.peak_occupancy == report.capacity
+        assert report.rejections["Parking is completely full"] > 0
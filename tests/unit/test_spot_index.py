@@ -0,0 +1,97 @@
+import pytest
+from sqlalchemy import event
+from src.app.models.parking import Vehicle, ActiveParking
+from src.app.services.parking_manager import ParkingManager
+from src.app.services.spot_index import SpotIndex
+
+
+class TestSpotIndex:
+    def test_claims_lowest_free_spot(self, spot_index):
+        assert spot_index.claim(0) == 1
+        assert spot_index.claim(0) == 2
+        spot_index.release(0, 1)
+        assert spot_index.claim(0) == 1
+
+    def test_claim_first_falls_through_full_floor(self):
+        index = SpotIndex(floors=(0, 1), spots_per_floor=2)
+        assert index.claim_first([1, 0]) == (1, 1)
+        assert index.claim_first([1, 0]) == (1, 2)
+        assert index.claim_first([1, 0]) == (0, 1)
+        assert index.claim_first([1, 0]) == (0, 2)
+        assert index.claim_first([1, 0]) is None
+
+    def test_reconcile_seeds_from_db(self, db_session, spot_index):
+        vehicle = Vehicle(country="PL", registration_no="GD5P227")
+        db_session.add(vehicle)
+        db_session.flush()
+        db_session.add(ActiveParking(vehicle_id=vehicle.id, floor=2, spot_number=1))
+        db_session.commit()
+
+        spot_index.reconcile(db_session)
+
+        assert not spot_index.is_free(2, 1)
+        assert spot_index.free_count(2) == 49
+        assert spot_index.claim(2) == 2
+
+    def test_reconcile_keeps_pending_claims(self, db_session, spot_index):
+        spot = spot_index.claim(0)
+        spot_index.reconcile(db_session)
+        assert not spot_index.is_free(0, spot)
+
+    def test_reconcile_keeps_claims_confirmed_after_snapshot(self, db_session, spot_index):
+        spot = spot_index.claim(0)
+        event.listen(db_session.get_bind(), "after_cursor_execute",
+                     lambda *args: spot_index.confirm(0, spot), once=True)
+
+        spot_index.reconcile(db_session)
+
+        assert not spot_index.is_free(0, spot)
+        assert spot_index.claim(0) != spot
+
+    def test_entry_uses_index_without_occupancy_query(self, parking_manager, db_session):
+        parking_manager.register_entry("PL", "GD5P227", 3)
+
+        statements = []
+        event.listen(db_session.get_bind(), "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        result = parking_manager.register_entry("PL", "GD5P228", 3)
+
+        assert result["floor"] == 3
+        assert result["spot"] == 2
+        assert not any(s.startswith("SELECT active_parking.spot_number") for s in statements)
+
+    def test_exit_and_floor_change_update_index(self, parking_manager, spot_index):
+        parking_manager.register_entry("PL", "GD5P227", 0)
+        parking_manager.change_vehicle_floor("PL", "GD5P227", 1)
+        assert spot_index.is_free(0, 1)
+        assert not spot_index.is_free(1, 1)
+
+        parking_manager.pay_parking_fee("PL", "GD5P227", 0.0)
+        parking_manager.register_exit("PL", "GD5P227")
+        assert spot_index.is_free(1, 1)
+
+    def test_full_floor_reconciles_at_most_once_per_interval(self, db_session, price_calculator, vehicle_validator,
+                                                             mocker):
+        now = [0.0]
+        index = SpotIndex(floors=(0, 1), spots_per_floor=1, miss_interval=5, clock=lambda: now[0])
+        manager = ParkingManager(db_session, price_calculator, vehicle_validator, index)
+        manager.register_entry("PL", "GD5P227", 0)
+        manager.register_entry("PL", "GD5P228", 1)
+        reconcile = mocker.spy(index, "reconcile")
+
+        for _ in range(3):
+            with pytest.raises(ValueError, match="No free spots on floor 1"):
+                manager.change_vehicle_floor("PL", "GD5P227", 1)
+        assert reconcile.call_count == 1
+
+        now[0] = 5.0
+        with pytest.raises(ValueError, match="No free spots on floor 1"):
+            manager.change_vehicle_floor("PL", "GD5P227", 1)
+        assert reconcile.call_count == 2
+
+    def test_full_parking(self, db_session, price_calculator, vehicle_validator):
+        manager = ParkingManager(db_session, price_calculator, vehicle_validator,
+                                 SpotIndex(floors=(0,), spots_per_floor=1))
+        manager.register_entry("PL", "GD5P227", 0)
+        with pytest.raises(ValueError):
+            manager.register_entry("PL", "GD5P228", 0)
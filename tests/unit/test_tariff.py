@@ -0,0 +1,80 @@
+import random
+import numpy as np
+import pytest
+from datetime import datetime
+from src.app.services.pricing import PriceCalculator
+from src.app.services.tariff import Tariff, RateBand, bands_from_config
+
+PRICES = {0: 6, 1: 5, 2: 4, 3: 3, 4: 2.5}
+BANDS = [{"start": "07:00", "end": "09:00", "multiplier": 1.5}, {"start": "22:00", "end": "06:00", "multiplier": 0.5}]
+
+
+@pytest.fixture
+def tariff():
+    return Tariff.from_dict(PRICES, {"bands": BANDS, "daily_cap": 60, "country_surcharges": {"UA": 1.1, "DE": 1.25}})
+
+
+class TestTariff:
+    def test_flat_rate_matches_hourly_price(self):
+        flat = Tariff.from_dict(PRICES, {})
+        for floor in range(4):
+            for minutes in range(0, 2000, 7):
+                expected = 0.0 if minutes <= 30 else round((minutes - 30) / 60 * PRICES[floor], 2)
+                assert flat.fee(minutes, floor) == expected
+
+    def test_half_cents_round_up(self):
+        assert Tariff.from_dict(PRICES, {}).fee(33, 4) == 0.13
+
+    def test_wrapping_band_is_split_at_midnight(self):
+        assert bands_from_config(BANDS[1:]) == (RateBand(1320, 1440, 0.5), RateBand(0, 360, 0.5))
+
+    def test_time_of_day_bands(self, tariff):
+        assert tariff.fee(90, 0, entry_minute=6 * 60 + 30) == 9.0
+        assert tariff.fee(90, 0, entry_minute=12 * 60) == 6.0
+        assert tariff.fee(150, 0, entry_minute=23 * 60) == 6.0
+
+    def test_daily_cap_applies_per_24h_block(self):
+        capped = Tariff.from_dict(PRICES, {"daily_cap": 40})
+        assert capped.fee(24 * 60, 0) == 40.0
+        assert capped.fee(3 * 24 * 60, 0) == 120.0
+        assert capped.fee(2 * 24 * 60 + 90, 0) == 89.0
+
+    def test_country_surcharge(self, tariff):
+        assert tariff.fee(90, 0, entry_minute=720, country="DE") == 7.5
+        assert tariff.fee(90, 0, entry_minute=720, country="PL") == 6.0
+
+    def test_rejects_overlapping_bands(self):
+        with pytest.raises(ValueError):
+            Tariff.from_dict(PRICES, {"bands": [{"start": "07:00", "end": "09:00", "multiplier": 2},
+                                                {"start": "08:00", "end": "10:00", "multiplier": 3}]})
+
+    def test_vectorized_matches_scalar(self, tariff):
+        rng = random.Random(17)
+        minutes = [rng.choice([rng.randint(0, 120), rng.randint(0, 10 * 24 * 60)]) for _ in range(20000)]
+        floors = [rng.randint(0, 4) for _ in minutes]
+        entry_minutes = [rng.randint(0, 1439) for _ in minutes]
+        countries = [rng.choice(["PL", "UA", "DE", None]) for _ in minutes]
+
+        fees = tariff.fees(minutes, floors, entry_minutes, countries)
+
+        expected = [tariff.fee(m, f, e, c) for m, f, e, c in zip(minutes, floors, entry_minutes, countries)]
+        assert fees.tolist() == expected
+
+    def test_vectorized_validation(self, tariff):
+        assert tariff.fees([], []).tolist() == []
+        with pytest.raises(ValueError):
+            tariff.fees([10, -1], [0, 0])
+        with pytest.raises(ValueError):
+            tariff.fees([10, 10], [0, 7])
+
+
+class TestPriceCalculatorTariff:
+    def test_stay_fee_uses_entry_time_and_country(self):
+        calculator = PriceCalculator(PRICES, {"bands": BANDS, "country_surcharges": {"UA": 1.1}})
+
+        assert calculator.calculate_stay_fee(90, 0, datetime(2026, 1, 1, 6, 30), "UA") == 9.9
+
+    def test_batch_fees(self, price_calculator):
+        fees = price_calculator.calculate_fees(np.array([30, 90, 90]), np.array([0, 0, 4]))
+
+        assert fees.tolist() == [0.0, 6.0, 2.0]
@@ -0,0 +1,42 @@
+import pytest
+from src.app.services.topic_router import TopicRouter, topic_matches
+
+
+class TestTopicMatches:
+    @pytest.mark.parametrize("pattern, topic, expected", [
+        ("parking/entrance/camera", "parking/entrance/camera", True),
+        ("parking/+/camera", "parking/exit/camera", True),
+        ("parking/+/camera", "parking/exit/camera/raw", False),
+        ("parking/#", "parking/sensors/floor/1/spot/2/status", True),
+        ("parking/#", "parking", True),
+        ("parking/sensors/+/+/spot/#", "parking/sensors/floor/1/spot/2/status", True),
+        ("parking/+/camera", "parking/camera", False),
+    ])
+    def test_mqtt_wildcards(self, pattern, topic, expected):
+        assert topic_matches(pattern, topic) is expected
+
+
+class TestTopicRouter:
+    def test_exact_route_wins_over_wildcard(self):
+        router = TopicRouter()
+        router.add("parking/+/camera", "any camera")
+        router.add("parking/entrance/camera", "entrance")
+
+        assert router.resolve("parking/entrance/camera") == "entrance"
+        assert router.resolve("parking/exit/camera") == "any camera"
+        assert router.resolve("parking/system/command") is None
+
+    def test_decorator_registers_handler(self):
+        router = TopicRouter()
+
+        @router.route("parking/parking_meter/#")
+        def handle(*args):
+            return args
+
+        assert router.resolve("parking/parking_meter/pay") is handle
+        assert router.subscriptions == ["parking/parking_meter/#"]
+
+    @pytest.mark.parametrize("pattern", ["parking/#/camera", "parking/gate+/camera", "parking/#x"])
+    def test_rejects_invalid_patterns(self, pattern):
+        with pytest.raises(ValueError):
+            TopicRouter().add(pattern, print)
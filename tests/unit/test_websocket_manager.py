@@ -0,0 +1,102 @@
+import asyncio
+import json
+from src.app.websocket_manager import ConnectionManager
+
+
+class FakeWebSocket:
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.sent = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("connection reset")
+        await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self):
+        self.closed = True
+
+
+def run(scenario):
+    return asyncio.run(scenario())
+
+
+class TestConnectionManager:
+    def test_broadcast_reaches_all_clients(self):
+        async def scenario():
+            manager = ConnectionManager()
+            clients = [FakeWebSocket(), FakeWebSocket()]
+            for client in clients:
+                await manager.connect(client)
+            await manager.broadcast({"type": "VEHICLE_ENTRY", "spot": 1})
+            await asyncio.sleep(0.01)
+            return clients
+
+        for client in run(scenario):
+            assert client.sent == [{"type": "VEHICLE_ENTRY", "spot": 1}]
+
+    def test_slow_client_does_not_delay_broadcast(self):
+        async def scenario():
+            manager = ConnectionManager()
+            await manager.connect(FakeWebSocket(delay=1.0))
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            for i in range(10):
+                await manager.broadcast({"i": i})
+            return loop.time() - start
+
+        assert run(scenario) < 0.1
+
+    def test_drop_oldest_when_queue_is_full(self):
+        async def scenario():
+            manager = ConnectionManager(queue_size=3, max_dropped=100)
+            client = FakeWebSocket()
+            await manager.connect(client)
+            for i in range(6):
+                manager.publish({"i": i})
+            await asyncio.sleep(0.01)
+            return client
+
+        assert [m["i"] for m in run(scenario).sent] == [3, 4, 5]
+
+    def test_coalesce_replaces_pending_message(self):
+        async def scenario():
+            manager = ConnectionManager()
+            client = FakeWebSocket()
+            await manager.connect(client)
+            manager.publish({"type": "OCCUPANCY", "v": 1}, coalesce_key="occupancy")
+            manager.publish({"type": "EVENT"})
+            manager.publish({"type": "OCCUPANCY", "v": 2}, coalesce_key="occupancy")
+            await asyncio.sleep(0.01)
+            return client
+
+        assert run(scenario).sent == [{"type": "OCCUPANCY", "v": 2}, {"type": "EVENT"}]
+
+    def test_failed_and_slow_clients_are_evicted(self):
+        async def scenario():
+            manager = ConnectionManager(send_timeout=0.05, queue_size=2, max_dropped=3)
+            broken, slow, lagging, healthy = FakeWebSocket(fail=True), FakeWebSocket(delay=1.0), FakeWebSocket(delay=1.0), FakeWebSocket()
+            await manager.connect(broken)
+            await manager.connect(healthy)
+            manager.publish({"i": 0})
+            await asyncio.sleep(0.01)
+
+            await manager.connect(slow)
+            manager.publish({"i": 1})
+            await asyncio.sleep(0.1)
+
+            await manager.connect(lagging)
+            for i in range(10):
+                manager.publish({"i": i})
+                await asyncio.sleep(0.001)
+            return manager, broken, slow, lagging, healthy
+
+        manager, broken, slow, lagging, healthy = run(scenario)
+        assert manager.active_connections == [healthy]
+        assert broken.closed and slow.closed and lagging.closed